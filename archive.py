@@ -0,0 +1,34 @@
+import sys
+from argparse import ArgumentParser
+
+from utils.archive import KEEP_ISSUES, archive_issues
+
+
+def main(keep: int, newsletter_id=None, compact: bool = False) -> int:
+    archived = archive_issues(keep, newsletter_id, compact)
+
+    for n_id, issue in archived:
+        print(f"Archived issue {issue} of newsletter {n_id}")
+    print(f"Archived {len(archived)} issues")
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Archive Old Newsletter Issues")
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=KEEP_ISSUES,
+        help="The number of recent issues of each newsletter to leave in place.",
+    )
+    parser.add_argument("--newsletter", type=int, help="Only archive this newsletter.")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Reclaim the space freed in the questions and answers tables.",
+    )
+
+    args = parser.parse_args()
+
+    sys.exit(main(args.keep, args.newsletter, args.compact))
@@ -0,0 +1,87 @@
+"""
+Hot-table query times for the current issue before and after the older
+issues are archived and the tables compacted.
+
+    python -m benchmarks.bench_archive --issues 40 --questions 20 --answers 15
+"""
+
+import os
+from argparse import ArgumentParser
+
+from utils import database
+from utils.archive import archive_issues
+
+from .common import benchmark_database, report, seed_issue, time_calls
+
+
+def database_size() -> str:
+    if database.BACKEND.name != "sqlite":
+        return "n/a"
+
+    # Move everything written into the file itself, recent writes and the
+    # compaction are otherwise only in the -wal file
+    conn = database.BACKEND.connect()
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+    finally:
+        conn.close()
+
+    return f"{os.path.getsize(database.BACKEND.path) / 1024:.0f}KiB"
+
+
+def time_reads(newsletter_id: int, current: int, repeat: int, label: str) -> None:
+    # Warm the pool
+    database.get_responses(newsletter_id, current)
+
+    report(
+        f"{label} get_questions",
+        time_calls(lambda: database.get_questions(newsletter_id, current), repeat),
+    )
+    report(
+        f"{label} get_responses",
+        time_calls(lambda: database.get_responses(newsletter_id, current), repeat),
+    )
+    report(
+        f"{label} old get_responses",
+        time_calls(lambda: database.get_responses(newsletter_id, 1), repeat),
+    )
+
+
+def main(
+    n_issues: int, n_questions: int, n_answers: int, repeat: int, configured: bool
+) -> None:
+    with benchmark_database(configured):
+        database.create_newsletter("Benchmark", b"hash", "newsletters/benchmark")
+        newsletter_id = max(row[0] for row in database.get_newsletters())
+
+        for issue in range(1, n_issues + 1):
+            seed_issue(newsletter_id, issue, n_questions, n_answers)
+
+        print(
+            f"{database.BACKEND.name}: {n_issues} issues of {n_questions} questions "
+            f"x {n_answers} answers, {repeat} calls"
+        )
+
+        print(f"database size {database_size()}")
+        time_reads(newsletter_id, n_issues, repeat, "hot")
+
+        archived = archive_issues(1, newsletter_id, compact_tables=True)
+        print(f"archived {len(archived)} issues, database size {database_size()}")
+        time_reads(newsletter_id, n_issues, repeat, "compacted")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Benchmark archiving old issues")
+    parser.add_argument("--issues", type=int, default=40)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--answers", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--configured",
+        action="store_true",
+        help="Use the database from .env (it will be written to) instead of SQLite.",
+    )
+
+    args = parser.parse_args()
+
+    main(args.issues, args.questions, args.answers, args.repeat, args.configured)
@@ -0,0 +1,65 @@
+"""
+Login latency against the number of newsletters, verifying the candidate
+passcodes in turn and in parallel. Newsletters are not fingerprinted so
+every one of them is a candidate, the worst case being a wrong passcode.
+
+    python -m benchmarks.bench_authenticate --newsletters 1 4 16 --workers 4
+"""
+
+import os
+from argparse import ArgumentParser
+from unittest.mock import patch
+
+from utils import database, html
+
+from .common import benchmark_database, report, time_calls
+
+from typing import List
+
+
+def time_logins(passcode: str, workers: int, repeat: int, label: str) -> None:
+    with patch.object(html, "AUTH_WORKERS", workers), patch.object(
+        html, "_VERIFIER", None
+    ), patch.object(html, "PASSCODE_PEPPER", None):
+        report(label, time_calls(lambda: html.authenticate(passcode), repeat))
+
+        if html._VERIFIER is not None:
+            html._VERIFIER.shutdown()
+
+
+def main(counts: List[int], workers: int, repeat: int, configured: bool) -> None:
+    print(
+        f"{database.BACKEND.name if configured else 'sqlite'}: {html.ITERATIONS} "
+        f"iterations, {workers} workers on {os.cpu_count()} cores, {repeat} calls"
+    )
+
+    for count in counts:
+        with benchmark_database(configured):
+            for n in range(count):
+                database.create_newsletter(
+                    f"Benchmark {n}",
+                    html.hash_passcode(f"passcode {n}"),
+                    f"newsletters/benchmark_{n}",
+                )
+
+            # The last newsletter is the slowest to find in turn
+            last = f"passcode {count - 1}"
+            for mode, n_workers in [("serial", 1), ("parallel", workers)]:
+                time_logins(last, n_workers, repeat, f"{count} {mode} last")
+                time_logins("wrong", n_workers, repeat, f"{count} {mode} wrong")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Benchmark verifying passcodes in parallel")
+    parser.add_argument("--newsletters", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--configured",
+        action="store_true",
+        help="Use the database from .env (it will be written to) instead of SQLite.",
+    )
+
+    args = parser.parse_args()
+
+    main(args.newsletters, args.workers, args.repeat, args.configured)
@@ -0,0 +1,53 @@
+"""
+Per-call latency of get_responses on a large issue with and without the
+prepared statement cache.
+
+    python -m benchmarks.bench_get_responses --questions 50 --answers 40
+"""
+
+from argparse import ArgumentParser
+
+from utils import database
+
+from .common import benchmark_database, report, seed_issue, time_calls
+
+
+def main(n_questions: int, n_answers: int, repeat: int, configured: bool) -> None:
+    with benchmark_database(configured):
+        database.create_newsletter("Benchmark", b"hash", "newsletters/benchmark")
+        newsletter_id = max(row[0] for row in database.get_newsletters())
+        seed_issue(newsletter_id, 1, n_questions, n_answers)
+
+        print(
+            f"{database.BACKEND.name}: get_responses over {n_questions} questions "
+            f"x {n_answers} answers, {repeat} calls"
+        )
+
+        for prepare in [False, True]:
+            database.PREPARE_STATEMENTS = prepare
+
+            # Warm the pool and, when enabled, the statement cache
+            database.get_responses(newsletter_id, 1)
+            timings = time_calls(
+                lambda: database.get_responses(newsletter_id, 1), repeat
+            )
+            report("prepared" if prepare else "plain", timings)
+
+        if database.BACKEND.name == "sqlite":
+            print("(backend has no server-side prepare, both runs use plain queries)")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Benchmark get_responses")
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--answers", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--configured",
+        action="store_true",
+        help="Use the database from .env (it will be written to) instead of SQLite.",
+    )
+
+    args = parser.parse_args()
+
+    main(args.questions, args.answers, args.repeat, args.configured)
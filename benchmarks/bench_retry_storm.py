@@ -0,0 +1,84 @@
+"""
+CPU used by clients retrying the same wrong passcode, with and without
+wrong passcodes being remembered. Newsletters are not fingerprinted so that
+every attempt would otherwise verify the passcode against each of them.
+
+    python -m benchmarks.bench_retry_storm --newsletters 8 --clients 4 --retries 10
+"""
+
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from utils import cache, database, html
+from utils.cache import DiskCache
+
+from .common import benchmark_database
+
+
+def storm(clients: int, retries: int) -> None:
+    def client(_: int) -> None:
+        for _ in range(retries):
+            verified, *_ = html.authenticate("wrong passcode")
+            assert not verified
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+
+
+def measure(label: str, clients: int, retries: int, disk_cache) -> None:
+    with patch.object(cache, "CACHE", disk_cache), patch.object(
+        html, "PASSCODE_PEPPER", "benchmark"
+    ), patch.object(html, "fingerprint", lambda passcode: None):
+        wall, cpu = time.perf_counter(), time.process_time()
+        storm(clients, retries)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    attempts = clients * retries
+    print(
+        f"{label:<12} {attempts} attempts  wall {wall:7.2f}s  cpu {cpu:7.2f}s  "
+        f"cpu per attempt {cpu / attempts * 1000:8.2f}ms  "
+        f"cores busy {cpu / wall:5.2f}"
+    )
+
+
+def main(n_newsletters: int, clients: int, retries: int, configured: bool) -> None:
+    with benchmark_database(configured), tempfile.TemporaryDirectory() as directory:
+        for n in range(n_newsletters):
+            database.create_newsletter(
+                f"Benchmark {n}",
+                html.hash_passcode(f"passcode {n}"),
+                f"newsletters/benchmark_{n}",
+            )
+
+        print(
+            f"{n_newsletters} newsletters, {clients} clients retrying "
+            f"{retries} times on {os.cpu_count()} cores"
+        )
+
+        measure("uncached", clients, retries, None)
+
+        disk_cache = DiskCache(os.path.join(directory, "cache.db"))
+        try:
+            measure("cached", clients, retries, disk_cache)
+        finally:
+            disk_cache.close()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Benchmark a storm of retried wrong passcodes")
+    parser.add_argument("--newsletters", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=10)
+    parser.add_argument(
+        "--configured",
+        action="store_true",
+        help="Use the database from .env (it will be written to) instead of SQLite.",
+    )
+
+    args = parser.parse_args()
+
+    main(args.newsletters, args.clients, args.retries, args.configured)
@@ -0,0 +1,116 @@
+"""
+Rendering the page templates with the compiled single-pass templates against
+replacing each key in turn, as `format_html` used to.
+
+    python -m benchmarks.bench_templates --repeat 2000
+"""
+
+import os
+import timeit
+from argparse import ArgumentParser
+from functools import partial
+
+import bleach
+
+from utils.html import format_html
+from utils.templates import compile_template
+from utils.type_hints import ReplaceDict
+
+
+TEMPLATES = os.path.join(os.path.dirname(__file__), "..", "templates")
+
+
+def replace_each(html: str, replacements: ReplaceDict, sanitize: bool = False) -> str:
+    for key, value in replacements.items():
+        if key not in html:
+            raise KeyError("Substitution key not found in text to replace")
+
+        if sanitize:
+            cleaned = bleach.clean(value)
+            linkified = bleach.linkify(cleaned)
+            lined = linkified.replace("\n", "<br/>")
+        else:
+            lined = value
+
+        if lined is None:
+            lined = ""
+        html = html.replace(f"[{key}]", lined)
+
+    return html
+
+
+def read(name: str) -> str:
+    with open(os.path.join(TEMPLATES, name)) as file:
+        return file.read()
+
+
+def cases(n_questions: int):
+    # Filled in the order the renderers fill them, the questions going into
+    # the answer form before its title
+    questions = "".join(
+        replace_each(
+            read("user_question.html"),
+            {"ID": f"question_{q}", "NAME": f"Creator {q}", "QUESTION": "Why?"},
+        )
+        for q in range(n_questions)
+    )
+
+    yield (
+        "answer",
+        read("answer.html"),
+        {
+            "HEADER": read("header.html"),
+            "NAVBAR": read("navbar.html"),
+            "QUESTIONS": questions,
+            "TITLE": "Newsletter 5",
+        },
+    )
+    yield (
+        "question",
+        read("user_question.html"),
+        {
+            "ID": "question_1",
+            "NAME": "Creator",
+            "QUESTION": "Why?",
+        },
+    )
+    yield (
+        "image",
+        read("image_question.html"),
+        {
+            "ID": "question_1",
+            "QUESTION": "Why?",
+            "IMG_ID": "image_1",
+        },
+    )
+
+
+def main(repeat: int, n_questions: int) -> None:
+    print(f"{repeat} renders, pages of {n_questions} questions")
+
+    for label, html, values in cases(n_questions):
+        if label != "answer":
+            # Replacing in turn also fills placeholders inside earlier values
+            assert format_html(html, values) == replace_each(html, values)
+
+        # Compiled once as the registry does, rendering is what is repeated
+        renders = [
+            ("replace", partial(replace_each, html, values)),
+            ("compiled", partial(format_html, compile_template(html), values)),
+        ]
+        for name, render in renders:
+            seconds = timeit.timeit(render, number=repeat)
+            print(
+                f"{label:<9} {name:<9} {len(html):>7} chars  "
+                f"{seconds / repeat * 1e6:9.2f}us per render"
+            )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Benchmark rendering templates")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=50)
+
+    args = parser.parse_args()
+
+    main(args.repeat, args.questions)
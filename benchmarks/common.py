@@ -0,0 +1,87 @@
+import math
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from utils import database
+from utils.backends import SQLiteBackend
+
+from typing import Callable, Dict, Iterator, List
+
+
+@contextmanager
+def benchmark_database(configured: bool = False) -> Iterator[None]:
+    """
+    Point `utils.database` at a throwaway SQLite database for the duration of
+    the benchmark. With `configured` the database from `.env` is used
+    instead, which should be a scratch database as it will be written to.
+    """
+    if configured:
+        yield
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend, pool = database.BACKEND, database._POOL
+        database.BACKEND = SQLiteBackend(os.path.join(directory, "bench.db"))
+        database._POOL = None
+        try:
+            yield
+        finally:
+            if database._POOL is not None:
+                database._POOL.close_all()
+            database.BACKEND, database._POOL = backend, pool
+
+
+def seed_issue(
+    newsletter_id: int, issue: int, n_questions: int, n_answers: int
+) -> None:
+    """
+    Fill an issue with user questions each answered by `n_answers` people.
+    """
+    for q in range(n_questions):
+        database.insert_question(newsletter_id, issue, f"Creator {q}", f"Question {q}")
+
+    _, submitted = database.get_questions(newsletter_id, issue)
+    for a in range(n_answers):
+        database.insert_answer(
+            f"Member {a}",
+            {
+                q_id: {"img": None, "text": f"Answer {a} " * 20}
+                for q_id, *_ in submitted
+            },
+        )
+
+
+def time_calls(func: Callable[[], object], repeat: int) -> List[float]:
+    """
+    Returns
+    -------
+    timings : list[float]
+        The wall time of each call in milliseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def summarise(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    return {
+        "mean": statistics.mean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)],
+    }
+
+
+def report(label: str, timings: List[float]) -> None:
+    summary = summarise(timings)
+    print(
+        f"{label:<28} mean {summary['mean']:8.3f}ms  "
+        f"p50 {summary['p50']:8.3f}ms  p95 {summary['p95']:8.3f}ms"
+    )
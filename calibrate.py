@@ -0,0 +1,37 @@
+import sys
+import time
+from argparse import ArgumentParser
+
+from utils.html import HASH_ALGO, ITERATIONS, calibrate, hash_passcode, verify
+
+
+def main(target_ms: float, algorithm: str) -> int:
+    iterations = calibrate(target_ms, algorithm)
+
+    # Check the chosen cost the way a login would pay it
+    pass_hash = hash_passcode("calibration", algorithm, iterations)
+    start = time.perf_counter()
+    verify("calibration", pass_hash)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(f"Currently {HASH_ALGO} with {ITERATIONS} iterations")
+    print(f"{algorithm} with {iterations} iterations verifies in {elapsed:.0f}ms")
+    print(f"\nPASSCODE_HASH={algorithm}\nPASSCODE_ITERATIONS={iterations}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Calibrate the Passcode Hash Cost")
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250,
+        help="How long verifying a passcode should take on this host.",
+    )
+    parser.add_argument(
+        "--algorithm", default=HASH_ALGO, help="The hashlib digest to use."
+    )
+
+    args = parser.parse_args()
+
+    sys.exit(main(args.target_ms, args.algorithm))
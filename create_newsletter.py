@@ -1,12 +1,19 @@
 import os
-import yaml
 from getpass import getpass
 from argparse import ArgumentParser
 
-from utils.html import hash_passcode
+from utils.html import fingerprint, hash_passcode
 from utils.database import create_newsletter
 
 
+LINK = "https://skye.purchasethe.uk/projects/newsletter/"
+DEFAULTS = [
+    ("⛅ One Good Thing", "text"),
+    ("👀 Check It Out", "text"),
+    ("📸 Photo Wall", "image"),
+]
+
+
 def create(title: str, email: str, passcode: str):
     pass_hash = hash_passcode(passcode)
 
@@ -18,22 +25,6 @@ def create(title: str, email: str, passcode: str):
         # Not the most secure but it's something
         os.chmod(folder, 0o0710)
 
-    base_config = {
-        "name": title,
-        "email": email,
-        "folder": folder,
-        "link": "https://skye.purchasethe.uk/projects/newsletter/",
-        "issue": 1,
-        "passphrase": passcode,
-        "defaults": [
-            ["⛅ One Good Thing", "text"],
-            ["👀 Check It Out", "text"],
-            ["📸 Photo Wall", "image"],
-        ],
-    }
-
-    with open(os.path.join(folder, "config.yaml"), "w") as f:
-        yaml.dump(base_config, f)
     open(os.path.join(folder, "emails.txt"), "w").close()
     open(os.path.join(folder, "log"), "w").close()
 
@@ -41,7 +32,9 @@ def create(title: str, email: str, passcode: str):
         f"Update {os.path.join(folder, 'emails.txt')} to include the emails of the participants."
     )
 
-    create_newsletter(title, pass_hash, folder)
+    create_newsletter(
+        title, pass_hash, folder, email, LINK, DEFAULTS, fingerprint(passcode)
+    )
 
 
 if __name__ == "__main__":
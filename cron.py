@@ -5,10 +5,59 @@ import os
 import logging
 import mailer
 from utils.constants import State
+from utils.database import get_newsletters, request_scope
 from utils.helpers import get_state, check_and_increment_issue, load_config
 from utils.type_hints import MailerConfig
 
 
+@request_scope()
+def notify(newsletter_id: int, newsletter: str, state: State, password: str):
+    # One request per newsletter, so the config is read back from the primary
+    # the issue was just incremented on rather than a lagging replica
+    success, msg = check_and_increment_issue(newsletter_id)
+
+    if not success:
+        print(f"Failed to increment the issue for {newsletter}: {msg}")
+        exit(3)
+
+    success, config = load_config(newsletter_id, logging.getLogger(__name__))
+
+    if not success:
+        print(f"Unable to load config for {newsletter}")
+        return
+
+    mail_config = MailerConfig(
+        isQuestion=False,
+        isAnswer=False,
+        isSend=False,
+        isManual=False,
+        password=password,
+        debug=False,
+        name=config.name,
+        email=config.email,
+        issue=config.issue,
+        addresses=[config.email],
+        folder=config.folder,
+        link=config.link,
+        text="",
+    )
+
+    msg = ""
+    if state == State.Question:
+        mail_config.isQuestion = True
+        msg = "question request"
+    elif state == State.Answer:
+        mail_config.isAnswer = True
+        msg = "answer request"
+    else:
+        mail_config.isSend = True
+        msg = "publishing"
+
+    mailer.main(mail_config)
+
+    print(f"{newsletter} {msg} successful")
+
+
 def main(home: str, password: str):
     state = get_state()
 
@@ -16,53 +65,8 @@ def main(home: str, password: str):
         print("Newsletter folder does not exist")
         exit(2)
 
-    for newsletter in os.listdir(os.path.join(home, "newsletters")):
-        success, msg = check_and_increment_issue(
-            os.path.join(home, "newsletters", newsletter)
-        )
-
-        if not success:
-            print(f"Failed to increment the issue for {newsletter}: {msg}")
-            exit(3)
-
-        success, config = load_config(
-            os.path.join(home, "newsletters", newsletter), logging.getLogger(__name__)
-        )
-
-        if not success:
-            print(f"Unable to load config for {newsletter}")
-            continue
-
-        mail_config = MailerConfig(
-            isQuestion=False,
-            isAnswer=False,
-            isSend=False,
-            isManual=False,
-            password=password,
-            debug=False,
-            name=config.name,
-            email=config.email,
-            issue=config.issue,
-            addresses=[config.email],
-            folder=config.folder,
-            link=config.link,
-            text="",
-        )
-
-        msg = ""
-        if state == State.Question:
-            mail_config.isQuestion = True
-            msg = "question request"
-        elif state == State.Answer:
-            mail_config.isAnswer = True
-            msg = "answer request"
-        else:
-            mail_config.isSend = True
-            msg = "publishing"
-
-        mailer.main(mail_config)
-
-        print(f"{newsletter} {msg} successful")
+    for newsletter_id, newsletter, _, _ in get_newsletters():
+        notify(newsletter_id, newsletter, state, password)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 
+from utils import async_database, tokens
 from utils.constants import State
 from utils.logger import renderer_logger as LOGGER
 from utils.helpers import get_state, load_config
@@ -9,10 +10,12 @@ from utils.database import (
     insert_answer,
     insert_default_questions,
     insert_question,
+    request_scope,
+    track_queries,
 )
 from renderers import render_question_form, render_answer_form, render_newsletter
 
-from typing import DefaultDict, Optional
+from typing import DefaultDict, Optional, Tuple, Union
 from utils.type_hints import NewsletterToken, NewsletterResponse
 
 
@@ -20,21 +23,31 @@ DIR = os.path.dirname(__file__)
 NOW = datetime.now()
 
 
-def render(
-    token: NewsletterToken,
-    issue: Optional[int],
-) -> NewsletterResponse:
+@track_queries("login")
+def login(parameters: dict) -> NewsletterResponse:
     """
-    Render the relevant form or page based on 'factors'.
+    Exchange a passcode for a signed session token, so that it is only
+    hashed once per visit.
 
     Parameters
     ----------
-    token : NewsletterToken
-        The dict of processed JSON web token
-    issue : int
-        The issue number to render
+    parameters : dict
+        The dict of processed POST parameters
     """
-    success, config = load_config(token.folder, LOGGER)
+    passcode = parameters.get("unlock", "")
+    if passcode == "":
+        return NewsletterResponse(422, "No passcode provided")
+
+    token = tokens.login(passcode)
+    if token is None:
+        return NewsletterResponse(401, "Incorrect passcode")
+
+    return NewsletterResponse(200, token)
+
+
+def _render(token: NewsletterToken, issue: Optional[int]) -> NewsletterResponse:
+    # Shared by `render` and `render_async`, which each wrap it in a request
+    success, config = load_config(token.id, LOGGER)
     if not success:
         return NewsletterResponse(500, "Failed to load config")
 
@@ -50,7 +63,8 @@ def render(
 
     state = get_state()
     if state == State.Question:
-        default_questions, _ = get_questions(token.id, config.issue)
+        questions = get_questions(token.id, config.issue)
+        default_questions, _ = questions
 
         if len(default_questions) == 0:
             LOGGER.info("Inserting default questions")
@@ -63,21 +77,45 @@ def render(
                     f"Failed to add default questions:\n{error}\nWill attempt next time"
                 )
 
-        return render_question_form(token.title, token.id, config.issue)
+        # Inserting defaults does not change the submitted questions
+        return render_question_form(
+            token.title, token.id, config.issue, questions=questions
+        )
     elif state == State.Answer:
         return render_answer_form(token.title, token.id, config.issue)
     else:
         return render_newsletter(token.title, token.id, config.issue, config.issue)
 
 
-def answer(parameters: dict) -> NewsletterResponse:
+@track_queries("render")
+@request_scope()
+def render(
+    token: NewsletterToken,
+    issue: Optional[int],
+) -> NewsletterResponse:
     """
-    Add a users answers to the database if they are authorised.
+    Render the relevant form or page based on 'factors'.
 
     Parameters
     ----------
-    parameters : dict
-        The dict of processed POST parameters
+    token : NewsletterToken
+        The dict of processed JSON web token
+    issue : int
+        The issue number to render
+    """
+    return _render(token, issue)
+
+
+def _parse_answers(parameters: dict) -> Union[NewsletterResponse, Tuple[str, dict]]:
+    """
+    Validate the POST parameters of an answer submission.
+
+    Returns
+    -------
+    NewsletterResponse
+        The error response if the parameters are invalid
+    (name, responses) : (str, dict[question_id, (img, answer)])
+        Otherwise the name and responses to insert
     """
     responses = DefaultDict(lambda: {"img": None, "text": None})
     name = ""
@@ -114,13 +152,33 @@ def answer(parameters: dict) -> NewsletterResponse:
                 "Form keys are not in expected format. Do not mess with the post request!",
             )
 
-    created, error = insert_answer(name, responses)
+    return name, responses
+
+
+@track_queries("answer")
+@request_scope()
+def answer(parameters: dict) -> NewsletterResponse:
+    """
+    Add a users answers to the database if they are authorised.
+
+    Parameters
+    ----------
+    parameters : dict
+        The dict of processed POST parameters
+    """
+    parsed = _parse_answers(parameters)
+    if isinstance(parsed, NewsletterResponse):
+        return parsed
+
+    created, error = insert_answer(*parsed)
     if created:
         return NewsletterResponse(201, "Thank you for submitting your answers :).")
     else:
         return NewsletterResponse(500, error)
 
 
+@track_queries("question_submit")
+@request_scope()
 def question_submit(token: NewsletterToken, parameters: dict) -> NewsletterResponse:
     """
     Add a users questions to the database if they are authorised.
@@ -132,7 +190,7 @@ def question_submit(token: NewsletterToken, parameters: dict) -> NewsletterRespo
     parameters : dict
         The dict of processed POST parameters
     """
-    success, config = load_config(token.folder, LOGGER)
+    success, config = load_config(token.id, LOGGER)
     if not success:
         return NewsletterResponse(500, "Failed to load config")
 
@@ -147,3 +205,78 @@ def question_submit(token: NewsletterToken, parameters: dict) -> NewsletterRespo
         return NewsletterResponse(201, "Thank you for submitting your question :).")
     else:
         return NewsletterResponse(500, error)
+
+
+@async_database.tracked("render_async")
+async def render_async(
+    token: NewsletterToken,
+    issue: Optional[int],
+) -> NewsletterResponse:
+    """
+    Awaitable `render`, run whole on the database executor so that an event
+    loop can serve other requests while the database works. Each read needs
+    the issue from the config, so there is nothing to fetch concurrently, and
+    pages are still served from the cache before any of the issue is fetched.
+
+    Parameters
+    ----------
+    token : NewsletterToken
+        The dict of processed JSON web token
+    issue : int
+        The issue number to render
+    """
+    return await async_database.run(_render, token, issue)
+
+
+@async_database.tracked("answer_async")
+async def answer_async(parameters: dict) -> NewsletterResponse:
+    """
+    Awaitable `answer`.
+
+    Parameters
+    ----------
+    parameters : dict
+        The dict of processed POST parameters
+    """
+    parsed = _parse_answers(parameters)
+    if isinstance(parsed, NewsletterResponse):
+        return parsed
+
+    created, error = await async_database.insert_answer(*parsed)
+    if created:
+        return NewsletterResponse(201, "Thank you for submitting your answers :).")
+    else:
+        return NewsletterResponse(500, error)
+
+
+@async_database.tracked("question_submit_async")
+async def question_submit_async(
+    token: NewsletterToken, parameters: dict
+) -> NewsletterResponse:
+    """
+    Awaitable `question_submit`.
+
+    Parameters
+    ----------
+    token : NewsletterToken
+        The dict of processed JSON web token
+    parameters : dict
+        The dict of processed POST parameters
+    """
+    success, config = await async_database.run(load_config, token.id, LOGGER)
+    if not success:
+        return NewsletterResponse(500, "Failed to load config")
+
+    name = parameters["name"]
+    question = parameters["question"]
+
+    if name == "" or question == "":
+        return NewsletterResponse(422, "No name or question provided")
+
+    created, error = await async_database.insert_question(
+        token.id, config.issue, name, question
+    )
+    if created:
+        return NewsletterResponse(201, "Thank you for submitting your question :).")
+    else:
+        return NewsletterResponse(500, error)
@@ -1,7 +1,18 @@
 CREATE TABLE IF NOT EXISTS newsletters (
     id INT AUTO_INCREMENT NOT NULL PRIMARY KEY,
     title VARCHAR(100) NOT NULL,
-    passcode VARBINARY(100) NOT NULL
+    passcode VARBINARY(100) NOT NULL,
+    folder VARCHAR(100) NOT NULL,
+    -- The configuration, NULL until migrated from the newsletter's folder
+    name VARCHAR(100) NULL,
+    email VARCHAR(100) NULL,
+    link VARCHAR(255) NULL,
+    issue INT NOT NULL DEFAULT 1,
+    -- JSON list of [text, type] pairs
+    default_questions TEXT NULL,
+    -- Peppered HMAC of the passcode, NULL until the first login since
+    fingerprint VARBINARY(32) NULL,
+    INDEX newsletters_fingerprint (fingerprint)
 );
 
 CREATE TABLE IF NOT EXISTS questions (
@@ -12,7 +23,8 @@ CREATE TABLE IF NOT EXISTS questions (
     creator VARCHAR(100) NOT NULL,
     text TEXT NOT NULL,
     issue INT NOT NULL,
-    FOREIGN KEY (newsletter_id) REFERENCES newsletters(id)
+    FOREIGN KEY (newsletter_id) REFERENCES newsletters(id),
+    INDEX questions_issue (newsletter_id, issue, base, id)
 );
 
 CREATE TABLE IF NOT EXISTS answers (
@@ -25,3 +37,42 @@ CREATE TABLE IF NOT EXISTS answers (
     -- Remove duplicates for a person responding twice
     UNIQUE INDEX(question_id, name)
 );
+
+-- Per-issue totals kept up to date by the insert functions
+CREATE TABLE IF NOT EXISTS issues (
+    newsletter_id INT NOT NULL,
+    issue INT NOT NULL,
+    question_count INT NOT NULL DEFAULT 0,
+    answer_count INT NOT NULL DEFAULT 0,
+    respondent_count INT NOT NULL DEFAULT 0,
+    last_answer_at DATETIME NULL,
+    PRIMARY KEY (newsletter_id, issue),
+    FOREIGN KEY (newsletter_id) REFERENCES newsletters(id)
+);
+
+-- Who has answered each issue, so respondents are counted once
+CREATE TABLE IF NOT EXISTS issue_respondents (
+    newsletter_id INT NOT NULL,
+    issue INT NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (newsletter_id, issue, name)
+);
+
+-- Old issues moved out of questions and answers, see utils/archive.py
+CREATE TABLE IF NOT EXISTS archived_issues (
+    newsletter_id INT NOT NULL,
+    issue INT NOT NULL,
+    archived_at DATETIME NOT NULL,
+    data MEDIUMBLOB NOT NULL,
+    PRIMARY KEY (newsletter_id, issue),
+    FOREIGN KEY (newsletter_id) REFERENCES newsletters(id)
+);
+
+-- Bumped by every change to a newsletter's title, passcode or fingerprint so
+-- processes know when to reload them, see utils/registry.py
+CREATE TABLE IF NOT EXISTS newsletters_version (
+    id INT NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
+INSERT IGNORE INTO newsletters_version (id, version) VALUES (1, 1);
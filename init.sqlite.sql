@@ -0,0 +1,77 @@
+-- SQLite equivalent of init.sql, applied automatically by the sqlite backend
+CREATE TABLE IF NOT EXISTS newsletters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    title VARCHAR(100) NOT NULL,
+    passcode BLOB NOT NULL,
+    folder VARCHAR(100) NOT NULL,
+    name VARCHAR(100) NULL,
+    email VARCHAR(100) NULL,
+    link VARCHAR(255) NULL,
+    issue INTEGER NOT NULL DEFAULT 1,
+    default_questions TEXT NULL,
+    fingerprint BLOB NULL
+);
+
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    newsletter_id INTEGER NOT NULL REFERENCES newsletters(id),
+    base INTEGER NOT NULL DEFAULT 0,
+    type TEXT NOT NULL DEFAULT 'text' CHECK (type IN ('text', 'image')),
+    creator VARCHAR(100) NOT NULL,
+    text TEXT NOT NULL,
+    issue INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS questions_issue
+ON questions (newsletter_id, issue, base, id);
+
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions(id),
+    img_path VARCHAR(100),
+    name VARCHAR(100) NOT NULL,
+    text TEXT NOT NULL
+);
+
+-- Remove duplicates for a person responding twice
+CREATE UNIQUE INDEX IF NOT EXISTS question_id ON answers (question_id, name);
+
+-- Per-issue totals kept up to date by the insert functions
+CREATE TABLE IF NOT EXISTS issues (
+    newsletter_id INTEGER NOT NULL REFERENCES newsletters(id),
+    issue INTEGER NOT NULL,
+    question_count INTEGER NOT NULL DEFAULT 0,
+    answer_count INTEGER NOT NULL DEFAULT 0,
+    respondent_count INTEGER NOT NULL DEFAULT 0,
+    last_answer_at DATETIME,
+    PRIMARY KEY (newsletter_id, issue)
+);
+
+-- Who has answered each issue, so respondents are counted once
+CREATE TABLE IF NOT EXISTS issue_respondents (
+    newsletter_id INTEGER NOT NULL,
+    issue INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    PRIMARY KEY (newsletter_id, issue, name)
+);
+
+-- Old issues moved out of questions and answers, see utils/archive.py
+CREATE TABLE IF NOT EXISTS archived_issues (
+    newsletter_id INTEGER NOT NULL REFERENCES newsletters(id),
+    issue INTEGER NOT NULL,
+    archived_at DATETIME NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (newsletter_id, issue)
+);
+
+-- Bumped by every change to a newsletter's title, passcode or fingerprint.
+-- Not seeded here as this runs on every connect, the first bump inserts it
+CREATE TABLE IF NOT EXISTS newsletters_version (
+    id INTEGER NOT NULL PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+-- Indexes on columns added by migrations. Kept last as the script stops here,
+-- with every table above created, on databases that predate the column until
+-- `migrate.py` adds it
+CREATE INDEX IF NOT EXISTS newsletters_fingerprint ON newsletters (fingerprint);
@@ -49,7 +49,7 @@ if __name__ == "__main__":
     assert MAIL_PASS is not None, "Failed to find email config"
 
     args = ArgumentParser(prog="Mailer agent for newsletter")
-    args.add_argument("-c", "--config_dir", required=True)
+    args.add_argument("-n", "--newsletter", type=int, required=True)
     args.add_argument("-d", "--debug", action="store_true")
     args.add_argument("-q", "--question", action="store_true")
     args.add_argument("-a", "--answer", action="store_true")
@@ -57,7 +57,7 @@ if __name__ == "__main__":
 
     args = args.parse_args()
 
-    success, config = load_config(os.path.join("/home/atp45", args.config_dir), LOGGER)
+    success, config = load_config(args.newsletter, LOGGER)
     if success:
         main(
             MailerConfig(
@@ -0,0 +1,50 @@
+import sys
+from argparse import ArgumentParser
+
+from utils.database import rebuild_issue_summaries
+from utils.migrations import MIGRATIONS, check_indexes, get_schema_version, migrate
+
+
+def main(target=None, check: bool = False, rebuild_issues: bool = False) -> int:
+    current = get_schema_version()
+    latest = MIGRATIONS[-1].version
+    print(f"Database at schema version {current} (latest {latest})")
+
+    for version in migrate(target):
+        print(f"Applied migration {version}")
+
+    if rebuild_issues:
+        print(f"Rebuilt the summaries of {rebuild_issue_summaries()} issues")
+
+    if check:
+        problems = check_indexes()
+        for name, issues in problems.items():
+            for issue in issues:
+                print(f"{name}: {issue}")
+
+        if problems:
+            return 1
+
+        print("All hot queries use their indexes")
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Migrate Newsletter Database")
+    parser.add_argument("--target", type=int, help="Stop after this schema version.")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="EXPLAIN the hot queries and fail if they do not use their indexes.",
+    )
+
+    parser.add_argument(
+        "--rebuild-issues",
+        action="store_true",
+        help="Recompute every per-issue summary from the questions and answers.",
+    )
+
+    args = parser.parse_args()
+
+    sys.exit(main(args.target, args.check, args.rebuild_issues))
@@ -3,13 +3,16 @@ import shutil
 from dotenv import load_dotenv
 from datetime import datetime
 
+from utils import cache
 from utils.logger import renderer_logger as LOGGER
 from utils.html import format_html, make_navbar
+from utils.templates import TEMPLATES
 from utils.database import (
     get_questions,
-    get_responses,
+    iter_responses,
 )
 
+from typing import Optional, Tuple
 from utils.type_hints import NewsletterResponse, ReplaceDict
 
 
@@ -18,12 +21,35 @@ load_dotenv()
 
 HOME = os.getenv("HOME")
 
-DIR = os.path.dirname(__file__)
 NOW = datetime.now()
 
+# The keys filled in each template, checked once when it is compiled
+TEMPLATES.declare("header.html", ["TITLE"])
+TEMPLATES.declare("question_form.html", ["HEADER", "NAVBAR", "TITLE", "SUBMITTED"])
+TEMPLATES.declare("submitted_question.html", ["RESPONSES"])
+TEMPLATES.declare("response.html", ["NAME", "TEXT"])
+TEMPLATES.declare("answer.html", ["HEADER", "NAVBAR", "QUESTIONS", "TITLE"])
+TEMPLATES.declare("user_question.html", ["ID", "NAME", "QUESTION"])
+TEMPLATES.declare("text_question.html", ["ID", "QUESTION"])
+TEMPLATES.declare("image_question.html", ["ID", "QUESTION", "IMG_ID"])
+TEMPLATES.declare("newsletter.html", ["HEADER", "NAVBAR", "TITLE", "NEWSLETTER"])
+TEMPLATES.declare("image_response.html", ["NAME", "SRC", "CAPTION"])
+TEMPLATES.declare("question_board.html", ["CREATOR", "QUESTION", "RESPONSES"])
+
+
+def render_header(title: str) -> str:
+    """
+    Render the page header, which is filled in before being placed in a page
+    as templates are only rendered once.
+    """
+    return format_html(TEMPLATES.get("header.html"), {"TITLE": title})
+
 
 def render_question_form(
-    title: str, newsletter_id: int, issue: int
+    title: str,
+    newsletter_id: int,
+    issue: int,
+    questions: Optional[Tuple[list, list]] = None,
 ) -> NewsletterResponse:
     """
     Render the question submission form for the given newsletter.
@@ -36,39 +62,52 @@ def render_question_form(
         The newsletter ID
     issue : int
         The current issue number
+    questions : (default, submitted), optional
+        The result of `get_questions` if already fetched during this request
     """
+    key = cache.issue_key(newsletter_id, issue, "page", "question", title)
+    page = cache.get(key)
+    if page is not None:
+        return page
+
     LOGGER.info("Rendering question form")
-    html = open(os.path.join(DIR, "templates/question_form.html")).read()
-    submitted_questions = open(
-        os.path.join(DIR, "templates/submitted_question.html")
-    ).read()
-    question = open(os.path.join(DIR, "templates/response.html")).read()
+    html = TEMPLATES.get("question_form.html")
+    submitted_questions = TEMPLATES.get("submitted_question.html")
+    question = TEMPLATES.get("response.html")
 
     submission_html = ""
-    _, questions = get_questions(newsletter_id, issue)
-    for submission in questions:
+    if questions is None:
+        questions = get_questions(newsletter_id, issue)
+
+    _, submitted = questions
+    for submission in submitted:
         _, name, text = submission
 
         values: ReplaceDict = {"NAME": name, "TEXT": text}
 
         submission_html += format_html(
-            question[:],  # Copy string
+            question,
             values,
             sanitize=True,
         )
 
     values: ReplaceDict = {
-        "HEADER": open(os.path.join(DIR, "templates/header.html")).read(),
+        "HEADER": render_header(f"{title} {issue}"),
         "NAVBAR": make_navbar(issue, issue),
         "TITLE": f"{title} {issue}",
         "SUBMITTED": format_html(submitted_questions, {"RESPONSES": submission_html}),
     }
 
-    return NewsletterResponse(200, format_html(html, values), content_type="text/html")
+    page = NewsletterResponse(200, format_html(html, values), content_type="text/html")
+    cache.put_issue(newsletter_id, issue, key, page)
+
+    return page
 
 
 def render_answer_form(
-    title: str, newsletter_id: int, issue: int
+    title: str,
+    newsletter_id: int,
+    issue: int,
 ) -> NewsletterResponse:
     """
     Render the response form for the given newsletter.
@@ -82,11 +121,16 @@ def render_answer_form(
     issue : int
         The current issue number
     """
+    key = cache.issue_key(newsletter_id, issue, "page", "answer", title)
+    page = cache.get(key)
+    if page is not None:
+        return page
+
     LOGGER.info("Rendering answer form")
-    html = open(os.path.join(DIR, "templates/answer.html")).read()
-    user_question = open(os.path.join(DIR, "templates/user_question.html")).read()
-    text_question = open(os.path.join(DIR, "templates/text_question.html")).read()
-    img_question = open(os.path.join(DIR, "templates/image_question.html")).read()
+    html = TEMPLATES.get("answer.html")
+    user_question = TEMPLATES.get("user_question.html")
+    text_question = TEMPLATES.get("text_question.html")
+    img_question = TEMPLATES.get("image_question.html")
 
     base_questions, user_questions = get_questions(newsletter_id, issue)
 
@@ -100,7 +144,7 @@ def render_answer_form(
             "QUESTION": q_text,
         }
         question_html += format_html(
-            user_question[:],  # Copy string
+            user_question,
             values,
             sanitize=True,
         )
@@ -111,30 +155,36 @@ def render_answer_form(
 
         if q_type == "text":
             question_html += format_html(
-                text_question[:],  # Copy string
+                text_question,
                 values,
             )
         elif q_type == "image":
             values["IMG_ID"] = f"image_{q_id}"
             question_html += format_html(
-                img_question[:],  # Copy string
+                img_question,
                 values,
             )
         else:
             return NewsletterResponse(500, f"question type {q_type} unknown.")
 
     values: ReplaceDict = {
-        "HEADER": open(os.path.join(DIR, "templates/header.html")).read(),
+        "HEADER": render_header(f"{title} {issue}"),
         "NAVBAR": make_navbar(issue, issue),
         "QUESTIONS": question_html,
         "TITLE": f"{title} {issue}",
     }
 
-    return NewsletterResponse(200, format_html(html, values), content_type="text/html")
+    page = NewsletterResponse(200, format_html(html, values), content_type="text/html")
+    cache.put_issue(newsletter_id, issue, key, page)
+
+    return page
 
 
 def render_newsletter(
-    title: str, newsletter_id: int, issue: int, curr_issue: int
+    title: str,
+    newsletter_id: int,
+    issue: int,
+    curr_issue: int,
 ) -> NewsletterResponse:
     """
     Render the given newsletter.
@@ -150,16 +200,20 @@ def render_newsletter(
     curr_issue : int
         The current issue according to the config files
     """
-    LOGGER.info("Rendering published newsletter")
-    html = open(os.path.join(DIR, "templates/newsletter.html")).read()
-    text_response = open(os.path.join(DIR, "templates/response.html")).read()
-    img_response = open(os.path.join(DIR, "templates/image_response.html")).read()
-    question_board = open(os.path.join(DIR, "templates/question_board.html")).read()
+    key = cache.issue_key(newsletter_id, issue, "page", "newsletter", title, curr_issue)
+    page = cache.get(key)
+    if page is not None:
+        return page
 
-    responses = get_responses(newsletter_id, issue)
+    LOGGER.info("Rendering published newsletter")
+    html = TEMPLATES.get("newsletter.html")
+    text_response = TEMPLATES.get("response.html")
+    img_response = TEMPLATES.get("image_response.html")
+    question_board = TEMPLATES.get("question_board.html")
 
+    # Streamed from the database one question at a time
     n_html = ""
-    for question in responses:
+    for question in iter_responses(newsletter_id, issue):
         creator, q_text, q_responses = question
         q_values: ReplaceDict = {"CREATOR": creator, "QUESTION": str(q_text)}
         q_html = ""
@@ -187,10 +241,13 @@ def render_newsletter(
         n_html += format_html(question_board, q_values)
 
     values: ReplaceDict = {
-        "HEADER": open(os.path.join(DIR, "templates/header.html")).read(),
+        "HEADER": render_header(f"{title} {issue}"),
         "NAVBAR": make_navbar(issue, curr_issue),
         "TITLE": f"{title} {issue}",
         "NEWSLETTER": n_html,
     }
 
-    return NewsletterResponse(200, format_html(html, values), content_type="text/html")
+    page = NewsletterResponse(200, format_html(html, values), content_type="text/html")
+    cache.put_issue(newsletter_id, issue, key, page)
+
+    return page
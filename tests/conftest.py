@@ -0,0 +1,61 @@
+import pytest
+
+from utils.backends import SQLiteBackend
+
+
+@pytest.fixture
+def sqlite_database(tmp_path, mocker):
+    """
+    Point `utils.database` at a fresh embedded database for the test.
+    """
+    backend = SQLiteBackend(str(tmp_path / "newsletter.db"))
+
+    mocker.patch("utils.database.BACKEND", backend)
+    mocker.patch("utils.database._POOL", None)
+    # Newsletters loaded from another test's database must not be served
+    mocker.patch("utils.registry.REGISTRY._version", None)
+    mocker.patch("utils.registry.REGISTRY._loaded", False)
+
+    yield backend
+
+    from utils import database
+
+    if database._POOL is not None:
+        database._POOL.close_all()
+
+
+@pytest.fixture
+def replica_database(sqlite_database, tmp_path, mocker):
+    """
+    A second embedded database configured as the read replica of
+    `sqlite_database`. Nothing is replicated between them.
+    """
+    backend = SQLiteBackend(str(tmp_path / "replica.db"))
+
+    mocker.patch("utils.database.REPLICA", backend)
+    mocker.patch("utils.database._REPLICA_POOL", None)
+    mocker.patch("utils.database._REPLICA_DOWN_UNTIL", 0.0)
+
+    yield backend
+
+    from utils import database
+
+    if database._REPLICA_POOL is not None:
+        database._REPLICA_POOL.close_all()
+
+
+@pytest.fixture
+def disk_cache(tmp_path, mocker):
+    """
+    Enable the shared cache in a fresh file for the test.
+    """
+    from utils.cache import DiskCache
+
+    disk_cache = DiskCache(str(tmp_path / "cache.db"))
+
+    mocker.patch("utils.cache.CACHE", disk_cache)
+    mocker.patch("utils.cache.CACHE_SETTLE", 0)
+
+    yield disk_cache
+
+    disk_cache.close()
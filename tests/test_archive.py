@@ -0,0 +1,108 @@
+import pytest
+
+from utils import archive
+from utils.archive import archive_issue, archive_issues, cold_issues
+from utils.database import (
+    _pack_archive,
+    create_newsletter,
+    get_issue_summary,
+    get_questions,
+    get_responses,
+    insert_answer,
+    insert_default_questions,
+    insert_question,
+    iter_responses,
+)
+
+
+@pytest.fixture
+def issues(sqlite_database):
+    create_newsletter("Title", b"hash", "newsletters/title")
+    create_newsletter("Other", b"hash", "newsletters/other")
+
+    for n_id in [1, 2]:
+        for issue in [1, 2, 3]:
+            insert_default_questions(n_id, issue, [("Default", "text")])
+            insert_question(n_id, issue, "User", f"Question {issue}?")
+            insert_question(n_id, issue, "Quiet", "Unanswered?")
+
+            default, submitted = get_questions(n_id, issue)
+            insert_answer(
+                "Name",
+                {
+                    default[0][0]: {"img": "path/img.png", "text": "Photo"},
+                    submitted[0][0]: {"img": None, "text": "Answer"},
+                },
+            )
+            insert_answer("Other", {default[0][0]: {"img": None, "text": "Too"}})
+
+
+class TestColdIssues:
+    def test_keeps_recent_issues(self, issues):
+        assert cold_issues(2) == [(1, 1), (2, 1)]
+        assert cold_issues(1, newsletter_id=2) == [(2, 1), (2, 2)]
+        assert cold_issues(3) == []
+
+    def test_current_issue_always_kept(self, issues):
+        with pytest.raises(ValueError):
+            cold_issues(0)
+
+
+class TestArchiveIssue:
+    def test_reads_unchanged(self, issues):
+        # ARRANGE
+        expected = get_responses(1, 1)
+        summary = get_issue_summary(1, 1)
+
+        # ACT
+        archived = archive_issue(1, 1)
+
+        # ASSERT
+        assert archived
+        assert get_questions(1, 1) == ([], [])
+        assert get_responses(1, 1) == expected
+        assert list(iter_responses(1, 1)) == expected
+        assert get_issue_summary(1, 1) == summary
+
+        # Other issues are untouched
+        assert get_questions(1, 2) != ([], [])
+        assert get_questions(2, 1) != ([], [])
+
+    def test_empty_issue_not_archived(self, issues):
+        assert not archive_issue(1, 9)
+        assert get_responses(1, 9) == []
+
+    def test_concurrent_write_skips_issue(self, issues, mocker):
+        # ARRANGE
+        default, _ = get_questions(1, 1)
+
+        def pack_then_answer(questions, answers):
+            insert_answer("Late", {default[0][0]: {"img": None, "text": "Late"}})
+            return _pack_archive(questions, answers)
+
+        mocker.patch("utils.archive._pack_archive", side_effect=pack_then_answer)
+
+        # ACT
+        archived = archive_issue(1, 1)
+
+        # ASSERT
+        assert not archived
+        assert ("Late", "Late", None) in get_responses(1, 1)[-1][2]
+        assert cold_issues(2, newsletter_id=1) == [(1, 1)]
+
+
+class TestArchiveIssues:
+    def test_archives_and_compacts(self, issues, mocker):
+        # ARRANGE
+        expected = {key: get_responses(*key) for key in [(1, 1), (1, 2), (2, 1)]}
+        compact = mocker.spy(archive, "compact")
+
+        # ACT
+        archived = archive_issues(2, compact_tables=True)
+
+        # ASSERT
+        assert archived == [(1, 1), (2, 1)]
+        compact.assert_called_once()
+        assert {key: get_responses(*key) for key in expected} == expected
+        assert archive_issues(2, compact_tables=True) == []
+        compact.assert_called_once()
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils import async_database
+from utils.database import (
+    create_newsletter,
+    get_newsletter_candidates,
+    insert_question,
+    pool_stats,
+)
+
+
+class TestAsyncDatabase:
+    def test_round_trip(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        insert_question(1, 1, "User", "Question?")
+
+        async def submit():
+            created = await async_database.insert_answer(
+                "Name", {1: {"img": None, "text": "Answer"}}
+            )
+            return created, await async_database.get_responses(1, 1)
+
+        # ACT
+        created, responses = asyncio.run(submit())
+
+        # ASSERT
+        assert created == (True, "")
+        assert responses == [("User", "Question?", [("Name", "Answer", None)])]
+
+    def test_create_newsletter_fingerprinted(self, sqlite_database):
+        # ACT
+        created = asyncio.run(
+            async_database.create_newsletter(
+                "Title", b"hash", "newsletters/title", fingerprint=b"print"
+            )
+        )
+
+        # ASSERT
+        assert created == (True, None)
+        assert get_newsletter_candidates(b"other") == []
+        assert [row[0] for row in get_newsletter_candidates(b"print")] == [1]
+
+    def test_independent_queries_run_concurrently(self, mocker):
+        # ARRANGE
+        def slow_responses(newsletter_id, issue):
+            time.sleep(0.2)
+            return [("", f"Question {issue}", [])]
+
+        mocker.patch("utils.database.get_responses", slow_responses)
+
+        async def fetch():
+            return await asyncio.gather(
+                *[async_database.get_responses(1, issue) for issue in range(3)]
+            )
+
+        # ACT
+        start = time.monotonic()
+        results = asyncio.run(fetch())
+        elapsed = time.monotonic() - start
+
+        # ASSERT
+        assert [r[0][1] for r in results] == [f"Question {i}" for i in range(3)]
+        assert elapsed < 0.5
+
+    def test_timeout(self, mocker):
+        # ARRANGE
+        release = threading.Event()
+        mocker.patch("utils.database.get_newsletters", lambda: release.wait(1) and [])
+
+        # ACT / ASSERT
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(async_database.get_newsletters(timeout=0.01))
+
+        release.set()
+
+    def test_cancelled_query_returns_connection(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+
+        async def cancel():
+            task = asyncio.ensure_future(async_database.get_questions(1, 1))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        # ACT
+        asyncio.run(cancel())
+
+        # ASSERT
+        deadline = time.monotonic() + 1
+        while time.monotonic() < deadline:
+            stats = pool_stats()
+            if stats["open"] == stats["idle"]:
+                break
+            time.sleep(0.01)
+
+        assert stats["open"] == stats["idle"]
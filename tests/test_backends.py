@@ -0,0 +1,159 @@
+import sqlite3
+
+import pytest
+
+from utils.backends import MySQLBackend, SQLiteBackend, get_backend
+from utils.database import (
+    create_newsletter,
+    get_newsletters,
+    get_questions,
+    get_responses,
+    insert_answer,
+    insert_default_questions,
+    insert_question,
+    iter_responses,
+)
+from utils.migrations import check_indexes, get_schema_version, migrate
+
+
+class TestGetBackend:
+    def test_mysql_backend(self):
+        backend = get_backend("mysql", user="user", password="pass", database="db")
+
+        assert isinstance(backend, MySQLBackend)
+        assert backend.host == "localhost"
+
+    def test_sqlite_backend(self):
+        backend = get_backend("sqlite", path="newsletter.db")
+
+        assert isinstance(backend, SQLiteBackend)
+        assert backend.path == "newsletter.db"
+
+    def test_sqlite_requires_path(self):
+        with pytest.raises(AssertionError):
+            get_backend("sqlite")
+
+    def test_unknown_backend_fails(self):
+        with pytest.raises(ValueError):
+            get_backend("postgres")
+
+
+class TestSQLiteBackend:
+    def test_connection_tuned(self, sqlite_database):
+        conn = sqlite_database.connect()
+
+        assert conn.execute("PRAGMA journal_mode;").fetchone() == ("wal",)
+        assert conn.execute("PRAGMA foreign_keys;").fetchone() == (1,)
+        assert not conn.in_transaction
+
+    def test_schema_applied(self, sqlite_database):
+        conn = sqlite_database.connect()
+        cursor = conn.cursor()
+
+        for table, column in [
+            ("newsletters", "folder"),
+            ("questions", "base"),
+            ("answers", "img_path"),
+        ]:
+            assert sqlite_database.column_exists(cursor, table, column)
+
+        assert sqlite_database.index_exists(cursor, "questions", "questions_issue")
+        assert sqlite_database.index_exists(cursor, "answers", "question_id")
+        assert sqlite_database.index_exists(
+            cursor, "newsletters", "newsletters_fingerprint"
+        )
+
+    def test_opens_before_fingerprint_migration(self, tmp_path):
+        # ARRANGE
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            """
+            CREATE TABLE newsletters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+                title VARCHAR(100) NOT NULL,
+                passcode BLOB NOT NULL,
+                folder VARCHAR(100) NOT NULL
+            );
+            """
+        )
+        conn.commit()
+        conn.close()
+        backend = SQLiteBackend(path)
+
+        # ACT
+        conn = backend.connect()
+        cursor = conn.cursor()
+
+        # ASSERT
+        assert backend.column_exists(cursor, "questions", "base")
+        assert not backend.index_exists(
+            cursor, "newsletters", "newsletters_fingerprint"
+        )
+
+    def test_round_trip(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        ((n_id, title, passcode, folder),) = get_newsletters()
+
+        # ACT
+        insert_default_questions(n_id, 1, [("Default", "text"), ("Photo", "image")])
+        insert_question(n_id, 1, "User", "Question?")
+        default, submitted = get_questions(n_id, 1)
+
+        answers = {q_id: {"img": None, "text": "Answer"} for q_id, *_ in default}
+        answers[submitted[0][0]] = {"img": "path/img.png", "text": "Caption"}
+        success, _ = insert_answer("Name", answers)
+
+        # ASSERT
+        assert (title, passcode, folder) == ("Title", b"hash", "newsletters/title")
+        assert [text for _, text, _ in default] == ["Default", "Photo"]
+        assert [form for _, _, form in default] == ["text", "image"]
+        assert submitted[0][1:] == ("User", "Question?")
+        assert success
+
+        assert get_responses(n_id, 1) == [
+            ("User", "Question?", [("Name", "Caption", "path/img.png")]),
+            ("", "Default", [("Name", "Answer", None)]),
+            ("", "Photo", [("Name", "Answer", None)]),
+        ]
+        assert get_responses(n_id, 2) == []
+        assert list(iter_responses(n_id, 1)) == get_responses(n_id, 1)
+
+    def test_duplicate_answers_ignored(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        insert_question(1, 1, "User", "Question?")
+        insert_answer("Name", {1: {"img": None, "text": "First"}})
+
+        # ACT
+        success, error = insert_answer("Name", {1: {"img": None, "text": "Second"}})
+
+        # ASSERT
+        assert success
+        assert get_responses(1, 1) == [("User", "Question?", [("Name", "First", None)])]
+
+    def test_integrity_errors_mapped(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+
+        # ACT
+        success, error = insert_question(1, 1, "User", None)
+
+        # ASSERT
+        assert not success
+        assert error == "Expected value but received null."
+        assert get_questions(1, 1) == ([], [])
+
+    def test_unrelated_errors_propagate(self, sqlite_database):
+        conn = sqlite_database.connect()
+
+        with pytest.raises(sqlite3.OperationalError):
+            conn.cursor().execute("SELECT * FROM missing;")
+
+    def test_migrations_and_indexes(self, sqlite_database):
+        applied = migrate()
+
+        assert get_schema_version() == applied[-1]
+        assert migrate() == []
+        assert check_indexes() == {}
@@ -0,0 +1,209 @@
+import logging
+import multiprocessing
+import time
+
+import renderers
+from utils import cache
+from utils.cache import DiskCache
+from utils.database import (
+    create_newsletter,
+    get_config,
+    get_questions,
+    get_responses,
+    insert_answer,
+    increment_issue,
+    insert_question,
+    track_queries,
+)
+
+
+def put_from_process(path, key, value):
+    DiskCache(path).put(key, value)
+
+
+class TestDiskCache:
+    def test_round_trip(self, tmp_path):
+        # ARRANGE
+        disk_cache = DiskCache(str(tmp_path / "cache.db"))
+
+        # ACT
+        disk_cache.put("key", {"a": [1, 2]})
+
+        # ASSERT
+        assert disk_cache.get("key") == {"a": [1, 2]}
+        assert disk_cache.get("missing") is None
+
+    def test_expired_entries_missed(self, tmp_path):
+        # ARRANGE
+        disk_cache = DiskCache(str(tmp_path / "cache.db"))
+
+        # ACT
+        disk_cache.put("key", "value", ttl=-1)
+
+        # ASSERT
+        assert disk_cache.get("key") is None
+
+    def test_least_recently_used_evicted(self, tmp_path):
+        # ARRANGE
+        disk_cache = DiskCache(str(tmp_path / "cache.db"), max_bytes=250, touch_after=0)
+        disk_cache.put("first", "x" * 100)
+        disk_cache.put("second", "x" * 100)
+
+        # ACT
+        time.sleep(0.01)
+        disk_cache.get("first")
+        disk_cache.put("third", "x" * 100)
+
+        # ASSERT
+        assert disk_cache.get("first") is not None
+        assert disk_cache.get("second") is None
+        assert disk_cache.get("third") is not None
+
+    def test_oversized_values_not_stored(self, tmp_path):
+        # ARRANGE
+        disk_cache = DiskCache(str(tmp_path / "cache.db"), max_bytes=50)
+
+        # ACT
+        disk_cache.put("key", "x" * 100)
+
+        # ASSERT
+        assert disk_cache.get("key") is None
+
+    def test_delete_prefix(self, tmp_path):
+        # ARRANGE
+        disk_cache = DiskCache(str(tmp_path / "cache.db"))
+        for key in ["issue:1:1:a", "issue:1:1:b", "issue:1:10:a", "issue:1:2:a"]:
+            disk_cache.put(key, key)
+
+        # ACT
+        disk_cache.delete_prefix("issue:1:1:")
+
+        # ASSERT
+        assert disk_cache.get("issue:1:1:a") is None
+        assert disk_cache.get("issue:1:1:b") is None
+        assert disk_cache.get("issue:1:10:a") == "issue:1:10:a"
+        assert disk_cache.get("issue:1:2:a") == "issue:1:2:a"
+
+    def test_shared_between_processes(self, tmp_path):
+        # ARRANGE
+        path = str(tmp_path / "cache.db")
+        disk_cache = DiskCache(path)
+        disk_cache.put("key", "old")
+
+        # ACT
+        process = multiprocessing.Process(
+            target=put_from_process, args=(path, "key", "new")
+        )
+        process.start()
+        process.join()
+
+        # ASSERT
+        assert process.exitcode == 0
+        assert disk_cache.get("key") == "new"
+
+    def test_errors_are_misses(self, tmp_path, caplog):
+        # ARRANGE
+        disk_cache = DiskCache(str(tmp_path))
+        caplog.set_level(logging.WARNING)
+
+        # ACT
+        disk_cache.put("key", "value")
+
+        # ASSERT
+        assert disk_cache.get("key") is None
+        assert "Cache" in caplog.text
+
+
+class TestDatabaseCache:
+    def test_reads_cached_until_written(self, sqlite_database, disk_cache):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        insert_question(1, 1, "User", "Question?")
+        insert_question(1, 2, "User", "Other issue?")
+        for issue in [1, 2]:
+            get_questions(1, issue)
+            get_responses(1, issue)
+
+        # ACT
+        with track_queries("cached") as cached:
+            questions = get_questions(1, 1)
+            get_responses(1, 1)
+
+        insert_answer("Name", {questions[1][0][0]: {"img": None, "text": "Answer"}})
+
+        with track_queries("invalidated") as invalidated:
+            responses = get_responses(1, 1)
+            get_questions(1, 1)
+            get_questions(1, 2)
+            get_responses(1, 2)
+
+        # ASSERT
+        assert cached.count == 0
+        assert responses == [("User", "Question?", [("Name", "Answer", None)])]
+        # Only the issue written to is read again
+        assert invalidated.callers == {"get_responses": 1, "get_questions": 1}
+
+    def test_config_cached_until_incremented(self, sqlite_database, disk_cache):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title", email="a@b.c")
+        get_config(1)
+
+        # ACT
+        with track_queries("cached") as cached:
+            before = get_config(1)
+
+        increment_issue(1)
+
+        with track_queries("invalidated") as invalidated:
+            after = get_config(1)
+
+        # ASSERT
+        assert cached.count == 0
+        assert before.issue == 1
+        assert after.issue == 2
+        assert invalidated.callers == {"get_config": 1}
+
+    def test_not_cached_while_write_settles(self, sqlite_database, disk_cache, mocker):
+        # ARRANGE
+        mocker.patch("utils.cache.CACHE_SETTLE", 60)
+        create_newsletter("Title", b"hash", "newsletters/title")
+        insert_question(1, 1, "User", "Question?")
+
+        # ACT
+        with track_queries("settling") as settling:
+            get_questions(1, 1)
+            get_questions(1, 1)
+
+        # ASSERT
+        assert settling.count == 2
+
+    def test_disabled_without_path(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+
+        # ACT
+        with track_queries("uncached") as uncached:
+            get_questions(1, 1)
+            get_questions(1, 1)
+
+        # ASSERT
+        assert cache.CACHE is None
+        assert uncached.count == 2
+
+
+class TestPageCache:
+    def test_page_rendered_once(self, disk_cache, mocker):
+        # ARRANGE
+        mock_questions = mocker.patch("renderers.get_questions")
+        mock_questions.return_value = ([(1, "Default", "text")], [(2, "User", "Q?")])
+
+        # ACT
+        first = renderers.render_answer_form("Title", 1, 1)
+        second = renderers.render_answer_form("Title", 1, 1)
+        cache.invalidate_issue(1, 1)
+        third = renderers.render_answer_form("Title", 1, 1)
+
+        # ASSERT
+        assert first == second == third
+        assert first.status == 200
+        assert mock_questions.call_count == 2
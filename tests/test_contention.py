@@ -0,0 +1,167 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+import pytest
+from mysql.connector.locales import errorcode
+
+from utils import database
+from utils.backends import SQLiteBackend
+from utils.database import (
+    BUSY_ERROR,
+    create_newsletter,
+    get_issue_summary,
+    get_questions,
+    get_responses,
+    insert_answer,
+    insert_default_questions,
+)
+
+
+def lock_error(code):
+    return mysql.connector.DatabaseError(errno=code)
+
+
+class TestRetryOnLock:
+    def setup_connection(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+        mock_cursor.rowcount = 0
+
+        mocker.patch(
+            "utils.database._get_connection", return_value=(mock_conn, mock_cursor)
+        )
+        mocker.patch("utils.database.LOCK_BACKOFF", 0)
+
+        return mock_conn, mock_cursor
+
+    @pytest.mark.parametrize(
+        "code", [errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT]
+    )
+    def test_retries_lock_errors(self, mocker, code):
+        # ARRANGE
+        mock_conn, mock_cursor = self.setup_connection(mocker)
+        mock_cursor.executemany.side_effect = [lock_error(code), None]
+
+        # ACT
+        success, error = insert_answer("Name", {1: {"img": None, "text": "A"}})
+
+        # ASSERT
+        assert success
+        assert mock_cursor.executemany.call_count == 2
+        assert mock_conn.close.call_count == 2
+        mock_conn.commit.assert_called_once()
+
+    def test_gives_up_when_busy(self, mocker):
+        # ARRANGE
+        mock_conn, mock_cursor = self.setup_connection(mocker)
+        mock_cursor.executemany.side_effect = lock_error(errorcode.ER_LOCK_DEADLOCK)
+
+        # ACT
+        success, error = insert_answer("Name", {1: {"img": None, "text": "A"}})
+
+        # ASSERT
+        assert not success
+        assert error == BUSY_ERROR
+        assert mock_cursor.executemany.call_count == database.LOCK_RETRIES + 1
+        mock_conn.commit.assert_not_called()
+
+    def test_other_errors_not_retried(self, mocker):
+        # ARRANGE
+        _, mock_cursor = self.setup_connection(mocker)
+        mock_cursor.executemany.side_effect = lock_error(errorcode.ER_NO_SUCH_TABLE)
+
+        # ACT
+        with pytest.raises(mysql.connector.DatabaseError):
+            insert_answer("Name", {1: {"img": None, "text": "A"}})
+
+        # ASSERT
+        mock_cursor.executemany.assert_called_once()
+
+    def test_answers_inserted_in_key_order(self, mocker):
+        # ARRANGE
+        _, mock_cursor = self.setup_connection(mocker)
+
+        # ACT
+        insert_answer("Name", {q_id: {"img": None, "text": "A"} for q_id in [3, 1, 2]})
+
+        # ASSERT
+        rows = mock_cursor.executemany.call_args[0][1]
+        assert [q_id for q_id, *_ in rows] == [1, 2, 3]
+
+    def test_sqlite_lock_surfaces_as_timeout(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        holder = sqlite_database.connect()
+        holder.execute("BEGIN IMMEDIATE;")
+
+        conn = sqlite_database.connect()
+        conn.execute("PRAGMA busy_timeout=0;")
+
+        # ACT
+        with pytest.raises(mysql.connector.DatabaseError) as error:
+            conn.cursor().execute(
+                "INSERT INTO newsletters (title, passcode, folder) VALUES (%s, %s, %s);",
+                ("Other", b"hash", "newsletters/other"),
+            )
+
+        # ASSERT
+        assert error.value.errno == errorcode.ER_LOCK_WAIT_TIMEOUT
+        holder.rollback()
+
+
+class TestConcurrentSubmissions:
+    n_questions = 8
+    n_members = 60
+    n_workers = 16
+
+    def test_parallel_submissions_not_lost(self, sqlite_database, mocker):
+        # ARRANGE
+        # Fail fast on the write lock so that contention goes through the retries
+        pragmas = tuple(
+            "PRAGMA busy_timeout=0;" if pragma.startswith("PRAGMA busy") else pragma
+            for pragma in SQLiteBackend.PRAGMAS
+        )
+        mocker.patch.object(sqlite_database, "PRAGMAS", pragmas)
+        mocker.patch("utils.database.POOL_SIZE", self.n_workers)
+        mocker.patch("utils.database.LOCK_RETRIES", 50)
+        mocker.patch("utils.database.LOCK_BACKOFF", 0.002)
+        retry = mocker.spy(database.time, "sleep")
+
+        create_newsletter("Title", b"hash", "newsletters/title")
+        insert_default_questions(
+            1, 1, [(f"Question {q}", "text") for q in range(self.n_questions)]
+        )
+        default, _ = get_questions(1, 1)
+
+        # Every member submits twice, the second submission is ignored
+        submissions = [
+            (
+                f"Member {m}",
+                {q_id: {"img": None, "text": f"Answer {m}"} for q_id, *_ in default},
+            )
+            for m in range(self.n_members)
+        ] * 2
+
+        # ACT
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.n_workers) as executor:
+            results = list(executor.map(lambda args: insert_answer(*args), submissions))
+        elapsed = time.perf_counter() - start
+
+        # ASSERT
+        assert all(success for success, _ in results), results
+
+        responses = get_responses(1, 1)
+        assert all(len(answers) == self.n_members for _, _, answers in responses)
+        for _, _, answers in responses:
+            assert {text for _, text, _ in answers} == {
+                f"Answer {m}" for m in range(self.n_members)
+            }
+
+        summary = get_issue_summary(1, 1)
+        assert summary.answer_count == self.n_members * self.n_questions
+        assert summary.respondent_count == self.n_members
+
+        # Loose bound, a few hundred per second is typical
+        assert len(submissions) / elapsed > 20, f"{retry.call_count} retries"
@@ -15,19 +15,6 @@ class TestCreateNewsletter:
     title = "Newsletter"
     email = "example@mail.com"
     passcode = "password"
-    config = {
-        "name": title,
-        "email": email,
-        "folder": "newsletters/newsletter",
-        "link": "https://skye.purchasethe.uk/projects/newsletter/",
-        "issue": 1,
-        "passphrase": passcode,
-        "defaults": [
-            ["⛅ One Good Thing", "text"],
-            ["👀 Check It Out", "text"],
-            ["📸 Photo Wall", "image"],
-        ],
-    }
 
     def test_create_new_folder_and_files(self, mocker):
         # ARRANGE
@@ -40,7 +27,6 @@ class TestCreateNewsletter:
         mock_chmod = mocker.patch("create_newsletter.os.chmod")
         mock_file = mocker.mock_open()
         mock_open = mocker.patch("builtins.open", mock_file)
-        mock_yaml_dump = mocker.patch("create_newsletter.yaml.dump")
         mock_create_newsletter = mocker.patch("create_newsletter.create_newsletter")
 
         # ACT
@@ -49,11 +35,17 @@ class TestCreateNewsletter:
         # ASSERT
         mock_makedirs.assert_called_once_with("newsletters/newsletter")
         mock_chmod.assert_called_once_with("newsletters/newsletter", 0o0710)
-        mock_open.assert_any_call("newsletters/newsletter/config.yaml", "w")
-        mock_yaml_dump.assert_called_once_with(self.config, mock_open())
         mock_open.assert_any_call("newsletters/newsletter/emails.txt", "w")
         mock_open.assert_any_call("newsletters/newsletter/log", "w")
-        mock_create_newsletter.assert_called_once()
+        mock_create_newsletter.assert_called_once_with(
+            self.title,
+            ANY,
+            "newsletters/newsletter",
+            self.email,
+            create_newsletter.LINK,
+            create_newsletter.DEFAULTS,
+            ANY,
+        )
 
     def test_folder_already_exists(self, mocker):
         # ARRANGE
@@ -65,7 +57,6 @@ class TestCreateNewsletter:
 
         mock_file = mocker.mock_open()
         mocker.patch("builtins.open", mock_file)
-        mocker.patch("create_newsletter.yaml.dump")
 
         # ACT
         create_newsletter.create(self.title, self.email, self.passcode)
@@ -87,7 +78,6 @@ class TestCreateNewsletter:
 
         mock_file = mocker.mock_open()
         mocker.patch("builtins.open", mock_file)
-        mocker.patch("create_newsletter.yaml.dump")
         mocker.patch("create_newsletter.os.path.join")
 
         # ACT
@@ -96,5 +86,5 @@ class TestCreateNewsletter:
         # ASSERT
         mock_hash_passcode.assert_called_once_with(self.passcode)
         mock_create_newsletter.assert_called_once_with(
-            self.title, "hashed_passcode", ANY
+            self.title, "hashed_passcode", ANY, self.email, ANY, ANY, ANY
         )
@@ -1,8 +1,8 @@
-import os
 import cron
 import copy
 import pytest
 from utils.constants import State
+from utils.database import create_newsletter
 from utils.type_hints import EmptyConfig, MailerConfig, NewsletterConfig
 
 
@@ -45,8 +45,8 @@ class TestCron:
         mock_dir = mocker.patch("cron.os.path.isdir")
         mock_dir.return_value = True
 
-        mock_config_dir = mocker.patch("cron.os.listdir")
-        mock_config_dir.return_value = ["newsletter_1"]
+        mock_newsletters = mocker.patch("cron.get_newsletters")
+        mock_newsletters.return_value = [(1, "newsletter_1", b"hash", "exists")]
 
         mock_inc = mocker.patch("cron.check_and_increment_issue")
         mock_inc.return_value = (True, "")
@@ -62,7 +62,7 @@ class TestCron:
         # ASSERT
         mock_state.assert_called_once()
         mock_dir.assert_called_once_with(self.home + "/newsletters")
-        mock_inc.assert_called_with(self.home + "/newsletters/newsletter_1")
+        mock_inc.assert_called_with(1)
         mock_mailer.assert_called_once_with(self.mail_cfg)
 
     def test_cron_mails_answer_request(self, mocker):
@@ -76,8 +76,8 @@ class TestCron:
         mock_dir = mocker.patch("cron.os.path.isdir")
         mock_dir.return_value = True
 
-        mock_config_dir = mocker.patch("cron.os.listdir")
-        mock_config_dir.return_value = ["newsletter_1"]
+        mock_newsletters = mocker.patch("cron.get_newsletters")
+        mock_newsletters.return_value = [(1, "newsletter_1", b"hash", "exists")]
 
         mock_inc = mocker.patch("cron.check_and_increment_issue")
         mock_inc.return_value = (True, "")
@@ -108,8 +108,8 @@ class TestCron:
         mock_dir = mocker.patch("cron.os.path.isdir")
         mock_dir.return_value = True
 
-        mock_config_dir = mocker.patch("cron.os.listdir")
-        mock_config_dir.return_value = ["newsletter_1"]
+        mock_newsletters = mocker.patch("cron.get_newsletters")
+        mock_newsletters.return_value = [(1, "newsletter_1", b"hash", "exists")]
 
         mock_inc = mocker.patch("cron.check_and_increment_issue")
         mock_inc.return_value = (True, "")
@@ -140,14 +140,18 @@ class TestCron:
         mock_dir = mocker.patch("cron.os.path.isdir")
         mock_dir.return_value = True
 
-        mock_config_dir = mocker.patch("cron.os.listdir")
-        mock_config_dir.return_value = ["bad", "good", "bad"]
+        mock_newsletters = mocker.patch("cron.get_newsletters")
+        mock_newsletters.return_value = [
+            (1, "bad", b"hash", "bad"),
+            (2, "good", b"hash", "good"),
+            (3, "bad", b"hash", "bad"),
+        ]
 
         mock_inc = mocker.patch("cron.check_and_increment_issue")
         mock_inc.return_value = (True, "")
 
-        def conditional_load(path, *args):
-            if path == os.path.join(self.home, "newsletters", "bad"):
+        def conditional_load(newsletter_id, *args):
+            if newsletter_id != 2:
                 return (False, EmptyConfig)
             else:
                 return (True, self.newsletter_cfg)
@@ -181,8 +185,8 @@ class TestCron:
         mock_dir = mocker.patch("cron.os.path.isdir")
         mock_dir.return_value = True
 
-        mock_config_dir = mocker.patch("cron.os.listdir")
-        mock_config_dir.return_value = ["newsletter_1"]
+        mock_newsletters = mocker.patch("cron.get_newsletters")
+        mock_newsletters.return_value = [(1, "newsletter_1", b"hash", "exists")]
 
         mock_inc = mocker.patch("cron.check_and_increment_issue")
         mock_inc.return_value = (False, "test message")
@@ -217,3 +221,33 @@ class TestCron:
         # ASSERT
         assert e_info.value.code == 2
         assert captured.out == "Newsletter folder does not exist\n"
+
+
+class TestCronReplica:
+    def test_incremented_issue_read_from_primary(
+        self, sqlite_database, replica_database, mocker
+    ):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title", "mail@mail.com")
+        # The replica has yet to see the increment
+        conn = replica_database.connect()
+        conn.execute(
+            """
+            INSERT INTO newsletters (title, passcode, folder, name, email, issue)
+            VALUES ('Title', x'00', 'newsletters/title', 'Title', 'mail@mail.com', 1);
+            """
+        )
+        conn.commit()
+        conn.close()
+
+        mocker.patch("cron.get_state", return_value=State.Question)
+        mocker.patch("cron.os.path.isdir", return_value=True)
+        mocker.patch("utils.helpers._get_int_state", return_value=0)
+        mock_mailer = mocker.patch("cron.mailer.main")
+
+        # ACT
+        cron.main("/home/user", "secret")
+
+        # ASSERT
+        (mail_config,), _ = mock_mailer.call_args
+        assert mail_config.issue == 2
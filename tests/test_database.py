@@ -1,4 +1,4 @@
-from unittest.mock import ANY
+from unittest.mock import ANY, call
 
 import mysql.connector
 from mysql.connector import errorcode
@@ -7,10 +7,13 @@ from utils.database import (
     get_newsletters,
     get_questions,
     get_responses,
+    iter_responses,
     insert_answer,
     insert_question,
     insert_default_questions,
     create_newsletter,
+    pool_stats,
+    _get_connection,
 )
 
 
@@ -26,7 +29,9 @@ class TestDatabaseGetters:
 
         newsletters = get_newsletters()
 
-        mock_cursor.execute.assert_called_once_with("SELECT * FROM newsletters;")
+        mock_cursor.execute.assert_called_once_with(
+            "SELECT id, title, passcode, folder FROM newsletters;"
+        )
         mock_cursor.close.assert_called_once()
         mock_conn.close.assert_called_once()
 
@@ -39,14 +44,14 @@ class TestDatabaseGetters:
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
 
-        mock_cursor.fetchall.side_effect = [
-            [(1, "User", "What is this?")],
-            [(2, "What is the purpose?", "text")],
+        mock_cursor.fetchall.return_value = [
+            (1, 0, "User", "What is this?", "text"),
+            (2, 1, "SYS", "What is the purpose?", "text"),
         ]
 
         default, submitted = get_questions(1, 1)
 
-        mock_cursor.execute.assert_called_with(ANY, (1, 1))
+        mock_cursor.execute.assert_called_once_with(ANY, (1, 1))
 
         mock_cursor.close.assert_called_once()
         mock_conn.close.assert_called_once()
@@ -61,30 +66,123 @@ class TestDatabaseGetters:
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
 
-        mock_cursor.fetchall.side_effect = [
-            [(21, "creator1", "User Question 1")],
-            [(22, "Default Question 1")],
-            [("creator1", "Answer 1", ["img1.png"])],
-            [("", "Answer 2", ["img2.png"])],
+        mock_cursor.fetchall.return_value = [
+            (21, 0, "creator1", "User Question 1", "creator1", "Answer 1", "img1.png"),
+            (21, 0, "creator1", "User Question 1", "creator2", "Answer 3", None),
+            (22, 1, "SYS", "Default Question 1", "creator1", "Answer 2", "img2.png"),
+            (23, 1, "SYS", "Default Question 2", None, None, None),
         ]
 
         expected = [
-            ("creator1", "User Question 1", [("creator1", "Answer 1", ["img1.png"])]),
-            ("", "Default Question 1", [("", "Answer 2", ["img2.png"])]),
+            (
+                "creator1",
+                "User Question 1",
+                [("creator1", "Answer 1", "img1.png"), ("creator2", "Answer 3", None)],
+            ),
+            ("", "Default Question 1", [("creator1", "Answer 2", "img2.png")]),
+            ("", "Default Question 2", []),
         ]
 
         results = get_responses(1, 1)
 
+        mock_cursor.execute.assert_called_once_with(ANY, (1, 1))
         mock_cursor.close.assert_called_once()
         mock_conn.close.assert_called_once()
 
-        assert mock_cursor.execute.call_count == 4
-        for i, call in enumerate(
-            [(ANY, (1, 1)), (ANY, (1, 1)), (ANY, (21,)), (ANY, (22,))]
-        ):
-            assert mock_cursor.execute.call_args_list[i][0] == call
+        assert results == expected
+
+    def test_get_responses_query_count_constant(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+
+        mock_get_connection = mocker.patch("utils.database._get_connection")
+        mock_get_connection.return_value = (mock_conn, mock_cursor)
+
+        for n_questions in [1, 30, 300]:
+            mock_cursor.reset_mock()
+            mock_cursor.fetchall.return_value = [
+                (q_id, 0, "creator", f"Question {q_id}", "name", "Answer", None)
+                for q_id in range(n_questions)
+            ]
+
+            results = get_responses(1, 1)
+
+            assert len(results) == n_questions
+            assert mock_cursor.execute.call_count == 1
+
+    def test_get_responses_empty_checks_archive(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+
+        mock_get_connection = mocker.patch("utils.database._get_connection")
+        mock_get_connection.return_value = (mock_conn, mock_cursor)
+        mock_cursor.fetchall.return_value = []
+        mock_cursor.fetchone.return_value = None
+
+        results = get_responses(1, 1)
+
+        assert results == []
+        assert mock_cursor.execute.call_count == 2
+        mock_cursor.execute.assert_called_with(ANY, (1, 1))
+
+
+class TestIterResponses:
+    rows = [
+        (21, 0, "creator1", "User Question 1", "creator1", "Answer 1", "img1.png"),
+        (21, 0, "creator1", "User Question 1", "creator2", "Answer 3", None),
+        (22, 1, "SYS", "Default Question 1", "creator1", "Answer 2", None),
+        (23, 1, "SYS", "Default Question 2", None, None, None),
+    ]
+
+    def test_matches_get_responses(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+        mocker.patch(
+            "utils.database._get_connection", return_value=(mock_conn, mock_cursor)
+        )
+
+        mock_cursor.fetchall.return_value = self.rows
+        expected = get_responses(1, 1)
+
+        mock_cursor.fetchmany.side_effect = [self.rows[:2], self.rows[2:], []]
+        results = list(iter_responses(1, 1))
 
         assert results == expected
+        mock_cursor.execute.assert_called_with(ANY, (1, 1))
+        assert mock_cursor.close.call_count == 2
+        assert mock_conn.close.call_count == 2
+
+    def test_streams_in_batches(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+        mocker.patch(
+            "utils.database._get_connection", return_value=(mock_conn, mock_cursor)
+        )
+        mock_cursor.fetchmany.side_effect = [[row] for row in self.rows] + [[]]
+
+        responses = iter_responses(1, 1)
+        first = next(responses)
+
+        # The first question is complete once the second question's row is seen
+        assert first[1] == "User Question 1"
+        assert mock_cursor.fetchmany.call_count == 3
+        mock_conn.close.assert_not_called()
+
+    def test_closing_early_drains_and_releases(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+        mocker.patch(
+            "utils.database._get_connection", return_value=(mock_conn, mock_cursor)
+        )
+        mock_cursor.fetchmany.side_effect = [[row] for row in self.rows] + [[]]
+
+        responses = iter_responses(1, 1)
+        next(responses)
+        responses.close()
+
+        assert mock_cursor.fetchmany.call_count == len(self.rows) + 1
+        mock_cursor.close.assert_called_once()
+        mock_conn.close.assert_called_once()
 
 
 class TestInsertAnswer:
@@ -94,11 +192,14 @@ class TestInsertAnswer:
 
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
+        mock_cursor.rowcount = 1
 
         responses = {1: {"img": "img1.png", "text": "Answer 1"}}
         success, error_text = insert_answer("User", responses)
 
-        mock_cursor.execute.assert_called_with(ANY, (1, "User", "img1.png", "Answer 1"))
+        mock_cursor.executemany.assert_called_once_with(
+            ANY, [(1, "User", "img1.png", "Answer 1")]
+        )
         mock_conn.commit.assert_called_once()
 
         mock_cursor.close.assert_called_once()
@@ -107,6 +208,55 @@ class TestInsertAnswer:
         assert success
         assert error_text == ""
 
+    def test_insert_answers_batched(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+
+        mock_get_connection = mocker.patch("utils.database._get_connection")
+        mock_get_connection.return_value = (mock_conn, mock_cursor)
+
+        mock_cursor.rowcount = 20
+
+        responses = {
+            q_id: {"img": None, "text": f"Answer {q_id}"} for q_id in range(20)
+        }
+        success, _ = insert_answer("User", responses)
+
+        mock_cursor.executemany.assert_called_once()
+        assert len(mock_cursor.executemany.call_args[0][1]) == 20
+        # The respondent and the issue summary, not one statement per answer
+        assert mock_cursor.execute.call_count == 2
+        assert mock_cursor.execute.call_args[0][1][0] == 20
+        assert success
+
+    def test_insert_duplicate_answers_not_counted(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+
+        mock_get_connection = mocker.patch("utils.database._get_connection")
+        mock_get_connection.return_value = (mock_conn, mock_cursor)
+        mock_cursor.rowcount = 0
+
+        responses = {1: {"img": None, "text": "Answer"}}
+        success, _ = insert_answer("User", responses)
+
+        mock_cursor.execute.assert_not_called()
+        mock_conn.commit.assert_called_once()
+        assert success
+
+    def test_insert_no_answers(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+
+        mock_get_connection = mocker.patch("utils.database._get_connection")
+        mock_get_connection.return_value = (mock_conn, mock_cursor)
+
+        success, _ = insert_answer("User", {})
+
+        mock_cursor.executemany.assert_not_called()
+        mock_conn.close.assert_called_once()
+        assert success
+
     def test_insert_duplicate_answer(self, mocker):
         mock_conn = mocker.Mock()
         mock_cursor = mocker.Mock()
@@ -114,7 +264,7 @@ class TestInsertAnswer:
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
 
-        mock_cursor.execute.side_effect = mysql.connector.IntegrityError(
+        mock_cursor.executemany.side_effect = mysql.connector.IntegrityError(
             errno=errorcode.ER_DUP_ENTRY
         )
 
@@ -136,7 +286,7 @@ class TestInsertAnswer:
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
 
-        mock_cursor.execute.side_effect = mysql.connector.IntegrityError(
+        mock_cursor.executemany.side_effect = mysql.connector.IntegrityError(
             errno=errorcode.ER_BAD_NULL_ERROR
         )
 
@@ -158,7 +308,7 @@ class TestInsertAnswer:
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
 
-        mock_cursor.execute.side_effect = mysql.connector.IntegrityError(
+        mock_cursor.executemany.side_effect = mysql.connector.IntegrityError(
             errno=errorcode.ER_DUP_FIELDNAME
         )
 
@@ -184,9 +334,8 @@ class TestInsertQuestion:
 
         success, error_text = insert_question(1, 1, "User", "What is the purpose?")
 
-        mock_cursor.execute.assert_called_with(
-            ANY, (1, "User", "What is the purpose?", 1)
-        )
+        mock_cursor.execute.assert_any_call(ANY, (1, "User", "What is the purpose?", 1))
+        mock_cursor.execute.assert_called_with(ANY, (1, 1, 1))
         mock_conn.commit.assert_called_once()
 
         mock_cursor.close.assert_called_once()
@@ -268,8 +417,8 @@ class TestInsertDefaults:
             1, 1, [("What is the purpose?", "text")]
         )
 
-        mock_cursor.execute.assert_called_with(
-            ANY, (1, "SYS", "What is the purpose?", 1, True, "text")
+        mock_cursor.executemany.assert_called_once_with(
+            ANY, [(1, "SYS", "What is the purpose?", 1, True, "text")]
         )
         mock_conn.commit.assert_called_once()
 
@@ -286,7 +435,7 @@ class TestInsertDefaults:
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
 
-        mock_cursor.execute.side_effect = mysql.connector.IntegrityError(
+        mock_cursor.executemany.side_effect = mysql.connector.IntegrityError(
             errno=errorcode.ER_DUP_ENTRY
         )
 
@@ -308,7 +457,7 @@ class TestInsertDefaults:
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
 
-        mock_cursor.execute.side_effect = mysql.connector.IntegrityError(
+        mock_cursor.executemany.side_effect = mysql.connector.IntegrityError(
             errno=errorcode.ER_BAD_NULL_ERROR
         )
 
@@ -330,7 +479,7 @@ class TestInsertDefaults:
         mock_get_connection = mocker.patch("utils.database._get_connection")
         mock_get_connection.return_value = (mock_conn, mock_cursor)
 
-        mock_cursor.execute.side_effect = mysql.connector.IntegrityError(
+        mock_cursor.executemany.side_effect = mysql.connector.IntegrityError(
             errno=errorcode.ER_DUP_FIELDNAME
         )
 
@@ -356,9 +505,11 @@ class TestCreateNewsletter:
 
         success, error_text = create_newsletter("Title", b"hash", "config_folder")
 
-        mock_cursor.execute.assert_called_once_with(
-            ANY, ("Title", b"hash", "config_folder")
+        insert, bump = mock_cursor.execute.call_args_list
+        assert insert == call(
+            ANY, ("Title", b"hash", "config_folder", "Title", "", "", "[]", None)
         )
+        assert "newsletters_version" in bump.args[0]
         mock_conn.commit.assert_called_once()
 
         mock_cursor.close.assert_called_once()
@@ -385,3 +536,91 @@ class TestCreateNewsletter:
         assert success is not None
         assert not success
         assert error_text == "Failed to create newsletter due to integrity error."
+
+
+class TestConnection:
+    def test_connections_reused_from_pool(self, mocker):
+        mock_conn = mocker.Mock()
+        mock_conn.in_transaction = True
+
+        mock_connect = mocker.patch("utils.database._connect")
+        mock_connect.return_value = mock_conn
+        mocker.patch("utils.database._POOL", None)
+
+        conn, cursor = _get_connection()
+        cursor.close()
+        conn.close()
+
+        conn, _ = _get_connection()
+
+        mock_connect.assert_called_once()
+        mock_conn.rollback.assert_called_once()
+        mock_conn.close.assert_not_called()
+        assert conn.raw is mock_conn
+        assert pool_stats()["hits"] == 1
+
+
+class TestPreparedStatements:
+    def setup_pool(self, mocker, prepared):
+        mock_conn = mocker.Mock()
+        mock_conn.in_transaction = False
+
+        mocker.patch("utils.database._connect", return_value=mock_conn)
+        mocker.patch("utils.database._POOL", None)
+        mock_prepare = mocker.patch(
+            "utils.database.BACKEND.prepare", return_value=prepared
+        )
+
+        return mock_conn, mock_prepare
+
+    def test_statement_prepared_once_per_connection(self, mocker):
+        mock_prepared = mocker.Mock()
+        mock_prepared.fetchall.return_value = [(2, 1, "SYS", "Default", "text")]
+        mock_conn, mock_prepare = self.setup_pool(mocker, mock_prepared)
+
+        for _ in range(3):
+            default, _ = get_questions(1, 1)
+
+        mock_prepare.assert_called_once_with(mock_conn)
+        assert mock_prepared.execute.call_count == 3
+        mock_prepared.close.assert_not_called()
+        mock_conn.cursor.return_value.execute.assert_not_called()
+        assert default == [(2, "Default", "text")]
+
+    def test_falls_back_without_prepare(self, mocker):
+        mock_conn, mock_prepare = self.setup_pool(mocker, None)
+        mock_cursor = mock_conn.cursor.return_value
+        mock_cursor.fetchall.return_value = [
+            (1, 1, "SYS", "Question", None, None, None)
+        ]
+
+        for _ in range(2):
+            get_responses(1, 1)
+
+        mock_prepare.assert_called_once()
+        assert mock_cursor.execute.call_count == 2
+
+    def test_falls_back_when_server_cannot_prepare(self, mocker):
+        mock_prepared = mocker.Mock()
+        mock_prepared.execute.side_effect = mysql.connector.DatabaseError(
+            errno=errorcode.ER_UNSUPPORTED_PS
+        )
+        mock_conn, _ = self.setup_pool(mocker, mock_prepared)
+        mock_cursor = mock_conn.cursor.return_value
+        mock_cursor.fetchall.return_value = []
+
+        get_questions(1, 1)
+        get_questions(1, 1)
+
+        mock_prepared.execute.assert_called_once()
+        mock_prepared.close.assert_called_once()
+        assert mock_cursor.execute.call_count == 2
+
+    def test_disabled_by_setting(self, mocker):
+        mock_conn, mock_prepare = self.setup_pool(mocker, mocker.Mock())
+        mocker.patch("utils.database.PREPARE_STATEMENTS", False)
+        mock_conn.cursor.return_value.fetchall.return_value = []
+
+        get_questions(1, 1)
+
+        mock_prepare.assert_not_called()
@@ -1,6 +1,8 @@
+import asyncio
 from collections import defaultdict
 import logging
 import copy
+import threading
 from unittest.mock import ANY
 
 
@@ -42,8 +44,10 @@ class TestRender:
         endpoints.render(self.token, None)
 
         # ASSERT
-        mock_load.assert_called_once_with("exists", ANY)
-        mock_question_renderer.assert_called_once_with("Title", 1, 5)
+        mock_load.assert_called_once_with(1, ANY)
+        mock_question_renderer.assert_called_once_with(
+            "Title", 1, 5, questions=mock_questions.return_value
+        )
 
     def test_render_question_default_insert(self, mocker, caplog):
         # ARRANGE
@@ -67,7 +71,9 @@ class TestRender:
         endpoints.render(self.token, None)
 
         # ASSERT
-        mock_question_renderer.assert_called_once_with("Title", 1, 5)
+        mock_question_renderer.assert_called_once_with(
+            "Title", 1, 5, questions=mock_questions.return_value
+        )
 
         assert "Inserting default questions" in caplog.text
         assert "Failed to add default questions" not in caplog.text
@@ -94,7 +100,9 @@ class TestRender:
         endpoints.render(self.token, None)
 
         # ASSERT
-        mock_question_renderer.assert_called_once_with("Title", 1, 5)
+        mock_question_renderer.assert_called_once_with(
+            "Title", 1, 5, questions=mock_questions.return_value
+        )
 
         assert "Failed to add default questions\nerror message" not in caplog.text
 
@@ -339,7 +347,7 @@ class TestQuestion:
         assert response.content == "Thank you for submitting your question :)."
         assert response.content_type == "text/plain"
 
-        mock_load.assert_called_once_with("exists", ANY)
+        mock_load.assert_called_once_with(1, ANY)
         mock_insert.assert_called_once_with(1, 5, "Jo Blogs", "Question 1")
 
     def test_question_submission_database_error(self, mocker):
@@ -357,3 +365,141 @@ class TestQuestion:
         assert response.status == 500
         assert response.content == "database error."
         assert response.content_type == "text/plain"
+
+
+class TestAsyncEndpoints:
+    config = NewsletterConfig(
+        name="Title",
+        email="mail@mail.com",
+        folder="exists",
+        link="https://www.site.net",
+        issue=5,
+        defaults=[("Default", "text")],
+    )
+
+    token = NewsletterToken(title="Title", folder="exists", id=1)
+
+    def test_render_question_form(self, mocker):
+        # ARRANGE
+        mocker.patch("endpoints.get_state", return_value=State.Question)
+        mocker.patch("endpoints.load_config", return_value=(True, self.config))
+
+        questions = ([(1, "Default", "text")], [])
+        mock_questions = mocker.patch("endpoints.get_questions", return_value=questions)
+        mock_question_renderer = mocker.patch("endpoints.render_question_form")
+
+        # ACT
+        asyncio.run(endpoints.render_async(self.token, None))
+
+        # ASSERT
+        mock_questions.assert_called_once_with(1, 5)
+        mock_question_renderer.assert_called_once_with(
+            "Title", 1, 5, questions=questions
+        )
+
+    def test_render_historic_issue(self, mocker):
+        # ARRANGE
+        mocker.patch("endpoints.load_config", return_value=(True, self.config))
+        mock_responses = mocker.patch("utils.database.get_responses")
+        mock_newsletter = mocker.patch("endpoints.render_newsletter")
+
+        # ACT
+        asyncio.run(endpoints.render_async(self.token, 4))
+
+        # ASSERT
+        # Left to the renderer, which checks the cache first
+        mock_newsletter.assert_called_once_with("Title", 1, 4, 5)
+        mock_responses.assert_not_called()
+
+    def test_render_off_the_event_loop(self, mocker):
+        # ARRANGE
+        mocker.patch("endpoints.get_state", return_value=State.Publish)
+        mocker.patch("endpoints.load_config", return_value=(True, self.config))
+        threads = []
+        mocker.patch(
+            "endpoints.render_newsletter",
+            side_effect=lambda *args: threads.append(threading.current_thread()),
+        )
+
+        # ACT
+        asyncio.run(endpoints.render_async(self.token, None))
+
+        # ASSERT
+        (thread,) = threads
+        assert thread.name.startswith("database")
+
+    def test_answer_submission(self, mocker):
+        # ARRANGE
+        mock_insert = mocker.patch(
+            "utils.async_database.database.insert_answer", return_value=(True, "")
+        )
+
+        # ACT
+        response = asyncio.run(
+            endpoints.answer_async({"name": "Jo Blogs", "question_2": "Answer 2"})
+        )
+
+        # ASSERT
+        assert response.status == 201
+        mock_insert.assert_called_once_with("Jo Blogs", ANY)
+
+    def test_answer_submission_no_name(self):
+        # ACT
+        response = asyncio.run(endpoints.answer_async({"name": ""}))
+
+        # ASSERT
+        assert response.status == 422
+
+    def test_question_submission(self, mocker):
+        # ARRANGE
+        mocker.patch("endpoints.load_config", return_value=(True, self.config))
+        mock_insert = mocker.patch(
+            "utils.async_database.database.insert_question", return_value=(True, "")
+        )
+
+        # ACT
+        response = asyncio.run(
+            endpoints.question_submit_async(
+                self.token, {"name": "Jo Blogs", "question": "Question 1"}
+            )
+        )
+
+        # ASSERT
+        assert response.status == 201
+        mock_insert.assert_called_once_with(1, 5, "Jo Blogs", "Question 1")
+
+
+class TestLogin:
+    def test_issues_token(self, mocker):
+        # ARRANGE
+        mock_login = mocker.patch("endpoints.tokens.login", return_value="token")
+
+        # ACT
+        response = endpoints.login({"unlock": "password"})
+
+        # ASSERT
+        mock_login.assert_called_once_with("password")
+        assert response.status == 200
+        assert response.content == "token"
+
+    def test_wrong_passcode(self, mocker):
+        # ARRANGE
+        mocker.patch("endpoints.tokens.login", return_value=None)
+
+        # ACT
+        response = endpoints.login({"unlock": "wrong"})
+
+        # ASSERT
+        assert response.status == 401
+        assert response.content == "Incorrect passcode"
+
+    def test_no_passcode(self, mocker):
+        # ARRANGE
+        mock_login = mocker.patch("endpoints.tokens.login")
+
+        # ACT
+        response = endpoints.login({})
+
+        # ASSERT
+        mock_login.assert_not_called()
+        assert response.status == 422
@@ -1,166 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import tempfile
 import logging
 import pytest
-import os
-from dotenv import load_dotenv
 from utils.constants import State
+from utils.database import create_newsletter, increment_issue, track_queries
 from utils.helpers import check_and_increment_issue, load_config, get_state
 from utils.type_hints import EmptyConfig, NewsletterConfig
 
 
-load_dotenv()
-
-
-HOME = os.getenv("HOME", "")
-
-
 class TestLoadConfig:
-    valid_data = "name: jo\nemail: jo@blogs.com\nfolder: jos\nlink: https://jo.blogs.com\ndefaults:\n- [text,text]"
-
-    def test_missing_config_file_fails(self, mocker, caplog):
+    def test_correct_config_returned(self, sqlite_database):
         # ARRANGE
-        folder = "missing"
-
-        mock_file = mocker.mock_open()
-
-        def conditional_open(path, mode="r", *args, **kwargs):
-            if path == os.path.join(HOME, "missing/config.yaml"):
-                raise FileNotFoundError
-            else:
-                return mock_file(path, mode, *args, **kwargs)
-
-        mocker.patch("builtins.open", conditional_open)
-
-        caplog.set_level(logging.WARNING)
+        create_newsletter(
+            "jo",
+            b"hash",
+            "jos",
+            "jo@blogs.com",
+            "https://jo.blogs.com",
+            [("text", "text")],
+        )
 
         # ACT
-        success, config = load_config(folder, logging.getLogger())
+        success, config = load_config(1, logging.getLogger())
 
         # ASSERT
-        assert not success
-        assert config == EmptyConfig
-        assert f"Failed to load {folder}" in caplog.text
+        assert success
+        assert config == NewsletterConfig(
+            name="jo",
+            email="jo@blogs.com",
+            folder="jos",
+            link="https://jo.blogs.com",
+            defaults=[("text", "text")],
+            issue=1,
+        )
 
-    def test_invalid_config_file_fails(self, mocker, caplog):
+    def test_missing_newsletter_fails(self, sqlite_database, caplog):
         # ARRANGE
-        folder = "exists"
-
-        mock_file = mocker.mock_open(read_data="name: jo\nbut=invalid")
-        mocker.patch("builtins.open", mock_file)
-
         caplog.set_level(logging.WARNING)
 
         # ACT
-        success, config = load_config(folder, logging.getLogger())
+        success, config = load_config(1, logging.getLogger())
 
         # ASSERT
         assert not success
         assert config == EmptyConfig
-        assert f"Failed to parse {folder}" in caplog.text
+        assert "Failed to load the config of newsletter 1" in caplog.text
 
-    def test_missing_issue_file_fails(self, mocker, caplog):
+    def test_unmigrated_newsletter_fails(self, sqlite_database, caplog):
         # ARRANGE
-        folder = "exists"
-
-        mock_file = mocker.mock_open(read_data=self.valid_data)
-
-        def conditional_open(path, mode="r", *args, **kwargs):
-            if path == os.path.join(HOME, "exists/issue"):
-                raise FileNotFoundError
-            else:
-                return mock_file(path, mode, *args, **kwargs)
-
-        mocker.patch("builtins.open", conditional_open)
+        conn = sqlite_database.connect()
+        conn.execute(
+            "INSERT INTO newsletters (title, passcode, folder) VALUES (?, ?, ?);",
+            ("jo", b"hash", "jos"),
+        )
+        conn.commit()
 
         caplog.set_level(logging.WARNING)
 
         # ACT
-        success, config = load_config(folder, logging.getLogger())
+        success, config = load_config(1, logging.getLogger())
 
         # ASSERT
         assert not success
         assert config == EmptyConfig
-        assert f"Failed to load {folder} issue file" in caplog.text
 
-    def test_invalid_issue_file_fails(self, mocker, caplog):
+    def test_incorrect_config_fails(self, sqlite_database, caplog):
         # ARRANGE
-        folder = "exists"
-
-        mock_issue = mocker.mock_open(read_data="one")
-        mock_config = mocker.mock_open(read_data=self.valid_data)
+        create_newsletter("jo", b"hash", "jos", "jo@blogs.com", "https://jo.blogs.com")
 
-        def conditional_open(path, mode="r", *args, **kwargs):
-            if path == os.path.join(HOME, "exists/issue"):
-                return mock_issue(path, mode, *args, **kwargs)
-            else:
-                return mock_config(path, mode, *args, **kwargs)
-
-        mocker.patch("builtins.open", conditional_open)
+        conn = sqlite_database.connect()
+        conn.execute("UPDATE newsletters SET default_questions='[\"text\"]';")
+        conn.commit()
 
         caplog.set_level(logging.WARNING)
 
         # ACT
-        success, config = load_config(folder, logging.getLogger())
+        success, config = load_config(1, logging.getLogger())
 
         # ASSERT
         assert not success
         assert config == EmptyConfig
-        assert f"Failed to parse {folder} issue file" in caplog.text
+        assert "Failed to validate the config of newsletter 1" in caplog.text
 
-    def test_correct_config_returned(self, mocker):
+    def test_single_query(self, sqlite_database):
         # ARRANGE
-        folder = "exists"
-
-        mock_issue = mocker.mock_open(read_data="1")
-        mock_config = mocker.mock_open(read_data=self.valid_data)
-
-        def conditional_open(path, mode="r", *args, **kwargs):
-            if path == os.path.join(HOME, "exists/issue"):
-                return mock_issue(path, mode, *args, **kwargs)
-            else:
-                return mock_config(path, mode, *args, **kwargs)
-
-        mocker.patch("builtins.open", conditional_open)
+        create_newsletter("jo", b"hash", "jos", "jo@blogs.com", "https://jo.blogs.com")
 
         # ACT
-        success, config = load_config(folder, logging.getLogger())
+        with track_queries("config") as stats:
+            load_config(1, logging.getLogger())
 
         # ASSERT
-        assert success
-        assert config == NewsletterConfig(
-            name="jo",
-            email="jo@blogs.com",
-            folder="jos",
-            link="https://jo.blogs.com",
-            defaults=[("text", "text")],
-            issue=1,
-        )
-
-    def test_incorrect_config_fails(self, mocker, caplog):
-        # ARRANGE
-        folder = "exists"
-
-        mock_issue = mocker.mock_open(read_data="1")
-        mock_config = mocker.mock_open(read_data=self.valid_data[:-11] + "text")
-
-        def conditional_open(path, mode="r", *args, **kwargs):
-            if path == os.path.join(HOME, "exists/issue"):
-                return mock_issue(path, mode, *args, **kwargs)
-            else:
-                return mock_config(path, mode, *args, **kwargs)
-
-        mocker.patch("builtins.open", conditional_open)
-
-        caplog.set_level(logging.WARNING)
-
-        # ACT
-        success, config = load_config(folder, logging.getLogger())
-
-        # ASSERT
-        assert not success
-        assert config == EmptyConfig
-        assert f"Failed to validate {folder}" in caplog.text
+        assert stats.callers == {"get_config": 1}
 
 
 class TestGetState:
@@ -210,78 +141,60 @@ class TestGetState:
 
 
 class TestIssueIncrement:
-    directory = "folder"
-    issue = 5
+    @pytest.fixture
+    def newsletter(self, sqlite_database):
+        create_newsletter("jo", b"hash", "jos", "jo@blogs.com", "https://jo.blogs.com")
 
-    @pytest.mark.parametrize("issue", [5, 42, 9001])
-    def test_first_week_increments(self, mocker, issue):
+    def issue(self):
+        _, config = load_config(1, logging.getLogger())
+        return config.issue
+
+    def test_first_week_increments(self, newsletter, mocker):
         # ARRANGE
         mock_datetime = mocker.patch("utils.helpers.datetime")
         mock_datetime.now.return_value = datetime(2025, 2, 5)
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with open(os.path.join(temp_dir, "issue"), "w") as f:
-                f.write(str(issue))
-
-            # ACT
-            success, err_msg = check_and_increment_issue(temp_dir)
-
-            # ASSERT
-            with open(os.path.join(temp_dir, "issue"), "r") as f:
-                assert issue + 1 == int(f.read())
+        # ACT
+        success, err_msg = check_and_increment_issue(1)
 
+        # ASSERT
         assert success
         assert "" == err_msg
+        assert self.issue() == 2
 
     @pytest.mark.parametrize(
-        "date, issue",
-        [
-            (datetime(2025, 2, 10), 5),
-            (datetime(2025, 2, 20), 42),
-            (datetime(2025, 2, 28), 9001),
-        ],
+        "date", [datetime(2025, 2, 10), datetime(2025, 2, 20), datetime(2025, 2, 28)]
     )
-    def test_other_weeks_remain(self, mocker, date, issue):
+    def test_other_weeks_remain(self, newsletter, mocker, date):
         # ARRANGE
         mock_datetime = mocker.patch("utils.helpers.datetime")
         mock_datetime.now.return_value = date
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with open(os.path.join(temp_dir, "issue"), "w") as f:
-                f.write(str(issue))
-
-            # ACT
-            success, err_msg = check_and_increment_issue(temp_dir)
-
-            # ASSERT
-            with open(os.path.join(temp_dir, "issue"), "r") as f:
-                assert issue == int(f.read())
+        # ACT
+        success, err_msg = check_and_increment_issue(1)
 
+        # ASSERT
         assert success
         assert "" == err_msg
+        assert self.issue() == 1
 
-    def test_missing_issue_file_fails(self, mocker):
+    def test_missing_newsletter_fails(self, sqlite_database, mocker):
         # ARRANGE
         mock_datetime = mocker.patch("utils.helpers.datetime")
         mock_datetime.now.return_value = datetime(2025, 2, 5)
 
-        mock_open = mocker.patch("builtins.open")
-        mock_open.side_effect = OSError
-
-        success, err_msg = check_and_increment_issue("missing")
+        # ACT
+        success, err_msg = check_and_increment_issue(1)
 
+        # ASSERT
         assert not success
-        assert "Failed to open issue file" == err_msg
-
-    def test_invalid_issue_file_fails(self, mocker):
-        # ARRANGE
-        mock_datetime = mocker.patch("utils.helpers.datetime")
-        mock_datetime.now.return_value = datetime(2025, 2, 5)
+        assert "Newsletter 1 does not exist" == err_msg
 
-        mock_file = mocker.mock_open(read_data="one")
-        mocker.patch("builtins.open", mock_file)
-
-        success, err_msg = check_and_increment_issue("missing")
+    def test_concurrent_increments_not_lost(self, newsletter):
+        # ACT
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(increment_issue, [1] * 20))
 
-        assert not success
-        assert "Failed to parse issue file" == err_msg
+        # ASSERT
+        assert all(success for success, _ in results)
+        assert self.issue() == 21
@@ -1,8 +1,33 @@
+import base64
+import hashlib
+import json
+import os
 import pytest
 import random
+import sqlite3
 import string
-
-from utils.html import authenticate, format_html, hash_passcode, verify, make_navbar
+import time
+from unittest.mock import patch
+
+from utils import html
+from utils.database import (
+    create_newsletter,
+    get_newsletter_candidates,
+    get_newsletters,
+    set_passcode,
+)
+from utils.html import (
+    authenticate,
+    calibrate,
+    fingerprint,
+    format_html,
+    hash_parameters,
+    hash_passcode,
+    needs_rehash,
+    verify,
+    make_navbar,
+)
+from utils.transfer import import_newsletter
 
 
 class TestMakeNavbar:
@@ -54,8 +79,10 @@ class TestFormatHTML:
             format_html(self.html, values)
 
     def test_int_value_fails(self):
-        # TODO: add test
-        pass
+        values = {"REPLACE": 1}
+
+        with pytest.raises(TypeError):
+            format_html(self.html, values)
 
     def test_text_replaced(self):
         values = {"REPLACE": "Replaced text"}
@@ -171,3 +198,391 @@ class TestAuthenticate:
 
         # ASSERT
         assert e_info.value.args[0] == "SQL returned a hash that was not in bytes."
+
+
+class TestFingerprint:
+    passcodes = ["first", "second", "third"]
+
+    @pytest.fixture
+    def newsletters(self, sqlite_database, mocker):
+        mocker.patch("utils.html.PASSCODE_PEPPER", "pepper")
+
+        for passcode in self.passcodes:
+            create_newsletter(
+                passcode,
+                hash_passcode(passcode),
+                f"newsletters/{passcode}",
+                fingerprint=fingerprint(passcode),
+            )
+
+    def test_unset_pepper(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.html.PASSCODE_PEPPER", None)
+
+        # ACT / ASSERT
+        assert fingerprint("secret") is None
+
+    def test_keyed_by_pepper(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.html.PASSCODE_PEPPER", "pepper")
+        peppered = fingerprint("secret")
+
+        mocker.patch("utils.html.PASSCODE_PEPPER", "other")
+
+        # ACT / ASSERT
+        assert peppered is not None and len(peppered) == 32
+        assert fingerprint("secret") != peppered
+
+    def test_single_verification(self, newsletters, mocker):
+        # ARRANGE
+        spy = mocker.spy(html, "verify")
+
+        # ACT
+        success, id, title, _ = authenticate("third")
+
+        # ASSERT
+        assert success
+        assert (id, title) == (3, "third")
+        assert spy.call_count == 1
+
+    def test_wrong_passcode_not_verified(self, newsletters, mocker):
+        # ARRANGE
+        spy = mocker.spy(html, "verify")
+
+        # ACT
+        success, id, _, _ = authenticate("wrong")
+
+        # ASSERT
+        assert not success
+        assert id == -1
+        spy.assert_not_called()
+
+    def test_backfilled_on_login(self, newsletters, mocker):
+        # ARRANGE
+        create_newsletter("legacy", hash_passcode("legacy"), "newsletters/legacy")
+        spy = mocker.spy(html, "verify")
+
+        # ACT
+        first = authenticate("legacy")
+        verified = spy.call_count
+        second = authenticate("legacy")
+
+        # ASSERT
+        assert first == second == (True, 4, "legacy", "newsletters/legacy")
+        assert verified == 1
+        assert spy.call_count == 2
+        assert [row[0] for row in get_newsletter_candidates(fingerprint("legacy"))] == [
+            4
+        ]
+
+    def test_indexed_lookup_without_registry(self, newsletters, mocker):
+        # ARRANGE
+        spy = mocker.spy(html, "get_newsletter_candidates")
+        mock_registry = mocker.patch.object(html.REGISTRY, "candidates")
+
+        # ACT
+        success, id, _, _ = authenticate("second")
+
+        # ASSERT
+        assert (success, id) == (True, 2)
+        spy.assert_called_once_with(fingerprint("second"))
+        mock_registry.assert_not_called()
+
+    def test_loaded_registry_used(self, newsletters, mocker):
+        # ARRANGE
+        html.REGISTRY.refresh()
+        mock_candidates = mocker.patch("utils.html.get_newsletter_candidates")
+
+        # ACT
+        success, id, _, _ = authenticate("second")
+
+        # ASSERT
+        assert (success, id) == (True, 2)
+        mock_candidates.assert_not_called()
+
+
+class TestParallelVerification:
+    passcode = "secret"
+
+    @pytest.fixture(autouse=True)
+    def workers(self, mocker):
+        mocker.patch("utils.html.AUTH_WORKERS", 2)
+        mocker.patch("utils.html._VERIFIER", None)
+
+        yield
+
+        if html._VERIFIER is not None:
+            html._VERIFIER.shutdown()
+
+    def newsletters(self, passcodes):
+        return [
+            (n_id, f"Title {n_id}", hash_passcode(passcode), f"path {n_id}")
+            for n_id, passcode in enumerate(passcodes, 1)
+        ]
+
+    def test_first_match_wins(self, mocker):
+        # ARRANGE
+        mock_newsletters = mocker.patch("utils.html.get_newsletters")
+        mock_newsletters.return_value = self.newsletters(
+            ["other", "wrong", self.passcode, "else", self.passcode]
+        )
+
+        # ACT
+        result = authenticate(self.passcode)
+
+        # ASSERT
+        assert result == (True, 3, "Title 3", "path 3")
+        assert html._VERIFIER is not None
+
+    def test_no_match(self, mocker):
+        # ARRANGE
+        mock_newsletters = mocker.patch("utils.html.get_newsletters")
+        mock_newsletters.return_value = self.newsletters(["other", "wrong", "else"])
+
+        # ACT
+        result = authenticate(self.passcode)
+
+        # ASSERT
+        assert result == (False, -1, "", "")
+
+    def test_stops_at_match(self, mocker):
+        # ARRANGE
+        def slow_verify(passcode, hash):
+            if hash == b"match":
+                return True
+            time.sleep(0.05)
+            return False
+
+        mock_verify = mocker.patch("utils.html.verify", side_effect=slow_verify)
+
+        # ACT
+        index = html._first_match(self.passcode, [b"match"] + [b"wrong"] * 7)
+
+        # ASSERT
+        assert index == 0
+        assert mock_verify.call_count < 8
+
+    def test_serial_by_default(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.html.AUTH_WORKERS", 1)
+        mock_newsletters = mocker.patch("utils.html.get_newsletters")
+        mock_newsletters.return_value = self.newsletters(["other", self.passcode])
+
+        # ACT
+        result = authenticate(self.passcode)
+
+        # ASSERT
+        assert result == (True, 2, "Title 2", "path 2")
+        assert html._VERIFIER is None
+
+
+class TestHashParameters:
+    passcode = "secret"
+
+    def legacy_hash(self, passcode):
+        salt = os.urandom(16)
+        return salt + hashlib.pbkdf2_hmac("sha256", passcode.encode(), salt, 100000)
+
+    def test_records_parameters(self):
+        # ACT
+        hash = hash_passcode(self.passcode, "sha512", 2000)
+
+        # ASSERT
+        assert hash.startswith(b"pbkdf2_sha512$2000$")
+        algorithm, iterations, salt, key = hash_parameters(hash)
+        assert (algorithm, iterations, len(salt), len(key)) == ("sha512", 2000, 16, 32)
+        assert len(hash) <= 100
+        assert verify(self.passcode, hash)
+        assert not verify("wrong", hash)
+
+    def test_legacy_hash(self):
+        # ARRANGE
+        hash = self.legacy_hash(self.passcode)
+
+        # ACT / ASSERT
+        assert hash_parameters(hash)[:2] == ("sha256", 100000)
+        assert needs_rehash(hash)
+        assert verify(self.passcode, hash)
+        assert not verify("wrong", hash)
+
+    @pytest.mark.parametrize(
+        "hash",
+        [b"pbkdf2_", b"pbkdf2_sha256$many$salt", b"pbkdf2_nope$1000$" + b"s" * 48],
+    )
+    def test_malformed_never_matches(self, hash):
+        assert not verify(self.passcode, hash)
+
+    def test_needs_rehash(self, mocker):
+        # ARRANGE
+        current = hash_passcode(self.passcode)
+        mocker.patch("utils.html.ITERATIONS", 1000)
+
+        # ACT / ASSERT
+        assert needs_rehash(current)
+        assert not needs_rehash(hash_passcode(self.passcode))
+
+    def test_calibrate(self, mocker):
+        # ARRANGE
+        # 20000 iterations in 10ms
+        mocker.patch("utils.html._time_hash", side_effect=[0.012, 0.01, 0.011])
+
+        # ACT
+        iterations = calibrate(100, samples=3)
+
+        # ASSERT
+        assert iterations == 200000
+
+    def test_rehashed_on_login(self, sqlite_database, mocker):
+        # ARRANGE
+        create_newsletter("Title", self.legacy_hash(self.passcode), "path")
+        spy = mocker.spy(html, "set_passcode")
+
+        # ACT
+        first = authenticate(self.passcode)
+        second = authenticate(self.passcode)
+
+        # ASSERT
+        assert first == second == (True, 1, "Title", "path")
+        spy.assert_called_once()
+
+        (stored,) = [row[2] for row in get_newsletters()]
+        assert hash_parameters(stored)[:2] == (html.HASH_ALGO, html.ITERATIONS)
+
+    def test_rehashed_on_new_cost(self, sqlite_database, mocker):
+        # ARRANGE
+        create_newsletter("Title", hash_passcode(self.passcode), "path")
+        mocker.patch("utils.html.ITERATIONS", 2000)
+
+        # ACT
+        success, *_ = authenticate(self.passcode)
+
+        # ASSERT
+        assert success
+        (stored,) = [row[2] for row in get_newsletters()]
+        assert hash_parameters(stored)[1] == 2000
+
+    def test_concurrent_change_kept(self, sqlite_database):
+        # ARRANGE
+        old = self.legacy_hash(self.passcode)
+        create_newsletter("Title", old, "path")
+        changed = hash_passcode("changed")
+        set_passcode(1, old, changed)
+
+        # ACT
+        success, _ = set_passcode(1, old, hash_passcode(self.passcode))
+
+        # ASSERT
+        assert not success
+        assert get_newsletters()[0][2] == changed
+
+
+class TestFailedPasscodes:
+    passcode = "secret"
+
+    @pytest.fixture
+    def newsletter(self, sqlite_database, disk_cache, mocker):
+        mocker.patch("utils.html.PASSCODE_PEPPER", "pepper")
+        create_newsletter("Title", hash_passcode(self.passcode), "path")
+
+        return disk_cache
+
+    def test_retry_not_verified(self, newsletter, mocker):
+        # ARRANGE
+        spy = mocker.spy(html, "verify")
+
+        # ACT
+        first = authenticate("wrong")
+        second = authenticate("wrong")
+
+        # ASSERT
+        assert first == second == (False, -1, "", "")
+        assert spy.call_count == 1
+
+    def test_right_passcode_unaffected(self, newsletter):
+        # ARRANGE
+        authenticate("wrong")
+
+        # ACT / ASSERT
+        assert authenticate(self.passcode)[0]
+
+    def test_plaintext_not_stored(self, newsletter):
+        # ARRANGE
+        authenticate("wrong")
+
+        # ACT
+        conn = sqlite3.connect(newsletter.path)
+        keys = [
+            key
+            for (key,) in conn.execute("SELECT key FROM cache;")
+            if key.startswith("failed:")
+        ]
+        conn.close()
+
+        # ASSERT
+        assert len(keys) == 1
+        assert "wrong" not in keys[0]
+
+    def test_forgotten_on_create(self, newsletter, mocker):
+        # ARRANGE
+        authenticate("other")
+
+        # ACT
+        create_newsletter("Other", hash_passcode("other"), "other")
+
+        # ASSERT
+        assert authenticate("other") == (True, 2, "Other", "other")
+
+    def test_forgotten_on_import(self, newsletter, tmp_path):
+        # ARRANGE
+        authenticate("other")
+        path = tmp_path / "other.jsonl"
+        record = {
+            "record": "newsletter",
+            "title": "Other",
+            "passcode": base64.b64encode(hash_passcode("other")).decode(),
+            "folder": "other",
+        }
+        path.write_text(json.dumps(record) + "\n")
+
+        # ACT
+        import_newsletter(str(path))
+
+        # ASSERT
+        assert authenticate("other") == (True, 2, "Other", "other")
+
+    def test_forgotten_on_passcode_change(self, newsletter):
+        # ARRANGE
+        authenticate("changed")
+        (old,) = [row[2] for row in get_newsletters()]
+
+        # ACT
+        set_passcode(1, old, hash_passcode("changed"))
+
+        # ASSERT
+        assert authenticate("changed") == (True, 1, "Title", "path")
+
+    def test_stale_failure_not_stored(self, newsletter):
+        # ARRANGE
+        # The newsletter is created while the passcode is being checked
+        def create_during_check(passcode, hashes):
+            create_newsletter("Other", hash_passcode("other"), "other")
+            return None
+
+        # ACT
+        with patch("utils.html._first_match", side_effect=create_during_check):
+            authenticate("other")
+
+        # ASSERT
+        assert authenticate("other")[0]
+
+    def test_disabled_without_pepper(self, newsletter, mocker):
+        # ARRANGE
+        mocker.patch("utils.html.PASSCODE_PEPPER", None)
+        spy = mocker.spy(html, "verify")
+
+        # ACT
+        authenticate("wrong")
+        authenticate("wrong")
+
+        # ASSERT
+        assert spy.call_count == 2
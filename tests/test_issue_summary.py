@@ -0,0 +1,117 @@
+from utils import database
+from utils.database import (
+    create_newsletter,
+    get_issue_summary,
+    get_questions,
+    insert_answer,
+    insert_default_questions,
+    insert_question,
+    rebuild_issue_summaries,
+)
+
+
+def answer_all(name, newsletter_id, issue):
+    default, submitted = get_questions(newsletter_id, issue)
+    q_ids = [q_id for q_id, *_ in default + submitted]
+    return insert_answer(name, {q_id: {"img": None, "text": "A"} for q_id in q_ids})
+
+
+def counts(summary):
+    return (summary.question_count, summary.answer_count, summary.respondent_count)
+
+
+class TestIssueSummary:
+    def test_maintained_by_inserts(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+
+        # ACT
+        insert_default_questions(1, 1, [("Default", "text"), ("Photo", "image")])
+        insert_question(1, 1, "User", "Question?")
+        before = get_issue_summary(1, 1)
+
+        answer_all("Name", 1, 1)
+        answer_all("Name", 1, 1)
+        answer_all("Other", 1, 1)
+        insert_question(1, 2, "User", "Next issue?")
+
+        # ASSERT
+        assert counts(before) == (3, 0, 0)
+        assert before.last_answer_at is None
+
+        summary = get_issue_summary(1, 1)
+        assert counts(summary) == (3, 6, 2)
+        assert summary.last_answer_at is not None
+
+        assert counts(get_issue_summary(1, 2)) == (1, 0, 0)
+        assert get_issue_summary(1, 3) is None
+
+    def test_failed_insert_not_counted(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+
+        # ACT
+        success, _ = insert_question(1, 1, "User", None)
+
+        # ASSERT
+        assert not success
+        assert get_issue_summary(1, 1) is None
+
+    def test_rebuild_matches_incremental(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        for issue in [1, 2]:
+            insert_default_questions(1, issue, [("Default", "text")])
+            insert_question(1, issue, "User", "Question?")
+            answer_all("Name", 1, issue)
+        answer_all("Other", 1, 2)
+
+        expected = [get_issue_summary(1, issue) for issue in [1, 2]]
+
+        conn = sqlite_database.connect()
+        conn.execute("DELETE FROM issues WHERE issue=1;")
+        conn.execute("UPDATE issues SET answer_count=0, respondent_count=9;")
+        conn.commit()
+
+        # ACT
+        rebuilt = rebuild_issue_summaries()
+
+        # ASSERT
+        assert rebuilt == 2
+        assert counts(get_issue_summary(1, 1)) == counts(expected[0]) == (2, 2, 1)
+        assert get_issue_summary(1, 2) == expected[1]
+        assert counts(expected[1]) == (2, 4, 2)
+
+    def test_single_row_lookup(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        insert_question(1, 1, "User", "Question?")
+
+        # ACT
+        conn, cursor = database._get_connection()
+        keys = sqlite_database.explain(
+            cursor, database.ISSUE_QUERY.strip().rstrip(";"), (1, 1)
+        )
+        cursor.close()
+        conn.close()
+
+        # ASSERT
+        assert keys["issues"] is not None
+
+    def test_rebuild_keeps_archived(self, sqlite_database):
+        # ARRANGE
+        from utils.archive import archive_issue
+
+        create_newsletter("Title", b"hash", "newsletters/title")
+        for issue in [1, 2]:
+            insert_question(1, issue, "User", "Question?")
+            answer_all("Name", 1, issue)
+        archived = get_issue_summary(1, 1)
+        archive_issue(1, 1)
+
+        # ACT
+        rebuilt = rebuild_issue_summaries()
+
+        # ASSERT
+        assert rebuilt == 2
+        assert get_issue_summary(1, 1) == archived
@@ -0,0 +1,279 @@
+import os
+import sqlite3
+
+import pytest
+
+from utils import database, migrations
+from utils.migrations import check_indexes, migrate
+from utils.type_hints import NewsletterConfig
+
+
+def executed(mock_cursor):
+    return [" ".join(call[0][0].split()) for call in mock_cursor.execute.call_args_list]
+
+
+class TestMigrate:
+    def setup_connection(self, mocker, exists):
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+        mock_cursor.fetchone.return_value = (int(exists),)
+        mock_cursor.fetchall.return_value = []
+
+        mock_get_connection = mocker.patch("utils.migrations._get_connection")
+        mock_get_connection.return_value = (mock_conn, mock_cursor)
+
+        return mock_conn, mock_cursor
+
+    def test_applies_pending_in_order(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.migrations.get_schema_version", return_value=0)
+        mock_conn, mock_cursor = self.setup_connection(mocker, exists=False)
+
+        # ACT
+        applied = migrate()
+
+        # ASSERT
+        assert applied == [m.version for m in migrations.MIGRATIONS]
+        assert mock_conn.commit.call_count == len(migrations.MIGRATIONS)
+
+        statements = executed(mock_cursor)
+        alter = next(i for i, s in enumerate(statements) if s.startswith("ALTER"))
+        index = next(i for i, s in enumerate(statements) if s.startswith("CREATE"))
+        assert alter < index
+
+    def test_skips_applied_versions(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.migrations.get_schema_version", return_value=1)
+        _, mock_cursor = self.setup_connection(mocker, exists=False)
+
+        # ACT
+        applied = migrate()
+
+        # ASSERT
+        assert 1 not in applied
+        assert not any("ADD COLUMN folder" in s for s in executed(mock_cursor))
+
+    def test_stops_at_target(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.migrations.get_schema_version", return_value=0)
+        self.setup_connection(mocker, exists=False)
+
+        # ACT
+        applied = migrate(target=1)
+
+        # ASSERT
+        assert applied == [1]
+
+    def test_existing_schema_only_records_version(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.migrations.get_schema_version", return_value=0)
+        _, mock_cursor = self.setup_connection(mocker, exists=True)
+
+        # ACT
+        applied = migrate()
+
+        # ASSERT
+        assert applied == [m.version for m in migrations.MIGRATIONS]
+
+        statements = executed(mock_cursor)
+        assert not any(s.startswith(("ALTER", "CREATE")) for s in statements)
+        assert sum(s.startswith("INSERT INTO schema_version") for s in statements) == (
+            len(migrations.MIGRATIONS)
+        )
+
+    def test_failed_migration_rolls_back(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.migrations.get_schema_version", return_value=0)
+        mock_conn, mock_cursor = self.setup_connection(mocker, exists=False)
+        mock_cursor.execute.side_effect = RuntimeError("syntax error")
+
+        # ACT
+        with pytest.raises(RuntimeError):
+            migrate()
+
+        # ASSERT
+        mock_conn.rollback.assert_called_once()
+        mock_conn.commit.assert_not_called()
+        mock_conn.close.assert_called_once()
+
+
+class TestCheckIndexes:
+    columns = [("id",), ("select_type",), ("table",), ("type",), ("key",)]
+
+    def test_reports_nothing_when_indexes_used(self, mocker):
+        # ARRANGE
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+        mock_cursor.description = self.columns
+        mock_cursor.fetchall.side_effect = [
+            [(1, "SIMPLE", "questions", "ref", "questions_issue")],
+            [
+                (1, "SIMPLE", "questions", "ref", "questions_issue"),
+                (1, "SIMPLE", "answers", "ref", "question_id"),
+            ],
+            [(1, "SIMPLE", "newsletters", "ref_or_null", "newsletters_fingerprint")],
+            [(1, "SIMPLE", "newsletters", "ALL", None)],
+        ]
+        mocker.patch(
+            "utils.migrations._get_connection", return_value=(mock_conn, mock_cursor)
+        )
+
+        # ACT
+        problems = check_indexes()
+
+        # ASSERT
+        assert problems == {}
+        assert all(s.startswith("EXPLAIN") for s in executed(mock_cursor))
+        mock_conn.close.assert_called_once()
+
+    def test_reports_full_scans(self, mocker):
+        # ARRANGE
+        mock_conn = mocker.Mock()
+        mock_cursor = mocker.Mock()
+        mock_cursor.description = self.columns
+        mock_cursor.fetchall.side_effect = [
+            [(1, "SIMPLE", "questions", "ALL", None)],
+            [
+                (1, "SIMPLE", "questions", "ref", "questions_issue"),
+                (1, "SIMPLE", "answers", "ALL", None),
+            ],
+            [(1, "SIMPLE", "newsletters", "ref_or_null", "newsletters_fingerprint")],
+            [(1, "SIMPLE", "newsletters", "ALL", None)],
+        ]
+        mocker.patch(
+            "utils.migrations._get_connection", return_value=(mock_conn, mock_cursor)
+        )
+
+        # ACT
+        problems = check_indexes()
+
+        # ASSERT
+        assert problems == {
+            "get_questions": ["questions used None instead of questions_issue"],
+            "get_responses": ["answers used None instead of question_id"],
+        }
+
+    @pytest.mark.skipif(
+        os.getenv("NEWSLETTER_LIVE_DB") is None,
+        reason="Requires a migrated database configured through .env",
+    )
+    def test_live_database_uses_indexes(self):
+        migrate()
+
+        assert check_indexes() == {}
+
+
+class TestMoveConfig:
+    def test_config_files_moved(self, sqlite_database, tmp_path, mocker):
+        # ARRANGE
+        conn = sqlite3.connect(sqlite_database.path)
+        conn.execute(
+            """
+            CREATE TABLE newsletters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+                title VARCHAR(100) NOT NULL,
+                passcode BLOB NOT NULL,
+                folder VARCHAR(100) NOT NULL
+            );
+            """
+        )
+        conn.executemany(
+            "INSERT INTO newsletters (title, passcode, folder) VALUES (?, ?, ?);",
+            [("Jo", b"hash", "newsletters/jo"), ("Lost", b"hash", "newsletters/lost")],
+        )
+        conn.commit()
+        conn.close()
+
+        mocker.patch("utils.migrations.HOME", str(tmp_path))
+        folder = tmp_path / "newsletters" / "jo"
+        folder.mkdir(parents=True)
+        (folder / "config.yaml").write_text(
+            "name: jo\nemail: jo@blogs.com\nfolder: newsletters/jo\n"
+            "link: https://jo.blogs.com\ndefaults:\n- [text,text]"
+        )
+        (folder / "issue").write_text("7")
+
+        # ACT
+        migrate()
+
+        # ASSERT
+        assert database.get_config(1) == NewsletterConfig(
+            name="jo",
+            email="jo@blogs.com",
+            folder="newsletters/jo",
+            link="https://jo.blogs.com",
+            issue=7,
+            defaults=[("text", "text")],
+        )
+        assert database.get_config(2) is None
+
+    def test_invalid_config_files_skipped(self, sqlite_database, tmp_path, mocker):
+        # ARRANGE
+        conn = sqlite3.connect(sqlite_database.path)
+        conn.execute(
+            """
+            CREATE TABLE newsletters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+                title VARCHAR(100) NOT NULL,
+                passcode BLOB NOT NULL,
+                folder VARCHAR(100) NOT NULL
+            );
+            """
+        )
+        conn.executemany(
+            "INSERT INTO newsletters (title, passcode, folder) VALUES (?, ?, ?);",
+            [
+                ("Partial", b"hash", "newsletters/partial"),
+                ("Empty", b"hash", "newsletters/empty"),
+                ("Listed", b"hash", "newsletters/listed"),
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+        mocker.patch("utils.migrations.HOME", str(tmp_path))
+        configs = {
+            "partial": "name: partial\nemail: partial@blogs.com\n",
+            "empty": "",
+            "listed": "- name\n- email\n",
+        }
+        for name, config in configs.items():
+            folder = tmp_path / "newsletters" / name
+            folder.mkdir(parents=True)
+            (folder / "config.yaml").write_text(config)
+            (folder / "issue").write_text("3")
+
+        # ACT
+        migrate()
+
+        # ASSERT
+        assert [database.get_config(n_id) for n_id in [1, 2, 3]] == [None] * 3
+        # The later migrations still ran
+        assert database.get_newsletters_version() == 1
+
+
+class TestVersionNewsletters:
+    def test_version_seeded(self, sqlite_database):
+        # ARRANGE
+        conn = sqlite3.connect(sqlite_database.path)
+        conn.execute(
+            """
+            CREATE TABLE newsletters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+                title VARCHAR(100) NOT NULL,
+                passcode BLOB NOT NULL,
+                folder VARCHAR(100) NOT NULL
+            );
+            """
+        )
+        conn.commit()
+        conn.close()
+
+        # ACT
+        migrate()
+
+        # ASSERT
+        assert database.get_newsletters_version() == 1
+
+        database.create_newsletter("Title", b"hash", "newsletters/title")
+        assert database.get_newsletters_version() == 2
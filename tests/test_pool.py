@@ -0,0 +1,212 @@
+import threading
+
+import mysql.connector
+import pytest
+
+from utils.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+        self.resets = 0
+
+
+class TestConnectionPool:
+    def make_pool(self, **kwargs):
+        created = []
+
+        def factory():
+            conn = FakeConnection()
+            created.append(conn)
+            return conn
+
+        def reset(conn):
+            conn.resets += 1
+
+        def close(conn):
+            conn.closed = True
+
+        kwargs.setdefault("size", 2)
+        kwargs.setdefault("timeout", 0.05)
+        pool = ConnectionPool(
+            factory,
+            is_alive=lambda conn: conn.alive,
+            reset=reset,
+            close=close,
+            **kwargs,
+        )
+        return pool, created
+
+    def test_connection_is_reused(self):
+        # ARRANGE
+        pool, created = self.make_pool()
+
+        # ACT
+        first = pool.acquire()
+        raw = first.raw
+        first.close()
+        second = pool.acquire()
+
+        # ASSERT
+        assert second.raw is raw
+        assert len(created) == 1
+        assert raw.resets == 1
+
+        stats = pool.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+
+    def test_close_twice_is_noop(self):
+        # ARRANGE
+        pool, _ = self.make_pool()
+        conn = pool.acquire()
+
+        # ACT
+        conn.close()
+        conn.close()
+
+        # ASSERT
+        assert pool.stats()["idle"] == 1
+
+    def test_attributes_forwarded(self):
+        # ARRANGE
+        pool, created = self.make_pool()
+        conn = pool.acquire()
+
+        # ACT
+        conn.autocommit = False
+
+        # ASSERT
+        assert created[0].autocommit is False
+        assert conn.alive
+
+    def test_use_after_close_fails(self):
+        # ARRANGE
+        pool, _ = self.make_pool()
+        conn = pool.acquire()
+        conn.close()
+
+        # ACT / ASSERT
+        with pytest.raises(RuntimeError):
+            conn.alive
+
+    def test_checkout_times_out_when_exhausted(self):
+        # ARRANGE
+        pool, _ = self.make_pool(size=1)
+        pool.acquire()
+
+        # ACT / ASSERT
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+
+        stats = pool.stats()
+        assert stats["waits"] == 1
+        assert stats["timeouts"] == 1
+
+    def test_waiter_receives_released_connection(self):
+        # ARRANGE
+        pool, created = self.make_pool(size=1, timeout=2)
+        conn = pool.acquire()
+        timer = threading.Timer(0.05, conn.close)
+
+        # ACT
+        timer.start()
+        second = pool.acquire()
+        timer.join()
+
+        # ASSERT
+        assert second.raw is created[0]
+        assert pool.stats()["waits"] == 1
+
+    def test_dead_connection_replaced(self):
+        # ARRANGE
+        pool, created = self.make_pool(ping_after=0)
+        conn = pool.acquire()
+        created[0].alive = False
+        conn.close()
+
+        # ACT
+        replacement = pool.acquire()
+
+        # ASSERT
+        assert replacement.raw is created[1]
+        assert created[0].closed
+        assert pool.stats()["discarded"] == 1
+        assert pool.stats()["open"] == 1
+
+    def test_liveness_skipped_when_recently_used(self):
+        # ARRANGE
+        pool, created = self.make_pool(ping_after=60)
+        conn = pool.acquire()
+        created[0].alive = False
+        conn.close()
+
+        # ACT
+        reused = pool.acquire()
+
+        # ASSERT
+        assert reused.raw is created[0]
+
+    def test_failed_reset_discards_connection(self):
+        # ARRANGE
+        def reset(conn):
+            raise OSError("lost connection")
+
+        pool = ConnectionPool(FakeConnection, reset=reset, close=lambda conn: None)
+        conn = pool.acquire()
+
+        # ACT
+        conn.close()
+
+        # ASSERT
+        stats = pool.stats()
+        assert stats["idle"] == 0
+        assert stats["open"] == 0
+        assert stats["discarded"] == 1
+
+    def test_failed_close_logged(self, caplog):
+        # ARRANGE
+        def close(conn):
+            raise mysql.connector.OperationalError("lost connection")
+
+        pool = ConnectionPool(FakeConnection, close=close)
+        pool.acquire().close()
+
+        # ACT
+        pool.close_all()
+
+        # ASSERT
+        assert pool.stats()["open"] == 0
+        assert "lost connection" in caplog.text
+
+    def test_unexpected_close_error_raised(self):
+        # ARRANGE
+        def close(conn):
+            raise ValueError("bug")
+
+        pool = ConnectionPool(FakeConnection, close=close)
+        pool.acquire().close()
+
+        # ACT / ASSERT
+        with pytest.raises(ValueError):
+            pool.close_all()
+
+    def test_failed_connect_frees_slot(self):
+        # ARRANGE
+        def factory():
+            raise OSError("refused")
+
+        pool = ConnectionPool(factory, size=1, timeout=0.01)
+
+        # ACT / ASSERT
+        for _ in range(2):
+            with pytest.raises(OSError):
+                pool.acquire()
+
+        assert pool.stats()["open"] == 0
+
+    def test_invalid_size_rejected(self):
+        with pytest.raises(ValueError):
+            ConnectionPool(FakeConnection, size=0)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+
+import pytest
+
+import endpoints
+from utils.constants import State
+from utils.database import (
+    QueryBudgetExceeded,
+    create_newsletter,
+    get_newsletters,
+    get_questions,
+    increment_issue,
+    insert_answer,
+    insert_question,
+    query_budget,
+    track_queries,
+)
+from utils.type_hints import NewsletterToken
+
+
+class TestTrackQueries:
+    def test_counts_by_caller(self, sqlite_database, caplog):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        insert_question(1, 1, "User", "First?")
+        caplog.set_level(logging.INFO)
+
+        # ACT
+        with track_queries("request") as stats:
+            insert_question(1, 1, "User", "Question?")
+            get_questions(1, 1)
+            get_questions(1, 1)
+
+        # ASSERT
+        # The question and its issue summary
+        assert stats.count == 4
+        assert stats.callers == {"insert_question": 2, "get_questions": 2}
+        assert stats.total >= stats.slowest > 0
+        assert stats.slowest_caller in stats.callers
+        assert "request: 4 queries" in caplog.text
+
+    def test_nested_blocks_count_towards_parent(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+
+        # ACT
+        with track_queries("outer") as outer:
+            get_newsletters()
+            with track_queries("inner") as inner:
+                get_questions(1, 1)
+
+        # ASSERT
+        assert inner.count == 1
+        assert outer.count == 2
+
+    def test_untracked_queries_not_recorded(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+
+        # ACT
+        with track_queries("request") as stats:
+            pass
+        get_newsletters()
+
+        # ASSERT
+        assert stats.count == 0
+
+    def test_budget_exceeded(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+
+        # ACT / ASSERT
+        with pytest.raises(QueryBudgetExceeded):
+            with query_budget(1):
+                get_newsletters()
+                get_newsletters()
+
+    def test_async_queries_tracked(self, sqlite_database):
+        # ARRANGE
+        from utils import async_database
+
+        create_newsletter("Title", b"hash", "newsletters/title")
+        insert_question(1, 1, "User", "Question?")
+
+        async def fetch():
+            with track_queries("request") as stats:
+                await asyncio.gather(
+                    async_database.get_questions(1, 1),
+                    async_database.get_responses(1, 1),
+                )
+            return stats
+
+        # ACT
+        stats = asyncio.run(fetch())
+
+        # ASSERT
+        assert stats.callers == {"get_questions": 1, "get_responses": 1}
+
+
+class TestEndpointBudgets:
+    token = NewsletterToken(title="Title", folder="newsletters/title", id=1)
+
+    @pytest.fixture
+    def newsletter(self, sqlite_database):
+        create_newsletter(
+            "Title",
+            b"hash",
+            "newsletters/title",
+            "mail@mail.com",
+            "https://www.site.net",
+            [("Default", "text"), ("Photo", "image")],
+        )
+        increment_issue(1)
+
+        def populate(n_questions):
+            for issue in [1, 2]:
+                for q in range(n_questions):
+                    insert_question(1, issue, f"User {q}", f"Question {q}")
+
+                _, submitted = get_questions(1, issue)
+                insert_answer(
+                    "Name",
+                    {q_id: {"img": None, "text": "Answer"} for q_id, *_ in submitted},
+                )
+
+        return populate
+
+    @pytest.mark.parametrize("n_questions", [1, 10, 50])
+    def test_render_question_form(self, newsletter, mocker, n_questions):
+        newsletter(n_questions)
+        mocker.patch("endpoints.get_state", return_value=State.Question)
+
+        # The config, then inserting the default questions and counting them
+        # in the issue summary costs two more queries on first view
+        with query_budget(4, "render"):
+            assert endpoints.render(self.token, None).status == 200
+
+        with query_budget(2, "render"):
+            assert endpoints.render(self.token, None).status == 200
+
+    @pytest.mark.parametrize("n_questions", [1, 10, 50])
+    def test_render_answer_form(self, newsletter, mocker, n_questions):
+        newsletter(n_questions)
+        mocker.patch("endpoints.get_state", return_value=State.Answer)
+
+        with query_budget(2, "render"):
+            assert endpoints.render(self.token, None).status == 200
+
+    @pytest.mark.parametrize("n_questions", [1, 10, 50])
+    def test_render_newsletter(self, newsletter, mocker, n_questions):
+        newsletter(n_questions)
+        mocker.patch("endpoints.get_state", return_value=State.Publish)
+
+        # The config and the responses
+        with query_budget(2, "render"):
+            assert endpoints.render(self.token, None).status == 200
+
+        with query_budget(2, "render"):
+            assert endpoints.render(self.token, 1).status == 200
+
+    @pytest.mark.parametrize("n_questions", [1, 10, 50])
+    def test_answer(self, newsletter, n_questions):
+        newsletter(n_questions)
+        _, submitted = get_questions(1, 2)
+        parameters = {"name": "Other"}
+        parameters.update({f"question_{q_id}": "Answer" for q_id, *_ in submitted})
+
+        # The answers, the respondent and the issue summary
+        with query_budget(3, "answer"):
+            assert endpoints.answer(parameters).status == 201
+
+    def test_question_submit(self, newsletter):
+        newsletter(1)
+
+        # The config, the question and the issue summary
+        with query_budget(3, "question_submit"):
+            response = endpoints.question_submit(
+                self.token, {"name": "Name", "question": "Question?"}
+            )
+            assert response.status == 201
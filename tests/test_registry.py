@@ -0,0 +1,84 @@
+from utils import database
+from utils.database import create_newsletter, set_fingerprint, set_passcode
+from utils.registry import NewsletterRegistry
+
+
+class TestNewsletterRegistry:
+    def test_empty_database(self, sqlite_database):
+        # ARRANGE
+        registry = NewsletterRegistry()
+
+        # ACT
+        newsletters = registry.newsletters()
+
+        # ASSERT
+        assert newsletters == []
+        assert database.get_newsletters_version() == 0
+
+    def test_lookups(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("First", b"one", "newsletters/first")
+        create_newsletter("Second", b"two", "newsletters/second", fingerprint=b"fp")
+        create_newsletter("First", b"three", "newsletters/again")
+        registry = NewsletterRegistry()
+
+        # ACT
+        newsletters = registry.newsletters()
+
+        # ASSERT
+        assert [entry[0] for entry in newsletters] == [1, 2, 3]
+        assert registry.get(2) == (2, "Second", b"two", "newsletters/second", b"fp")
+        assert registry.get(4) is None
+        assert registry.by_title("First")[0] == 1
+        assert registry.by_title("Missing") is None
+        assert [entry[0] for entry in registry.candidates(b"fp")] == [2, 1, 3]
+        assert [entry[0] for entry in registry.candidates(b"other")] == [1, 3]
+
+    def test_loads_once(self, sqlite_database, mocker):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        registry = NewsletterRegistry()
+        registry.newsletters()
+
+        mock_registry = mocker.patch(
+            "utils.database.get_registry", wraps=database.get_registry
+        )
+
+        # ACT
+        for _ in range(3):
+            registry.get(1)
+
+        # ASSERT
+        mock_registry.assert_not_called()
+
+    def test_reloads_on_change(self, sqlite_database):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        registry = NewsletterRegistry()
+        registry.newsletters()
+
+        # ACT
+        create_newsletter("Other", b"other", "newsletters/other")
+        set_fingerprint(1, b"fp")
+        set_passcode(2, b"other", b"changed")
+
+        # ASSERT
+        assert registry.get(1)[4] == b"fp"
+        assert registry.get(2)[2] == b"changed"
+
+    def test_clear(self, sqlite_database, mocker):
+        # ARRANGE
+        create_newsletter("Title", b"hash", "newsletters/title")
+        registry = NewsletterRegistry()
+        registry.newsletters()
+
+        mock_registry = mocker.patch(
+            "utils.database.get_registry", wraps=database.get_registry
+        )
+
+        # ACT
+        registry.clear()
+        registry.newsletters()
+
+        # ASSERT
+        mock_registry.assert_called_once()
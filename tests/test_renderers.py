@@ -12,9 +12,8 @@ class TestRenderers:
 
     def test_question_form_renderer(self, mocker, caplog):
         # ARRANGE
-        mock_file = mocker.mock_open()
-        mocker.patch("builtins.open", mock_file)
-        mocker.patch("renderers.os.path.join")
+        mock_templates = mocker.patch("renderers.TEMPLATES")
+        mock_templates.get.side_effect = lambda name: name
 
         mock_format = mocker.patch("renderers.format_html")
         mock_format.return_value = "HTML content"
@@ -46,24 +45,36 @@ class TestRenderers:
 
         assert "Rendering question form" in caplog.text
 
-    def test_answer_form_renderer(self, mocker, caplog):
+    def test_question_form_reuses_fetched_questions(self, mocker):
         # ARRANGE
-        mock_file = mocker.mock_open()
-        mock_text = mocker.mock_open(read_data="text_question")
-        mock_img = mocker.mock_open(read_data="img_question")
+        mock_templates = mocker.patch("renderers.TEMPLATES")
+        mock_templates.get.side_effect = lambda name: name
 
-        def conditional_open(path, mode="r", *args, **kwargs):
-            if "text_question" in path:
-                return mock_text(path, mode, *args, **kwargs)
-            elif "image_question" in path:
-                return mock_img(path, mode, *args, **kwargs)
-            else:
-                return mock_file(path, mode, *args, **kwargs)
+        mock_format = mocker.patch("renderers.format_html")
+        mock_format.return_value = "HTML content"
 
-        mocker.patch("builtins.open", conditional_open)
+        mocker.patch("renderers.make_navbar")
+        mock_questions = mocker.patch("renderers.get_questions")
 
-        mock_join = mocker.patch("renderers.os.path.join")
-        mock_join.side_effect = lambda *args: "/".join(args)
+        # ACT
+        response = renderers.render_question_form(
+            self.title,
+            self.id,
+            self.issue,
+            questions=([], [(1, "User", "Question 1")]),
+        )
+
+        # ASSERT
+        assert response.status == 200
+        mock_questions.assert_not_called()
+        mock_format.assert_any_call(
+            ANY, {"NAME": "User", "TEXT": "Question 1"}, sanitize=True
+        )
+
+    def test_answer_form_renderer(self, mocker, caplog):
+        # ARRANGE
+        mock_templates = mocker.patch("renderers.TEMPLATES")
+        mock_templates.get.side_effect = lambda name: name
 
         mock_format = mocker.patch("renderers.format_html")
         mock_format.return_value = "HTML content"
@@ -96,10 +107,10 @@ class TestRenderers:
             sanitize=True,
         )
         mock_format.assert_any_call(
-            "text_question", {"ID": "question_3", "QUESTION": "Text Question"}
+            "text_question.html", {"ID": "question_3", "QUESTION": "Text Question"}
         )
         mock_format.assert_any_call(
-            "img_question",
+            "image_question.html",
             {"ID": "question_4", "QUESTION": "Image Question", "IMG_ID": "image_4"},
         )
         mock_navbar.assert_called()
@@ -108,19 +119,8 @@ class TestRenderers:
 
     def test_newsletter_renderer(self, mocker, caplog):
         # ARRANGE
-        mock_file = mocker.mock_open()
-        mock_text = mocker.mock_open(read_data="text_question")
-        mock_img = mocker.mock_open(read_data="img_question")
-
-        def conditional_open(path, mode="r", *args, **kwargs):
-            if "templates/image_response" in path:
-                return mock_img(path, mode, *args, **kwargs)
-            elif "templates/response" in path:
-                return mock_text(path, mode, *args, **kwargs)
-            else:
-                return mock_file(path, mode, *args, **kwargs)
-
-        mocker.patch("builtins.open", conditional_open)
+        mock_templates = mocker.patch("renderers.TEMPLATES")
+        mock_templates.get.side_effect = lambda name: name
         mock_shutil = mocker.patch("renderers.shutil.copy")
 
         mock_join = mocker.patch("renderers.os.path.join")
@@ -130,15 +130,17 @@ class TestRenderers:
         mock_format.return_value = "HTML content"
 
         mock_navbar = mocker.patch("renderers.make_navbar")
-        mock_responses = mocker.patch("renderers.get_responses")
-        mock_responses.return_value = [
-            ("User", "Question 1", [("User 2", "Answer 1", None)]),
-            (
-                "User 2",
-                "Question 2",
-                [("User 1", "Answer 1", None), ("User 2", "Answer 2", "path")],
-            ),
-        ]
+        mock_responses = mocker.patch("renderers.iter_responses")
+        mock_responses.return_value = iter(
+            [
+                ("User", "Question 1", [("User 2", "Answer 1", None)]),
+                (
+                    "User 2",
+                    "Question 2",
+                    [("User 1", "Answer 1", None), ("User 2", "Answer 2", "path")],
+                ),
+            ]
+        )
 
         caplog.set_level(logging.INFO)
 
@@ -153,13 +155,13 @@ class TestRenderers:
         assert response.content_type == "text/html"
 
         mock_format.assert_any_call(
-            "text_question", {"NAME": "User 2", "TEXT": "Answer 1"}, sanitize=True
+            "response.html", {"NAME": "User 2", "TEXT": "Answer 1"}, sanitize=True
         )
         mock_format.assert_any_call(
-            "text_question", {"NAME": "User 1", "TEXT": "Answer 1"}, sanitize=True
+            "response.html", {"NAME": "User 1", "TEXT": "Answer 1"}, sanitize=True
         )
         mock_format.assert_any_call(
-            "img_question",
+            "image_response.html",
             {"NAME": "User 2", "SRC": "/images/path", "CAPTION": "Answer 2"},
             sanitize=True,
         )
@@ -175,3 +177,13 @@ class TestRenderers:
         mock_shutil.assert_called_once()
 
         assert "Rendering published newsletter" in caplog.text
+
+
+class TestRenderHeader:
+    def test_title_filled(self):
+        # ACT
+        header = renderers.render_header("Newsletter 5")
+
+        # ASSERT
+        assert "<title>Newsletter 5</title>" in header
+        assert "[TITLE]" not in header
@@ -0,0 +1,169 @@
+import asyncio
+import time
+
+import pytest
+
+from utils import async_database, database
+from utils.backends import SQLiteBackend
+from utils.database import (
+    create_newsletter,
+    get_newsletters,
+    get_questions,
+    insert_question,
+    pool_stats,
+    request_scope,
+)
+
+
+def titles():
+    return [title for _, title, *_ in get_newsletters()]
+
+
+def add_newsletter(backend, title):
+    conn = backend.connect()
+    conn.execute(
+        "INSERT INTO newsletters (title, passcode, folder) VALUES (?, ?, ?);",
+        (title, b"hash", f"newsletters/{title}"),
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestReplicaRouting:
+    def test_reads_go_to_replica(self, sqlite_database, replica_database):
+        # ARRANGE
+        add_newsletter(sqlite_database, "Primary")
+        add_newsletter(replica_database, "Replica")
+
+        # ACT
+        result = titles()
+
+        # ASSERT
+        assert result == ["Replica"]
+        assert pool_stats(replica=True)["misses"] == 1
+
+    def test_writes_go_to_primary(self, sqlite_database, replica_database):
+        # ARRANGE
+        add_newsletter(sqlite_database, "Primary")
+        add_newsletter(replica_database, "Replica")
+
+        # ACT
+        success, _ = insert_question(1, 1, "User", "Question?")
+
+        # ASSERT
+        assert success
+        assert get_questions(1, 1) == ([], [])
+
+        conn = sqlite_database.connect()
+        assert conn.execute("SELECT COUNT(*) FROM questions;").fetchone() == (1,)
+
+    def test_reads_own_writes_in_request(self, sqlite_database, replica_database):
+        # ARRANGE
+        add_newsletter(replica_database, "Replica")
+
+        # ACT
+        with request_scope():
+            before = titles()
+            create_newsletter("Primary", b"hash", "newsletters/primary")
+            after = titles()
+
+            with request_scope() as nested:
+                nested_result = titles()
+
+        # ASSERT
+        assert before == ["Replica"]
+        assert after == nested_result == ["Primary"]
+        assert nested.wrote
+
+        # A new request reads from the replica again
+        assert titles() == ["Replica"]
+
+    def test_reads_own_writes_in_async_request(self, sqlite_database, replica_database):
+        # ARRANGE
+        add_newsletter(replica_database, "Replica")
+
+        @async_database.tracked("request")
+        async def request():
+            await async_database.create_newsletter(
+                "Primary", b"hash", "newsletters/primary"
+            )
+            return await async_database.get_newsletters()
+
+        # ACT
+        result = asyncio.run(request())
+
+        # ASSERT
+        assert [title for _, title, *_ in result] == ["Primary"]
+
+    def test_falls_back_to_primary(self, sqlite_database, tmp_path, mocker):
+        # ARRANGE
+        replica = SQLiteBackend(str(tmp_path / "missing" / "replica.db"))
+        mocker.patch("utils.database.REPLICA", replica)
+        mocker.patch("utils.database._REPLICA_POOL", None)
+        mocker.patch("utils.database._REPLICA_DOWN_UNTIL", 0.0)
+        connect = mocker.spy(replica, "connect")
+
+        add_newsletter(sqlite_database, "Primary")
+
+        # ACT
+        first = titles()
+        second = titles()
+
+        # ASSERT
+        assert first == second == ["Primary"]
+        # The replica is not retried straight away
+        connect.assert_called_once()
+        assert database._REPLICA_DOWN_UNTIL > 0
+
+    def test_busy_replica_falls_back_at_once(
+        self, sqlite_database, replica_database, mocker
+    ):
+        # ARRANGE
+        add_newsletter(sqlite_database, "Primary")
+        pool = database._get_replica_pool()
+        held = [pool.acquire() for _ in range(pool.size)]
+        mocker.patch.object(pool, "timeout", 60)
+
+        # ACT
+        start = time.monotonic()
+        result = titles()
+        elapsed = time.monotonic() - start
+
+        for conn in held:
+            conn.close()
+
+        # ASSERT
+        assert result == ["Primary"]
+        assert elapsed < 1
+        # Busy is not down, the next read tries the replica again
+        assert database._REPLICA_DOWN_UNTIL == 0.0
+
+    def test_replica_errors_raised(self, sqlite_database, replica_database, mocker):
+        # ARRANGE
+        mocker.patch.object(replica_database, "connect", side_effect=ValueError)
+
+        # ACT / ASSERT
+        with pytest.raises(ValueError):
+            titles()
+
+    def test_replica_retried_after_delay(self, sqlite_database, replica_database):
+        # ARRANGE
+        add_newsletter(replica_database, "Replica")
+        database._REPLICA_DOWN_UNTIL = 1.0
+
+        # ACT
+        result = titles()
+
+        # ASSERT
+        assert result == ["Replica"]
+
+    def test_no_replica_reads_primary(self, sqlite_database):
+        # ARRANGE
+        add_newsletter(sqlite_database, "Primary")
+
+        # ACT
+        result = titles()
+
+        # ASSERT
+        assert database.REPLICA is None
+        assert result == ["Primary"]
@@ -0,0 +1,194 @@
+import os
+
+import pytest
+
+from utils.templates import TEMPLATES, Template, TemplateRegistry, compile_template
+
+
+class TestTemplate:
+    def test_missing_key_fails_at_compile_time(self):
+        with pytest.raises(KeyError):
+            Template("<p>[NAME]</p>", keys=["NAME", "MISSING"])
+
+    def test_missing_key_fails(self):
+        template = Template("<p>[NAME]</p>")
+
+        with pytest.raises(KeyError):
+            template.render({"NAME": "Jo", "MISSING": "This will fail"})
+
+    def test_key_outside_placeholder_passes(self):
+        # Replacing each key in turn only checked the key was in the text
+        template = Template("<p>NAME</p>")
+
+        assert template.render({"NAME": "Jo"}) == "<p>NAME</p>"
+
+    def test_every_placeholder_replaced(self):
+        template = Template('<label for="[ID]">[QUESTION]</label><p id="[ID]"></p>')
+
+        rendered = template.render({"ID": "question_1", "QUESTION": "Why?"})
+
+        assert rendered == '<label for="question_1">Why?</label><p id="question_1"></p>'
+
+    def test_values_substituted_once(self):
+        template = Template("[NAME]: [TEXT]")
+
+        rendered = template.render({"NAME": "[TEXT]", "TEXT": "[NAME]"})
+
+        assert rendered == "[TEXT]: [NAME]"
+
+    def test_unreplaced_placeholders_kept(self):
+        template = Template("split('\\\\')[2] [[NAME]] [OTHER]")
+
+        rendered = template.render({"NAME": "Jo"})
+
+        assert rendered == "split('\\\\')[2] [Jo] [OTHER]"
+
+    def test_braces_kept(self):
+        template = Template("function f() { return '[NAME]'; }")
+
+        assert template.render({"NAME": "{0}"}) == "function f() { return '{0}'; }"
+
+    def test_none_replaced_with_empty_string(self):
+        assert Template("<p>[TEXT]</p>").render({"TEXT": None}) == "<p></p>"
+
+    def test_sanitized_newlines(self):
+        template = Template("[TEXT]")
+
+        rendered = template.render({"TEXT": "<script>one</script>\ntwo"}, sanitize=True)
+
+        assert rendered == "&lt;script&gt;one&lt;/script&gt;<br/>two"
+
+    def test_compiled_once(self):
+        source = "<p>[TEXT]</p>"
+
+        assert compile_template(source) is compile_template("<p>[TEXT]</p>")
+
+
+class TestTemplateRegistry:
+    def write(self, path, text, mtime):
+        path.write_text(text)
+        os.utime(path, (mtime, mtime))
+
+    def test_preloads_every_template(self, tmp_path):
+        # ARRANGE
+        self.write(tmp_path / "page.html", "<p>[TEXT]</p>", 1)
+        self.write(tmp_path / "other.html", "[NAME]", 1)
+        (tmp_path / "notes.txt").write_text("[NOT]")
+        registry = TemplateRegistry(str(tmp_path))
+
+        # ACT
+        page = registry.get("page.html")
+
+        # ASSERT
+        assert page.render({"TEXT": "Hi"}) == "<p>Hi</p>"
+        assert sorted(registry._templates) == ["other.html", "page.html"]
+
+    def test_declared_keys_checked_when_compiled(self, tmp_path):
+        # ARRANGE
+        self.write(tmp_path / "page.html", "<p>[TEXT]</p>", 1)
+        registry = TemplateRegistry(str(tmp_path))
+        registry.declare("page.html", ["TEXT", "MISSING"])
+
+        # ACT / ASSERT
+        with pytest.raises(KeyError):
+            registry.get("page.html")
+
+    def test_declared_keys_checked_if_loaded(self, tmp_path):
+        # ARRANGE
+        self.write(tmp_path / "page.html", "<p>[TEXT]</p>", 1)
+        registry = TemplateRegistry(str(tmp_path))
+        registry.get("page.html")
+
+        # ACT / ASSERT
+        registry.declare("page.html", ["TEXT"])
+        with pytest.raises(KeyError):
+            registry.declare("page.html", ["MISSING"])
+
+    def test_page_templates_have_declared_keys(self):
+        # ARRANGE
+        import renderers  # noqa: F401
+        import utils.email  # noqa: F401
+
+        # ACT
+        TEMPLATES.clear()
+        TEMPLATES.preload()
+
+        # ASSERT
+        assert TEMPLATES._keys["answer.html"] == {
+            "HEADER",
+            "NAVBAR",
+            "QUESTIONS",
+            "TITLE",
+        }
+        assert "email.html" in TEMPLATES._keys
+        assert "navbar.html" in TEMPLATES._keys
+
+    def test_no_filesystem_within_interval(self, tmp_path, mocker):
+        # ARRANGE
+        self.write(tmp_path / "page.html", "<p>[TEXT]</p>", 1)
+        registry = TemplateRegistry(str(tmp_path), check_interval=60)
+        first = registry.get("page.html")
+
+        mock_stat = mocker.patch("utils.templates.os.stat")
+        mock_open = mocker.patch("builtins.open")
+
+        # ACT
+        again = registry["page.html"]
+
+        # ASSERT
+        assert again is first
+        mock_stat.assert_not_called()
+        mock_open.assert_not_called()
+
+    def test_reloads_changed_file(self, tmp_path):
+        # ARRANGE
+        path = tmp_path / "page.html"
+        self.write(path, "<p>[TEXT]</p>", 1)
+        registry = TemplateRegistry(str(tmp_path), check_interval=0)
+        first = registry.get("page.html")
+
+        # ACT
+        unchanged = registry.get("page.html")
+        self.write(path, "<h1>[TEXT]</h1>", 2)
+        changed = registry.get("page.html")
+
+        # ASSERT
+        assert unchanged is first
+        assert changed.render({"TEXT": "Hi"}) == "<h1>Hi</h1>"
+
+    def test_never_checks_when_negative(self, tmp_path):
+        # ARRANGE
+        path = tmp_path / "page.html"
+        self.write(path, "<p>[TEXT]</p>", 1)
+        registry = TemplateRegistry(str(tmp_path), check_interval=-1)
+        first = registry.get("page.html")
+
+        # ACT
+        self.write(path, "<h1>[TEXT]</h1>", 2)
+
+        # ASSERT
+        assert registry.get("page.html") is first
+
+    def test_deleted_file_keeps_last_version(self, tmp_path):
+        # ARRANGE
+        path = tmp_path / "page.html"
+        self.write(path, "<p>[TEXT]</p>", 1)
+        registry = TemplateRegistry(str(tmp_path), check_interval=0)
+        first = registry.get("page.html")
+
+        # ACT
+        path.unlink()
+
+        # ASSERT
+        assert registry.get("page.html") is first
+
+    def test_missing_template_fails(self, tmp_path):
+        registry = TemplateRegistry(str(tmp_path))
+
+        with pytest.raises(FileNotFoundError):
+            registry.get("missing.html")
+
+    def test_repository_templates_compile(self):
+        registry = TemplateRegistry()
+
+        assert "TITLE" in registry.get("header.html").placeholders
@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from utils import tokens
+from utils.tokens import issue_token, login, verify_token
+from utils.type_hints import NewsletterToken
+
+
+@pytest.fixture(autouse=True)
+def secret(mocker):
+    mocker.patch("utils.tokens.SESSION_SECRET", "secret")
+
+
+class TestTokens:
+    token = NewsletterToken(title="Title", folder="newsletters/title", id=1)
+
+    def test_round_trip(self):
+        # ACT
+        value = issue_token(self.token)
+
+        # ASSERT
+        assert verify_token(value) == self.token
+
+    def test_expired(self, mocker):
+        # ARRANGE
+        value = issue_token(self.token, ttl=60)
+        mocker.patch("utils.tokens.time.time", return_value=time.time() + 61)
+
+        # ACT / ASSERT
+        assert verify_token(value) is None
+
+    def test_tampered_payload(self):
+        # ARRANGE
+        header, _, signature = issue_token(self.token).split(".")
+        forged = tokens._json(
+            {"id": 2, "title": "Other", "folder": "other", "exp": 2**40}
+        )
+
+        # ACT / ASSERT
+        assert verify_token(f"{header}.{forged}.{signature}") is None
+
+    def test_other_secret(self, mocker):
+        # ARRANGE
+        value = issue_token(self.token)
+        mocker.patch("utils.tokens.SESSION_SECRET", "rotated")
+
+        # ACT / ASSERT
+        assert verify_token(value) is None
+
+    def test_unsigned_algorithm(self):
+        # ARRANGE
+        _, payload, _ = issue_token(self.token).split(".")
+        header = tokens._json({"alg": "none", "typ": "JWT"})
+        message = f"{header}.{payload}"
+
+        # ACT / ASSERT
+        assert verify_token(f"{message}.") is None
+        assert verify_token(f"{message}.{tokens._sign(message)}") is None
+
+    @pytest.mark.parametrize(
+        "value", ["", "a.b", "a.b.c.d", "...", "é.é.é", "e30.e30.signature"]
+    )
+    def test_malformed(self, value):
+        assert verify_token(value) is None
+
+    def test_signed_malformed_payload(self):
+        # ARRANGE
+        header = tokens._json(tokens.HEADER)
+        payload = tokens._json({"id": "not an id", "exp": 2**40})
+        message = f"{header}.{payload}"
+
+        # ACT / ASSERT
+        assert verify_token(f"{message}.{tokens._sign(message)}") is None
+
+    def test_missing_secret(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.tokens.SESSION_SECRET", None)
+
+        # ACT / ASSERT
+        with pytest.raises(AssertionError):
+            issue_token(self.token)
+
+
+class TestLogin:
+    def test_authenticates_once(self, mocker):
+        # ARRANGE
+        mock_authenticate = mocker.patch("utils.tokens.authenticate")
+        mock_authenticate.return_value = (True, 1, "Title", "newsletters/title")
+
+        # ACT
+        value = login("passcode")
+
+        # ASSERT
+        mock_authenticate.assert_called_once_with("passcode")
+        assert verify_token(value) == NewsletterToken(
+            title="Title", folder="newsletters/title", id=1
+        )
+
+    def test_wrong_passcode(self, mocker):
+        # ARRANGE
+        mocker.patch("utils.tokens.authenticate", return_value=(False, -1, "", ""))
+
+        # ACT / ASSERT
+        assert login("wrong") is None
@@ -0,0 +1,185 @@
+import gzip
+import json
+
+import pytest
+
+from utils import transfer
+from utils.archive import archive_issue
+from utils.database import (
+    create_newsletter,
+    get_config,
+    get_issue_summary,
+    get_newsletter_candidates,
+    get_newsletters,
+    get_questions,
+    get_responses,
+    increment_issue,
+    insert_answer,
+    insert_default_questions,
+    insert_question,
+)
+from utils.transfer import export_newsletter, import_newsletter
+
+
+@pytest.fixture
+def newsletter(sqlite_database):
+    create_newsletter(
+        "Title",
+        b"\x00\xffhash",
+        "newsletters/title",
+        "mail@mail.com",
+        "https://www.site.net",
+        [("Default", "text")],
+        b"print",
+    )
+    increment_issue(1)
+
+    for issue in [1, 2, 3]:
+        insert_default_questions(1, issue, [("Default", "text"), ("Photo", "image")])
+        insert_question(1, issue, "User", f"Question {issue}?")
+        insert_question(1, issue, "Quiet", "Unanswered?")
+
+        default, submitted = get_questions(1, issue)
+        for name in ["Name", "Other"]:
+            insert_answer(
+                name,
+                {
+                    default[0][0]: {"img": None, "text": f"{name} text"},
+                    default[1][0]: {"img": f"images/{name}.png", "text": "Caption"},
+                    submitted[0][0]: {"img": None, "text": f"{name} answer"},
+                },
+            )
+
+    archive_issue(1, 1)
+
+
+def snapshot(newsletter_id):
+    return (
+        [get_responses(newsletter_id, issue) for issue in [1, 2, 3]],
+        [
+            [
+                question[1:]
+                for questions in get_questions(newsletter_id, issue)
+                for question in questions
+            ]
+            for issue in [1, 2, 3]
+        ],
+        [get_issue_summary(newsletter_id, issue) for issue in [1, 2, 3]],
+    )
+
+
+class TestTransfer:
+    @pytest.mark.parametrize("filename", ["export.jsonl", "export.jsonl.gz"])
+    def test_round_trip(self, newsletter, tmp_path, filename):
+        # ARRANGE
+        path = str(tmp_path / filename)
+        responses, questions, summaries = snapshot(1)
+
+        # ACT
+        exported = export_newsletter(1, path)
+        newsletter_id, imported = import_newsletter(path)
+
+        # ASSERT
+        assert exported == imported == {"questions": 12, "answers": 18}
+        assert newsletter_id == 2
+        assert get_config(newsletter_id) == get_config(1)
+        assert get_newsletters()[1][1:] == (
+            "Title",
+            b"\x00\xffhash",
+            "newsletters/title",
+        )
+        assert [row[0] for row in get_newsletter_candidates(b"print")] == [1, 2]
+
+        new_responses, new_questions, new_summaries = snapshot(newsletter_id)
+        assert new_responses == responses
+        # The archived issue is restored to the hot tables
+        assert new_questions[1:] == questions[1:]
+        assert len(new_questions[0]) == 4
+
+        for summary, new_summary in zip(summaries, new_summaries):
+            assert new_summary.question_count == summary.question_count
+            assert new_summary.answer_count == summary.answer_count
+            assert new_summary.respondent_count == summary.respondent_count
+            assert new_summary.last_answer_at == summary.last_answer_at
+
+    def test_gzipped(self, newsletter, tmp_path):
+        # ARRANGE
+        path = str(tmp_path / "export.jsonl.gz")
+
+        # ACT
+        export_newsletter(1, path)
+
+        # ASSERT
+        with gzip.open(path, "rt") as file:
+            records = [json.loads(line) for line in file]
+
+        assert records[0]["record"] == "newsletter"
+        assert {record["record"] for record in records} == {
+            "newsletter",
+            "question",
+            "answer",
+            "issue",
+        }
+
+    def test_imports_in_batches(self, newsletter, tmp_path, mocker):
+        # ARRANGE
+        path = str(tmp_path / "export.jsonl")
+        export_newsletter(1, path)
+        mocker.patch("utils.transfer.IMPORT_BATCH", 4)
+
+        # ACT
+        newsletter_id, counts = import_newsletter(path)
+
+        # ASSERT
+        assert counts == {"questions": 12, "answers": 18}
+        assert snapshot(newsletter_id)[0] == snapshot(1)[0]
+
+    def test_missing_newsletter(self, sqlite_database, tmp_path):
+        with pytest.raises(ValueError):
+            export_newsletter(1, str(tmp_path / "export.jsonl"))
+
+    def test_failed_import_rolls_back_batch(self, newsletter, tmp_path):
+        # ARRANGE
+        path = tmp_path / "export.jsonl"
+        export_newsletter(1, str(path))
+        with open(path, "a") as file:
+            file.write(json.dumps({"record": "unknown"}) + "\n")
+
+        # ACT
+        with pytest.raises(ValueError):
+            import_newsletter(str(path))
+
+        # ASSERT
+        # Everything fitted in one uncommitted batch
+        assert len(get_newsletters()) == 1
+
+    def test_failed_import_cannot_be_logged_in_to(self, newsletter, tmp_path, mocker):
+        # ARRANGE
+        path = tmp_path / "export.jsonl"
+        export_newsletter(1, str(path))
+        with open(path, "a") as file:
+            file.write(json.dumps({"record": "unknown"}) + "\n")
+        mocker.patch("utils.transfer.IMPORT_BATCH", 4)
+
+        # ACT
+        with pytest.raises(ValueError):
+            import_newsletter(str(path))
+
+        # ASSERT
+        # The first batches were committed without the passcode or fingerprint
+        candidates = get_newsletter_candidates(b"print")
+        assert [(row[0], row[2], row[4]) for row in candidates] == [
+            (1, b"\x00\xffhash", b"print"),
+            (2, b"", None),
+        ]
+
+    def test_streams_rows(self, newsletter, tmp_path, mocker):
+        # ARRANGE
+        mocker.patch("utils.transfer.STREAM_BATCH", 2)
+        stream = mocker.spy(transfer, "_stream")
+
+        # ACT
+        export_newsletter(1, str(tmp_path / "export.jsonl"))
+
+        # ASSERT
+        assert stream.call_count == 4
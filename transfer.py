@@ -0,0 +1,47 @@
+import sys
+from argparse import ArgumentParser
+
+from utils.transfer import export_newsletter, import_newsletter
+
+
+def export(newsletter_id: int, path: str) -> int:
+    counts = export_newsletter(newsletter_id, path)
+    print(
+        f"Exported {counts['questions']} questions and {counts['answers']} answers "
+        f"to {path}"
+    )
+    return 0
+
+
+def load(path: str) -> int:
+    newsletter_id, counts = import_newsletter(path)
+    print(
+        f"Imported {counts['questions']} questions and {counts['answers']} answers "
+        f"as newsletter {newsletter_id}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("Export or Import Newsletter Data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser(
+        "export", help="Write a newsletter and all of its issues to JSON Lines."
+    )
+    export_parser.add_argument("newsletter", type=int, help="The newsletter id.")
+    export_parser.add_argument(
+        "path", help="The file to write, gzipped if it ends in .gz."
+    )
+
+    import_parser = commands.add_parser(
+        "import", help="Load an exported file as a new newsletter."
+    )
+    import_parser.add_argument("path", help="The file to read.")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        sys.exit(export(args.newsletter, args.path))
+    else:
+        sys.exit(load(args.path))
@@ -0,0 +1,206 @@
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+
+from . import database
+from .database import _get_connection, _pack_archive
+from .logger import database_logger as LOGGER
+
+from typing import List, Optional, Tuple
+
+
+load_dotenv()
+
+
+# The number of most recent issues of each newsletter left in the hot tables
+KEEP_ISSUES = int(os.getenv("ARCHIVE_KEEP_ISSUES", "6"))
+
+ARCHIVED_TABLES = ("questions", "answers")
+
+
+def cold_issues(
+    keep: int = KEEP_ISSUES, newsletter_id: Optional[int] = None
+) -> List[Tuple[int, int]]:
+    """
+    Find the issues still in the hot tables that are older than the `keep`
+    most recent issues of their newsletter.
+
+    Parameters
+    ----------
+    keep : int
+        The number of recent issues to leave alone, at least 1
+    newsletter_id : int, optional
+        Only look at this newsletter, defaults to every newsletter
+
+    Returns
+    -------
+    issues : list[(newsletter_id, issue)]
+        The issues to archive, oldest first
+    """
+    if keep < 1:
+        raise ValueError("At least the current issue must be kept")
+
+    conn, cursor = _get_connection("cold_issues")
+
+    issues = []
+    try:
+        # The summaries outlive archiving so the latest issue is always known
+        cursor.execute(
+            "SELECT newsletter_id, MAX(issue) FROM issues GROUP BY newsletter_id;"
+        )
+        latest = [
+            (n_id, last)
+            for n_id, last in cursor.fetchall()
+            if newsletter_id is None or n_id == newsletter_id
+        ]
+
+        for n_id, last in latest:
+            cursor.execute(
+                """
+                SELECT DISTINCT issue FROM questions
+                WHERE newsletter_id=%s AND issue<=%s
+                ORDER BY issue;
+                """,
+                (n_id, last - keep),
+            )
+            issues.extend((n_id, issue) for (issue,) in cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+    return issues
+
+
+def archive_issue(newsletter_id: int, issue: int) -> bool:
+    """
+    Move the questions and answers of an issue into a single compressed row
+    of `archived_issues`. `get_responses` and `iter_responses` read it from
+    there transparently. The issue summary is left as is.
+
+    Returns
+    -------
+    archived : bool
+        Whether the issue was archived, False if it had no questions or was
+        written to while being archived
+    """
+    conn, cursor = _get_connection("archive_issue")
+    values = (newsletter_id, issue)
+
+    try:
+        cursor.execute(
+            """
+            SELECT id, base, type, creator, text FROM questions
+            WHERE newsletter_id=%s AND issue=%s
+            ORDER BY base, id;
+            """,
+            values,
+        )
+        questions = [tuple(row) for row in cursor.fetchall()]
+        if not questions:
+            return False
+
+        cursor.execute(
+            """
+            SELECT answers.id, answers.question_id, answers.name, answers.text,
+                answers.img_path
+            FROM answers
+            JOIN questions ON questions.id=answers.question_id
+            WHERE questions.newsletter_id=%s AND questions.issue=%s
+            ORDER BY answers.id;
+            """,
+            values,
+        )
+        answers = [tuple(row) for row in cursor.fetchall()]
+
+        cursor.execute(
+            """
+            INSERT INTO archived_issues (newsletter_id, issue, archived_at, data)
+            VALUES (%s, %s, %s, %s);
+            """,
+            (newsletter_id, issue, datetime.now(), _pack_archive(questions, answers)),
+        )
+
+        cursor.execute(
+            """
+            DELETE FROM answers WHERE question_id IN (
+                SELECT id FROM questions WHERE newsletter_id=%s AND issue=%s
+            );
+            """,
+            values,
+        )
+        deleted_answers = cursor.rowcount
+        cursor.execute(
+            "DELETE FROM questions WHERE newsletter_id=%s AND issue=%s;", values
+        )
+        deleted_questions = cursor.rowcount
+
+        # Never drop rows that did not make it into the archive
+        if (deleted_questions, deleted_answers) != (len(questions), len(answers)):
+            conn.rollback()
+            LOGGER.warning(
+                f"Issue {issue} of newsletter {newsletter_id} changed while "
+                "being archived, skipping it"
+            )
+            return False
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    LOGGER.info(
+        f"Archived issue {issue} of newsletter {newsletter_id}: "
+        f"{len(questions)} questions, {len(answers)} answers"
+    )
+    return True
+
+
+def compact() -> None:
+    """
+    Reclaim the space freed in the hot tables by archiving.
+    """
+    conn, cursor = _get_connection("compact")
+
+    try:
+        database.BACKEND.compact(cursor, ARCHIVED_TABLES)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def archive_issues(
+    keep: int = KEEP_ISSUES,
+    newsletter_id: Optional[int] = None,
+    compact_tables: bool = False,
+) -> List[Tuple[int, int]]:
+    """
+    Archive every issue older than the `keep` most recent issues of its
+    newsletter, one transaction per issue.
+
+    Parameters
+    ----------
+    keep : int
+        The number of recent issues to leave in the hot tables
+    newsletter_id : int, optional
+        Only archive this newsletter, defaults to every newsletter
+    compact_tables : bool
+        Compact the hot tables afterwards if anything was archived
+
+    Returns
+    -------
+    archived : list[(newsletter_id, issue)]
+        The issues archived by this call
+    """
+    archived = [
+        (n_id, issue)
+        for n_id, issue in cold_issues(keep, newsletter_id)
+        if archive_issue(n_id, issue)
+    ]
+
+    if archived and compact_tables:
+        compact()
+
+    return archived
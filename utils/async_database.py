@@ -0,0 +1,174 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from . import database
+from .type_hints import IssueSummary, Response
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+
+load_dotenv()
+
+
+QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", "30"))
+
+# One worker per pooled connection so that a worker never waits on the pool
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=database.POOL_SIZE, thread_name_prefix="database"
+)
+
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+async def run(func: Callable[..., T], *args: Any, timeout: Optional[float] = None) -> T:
+    """
+    Run a blocking database function on the bounded executor.
+
+    Cancelling the awaiting task, or hitting the timeout, abandons the result.
+    A query that has not started yet is never run. One that is already running
+    finishes in its worker and returns its connection to the pool as usual;
+    only the caller stops waiting.
+
+    Parameters
+    ----------
+    func : Callable
+        The blocking function to run
+    timeout : float, optional
+        Seconds to wait before raising `asyncio.TimeoutError`, defaults to
+        `DB_QUERY_TIMEOUT`
+
+    Returns
+    -------
+    result
+        Whatever `func` returns
+    """
+    loop = asyncio.get_running_loop()
+    # Run in a copy of the caller's context so its `track_queries` sees the query
+    context = contextvars.copy_context()
+    future = loop.run_in_executor(EXECUTOR, functools.partial(context.run, func, *args))
+
+    return await asyncio.wait_for(future, QUERY_TIMEOUT if timeout is None else timeout)
+
+
+def tracked(name: str) -> Callable[[F], F]:
+    """
+    Decorate a coroutine function serving a request so that its queries are
+    tracked and logged under `name` and it reads its own writes, the async
+    counterpart of decorating with `track_queries` and `request_scope`.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with database.track_queries(name), database.request_scope():
+                return await func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+async def get_newsletters(timeout: Optional[float] = None) -> list:
+    """
+    Awaitable `utils.database.get_newsletters`.
+    """
+    return await run(database.get_newsletters, timeout=timeout)
+
+
+async def get_questions(
+    newsletter_id: int, issue: int, timeout: Optional[float] = None
+) -> Tuple[list, list]:
+    """
+    Awaitable `utils.database.get_questions`.
+    """
+    return await run(database.get_questions, newsletter_id, issue, timeout=timeout)
+
+
+async def get_responses(
+    newsletter_id: int, issue: int, timeout: Optional[float] = None
+) -> List[Response]:
+    """
+    Awaitable `utils.database.get_responses`.
+    """
+    return await run(database.get_responses, newsletter_id, issue, timeout=timeout)
+
+
+async def get_issue_summary(
+    newsletter_id: int, issue: int, timeout: Optional[float] = None
+) -> Optional[IssueSummary]:
+    """
+    Awaitable `utils.database.get_issue_summary`.
+    """
+    return await run(database.get_issue_summary, newsletter_id, issue, timeout=timeout)
+
+
+async def insert_answer(
+    name: str, responses: dict, timeout: Optional[float] = None
+) -> Tuple[bool, str]:
+    """
+    Awaitable `utils.database.insert_answer`.
+    """
+    return await run(database.insert_answer, name, responses, timeout=timeout)
+
+
+async def insert_question(
+    newsletter_id: int,
+    issue: int,
+    name: str,
+    question: str,
+    timeout: Optional[float] = None,
+) -> Tuple[bool, str]:
+    """
+    Awaitable `utils.database.insert_question`.
+    """
+    return await run(
+        database.insert_question, newsletter_id, issue, name, question, timeout=timeout
+    )
+
+
+async def insert_default_questions(
+    newsletter_id: int,
+    issue: int,
+    questions: List[Tuple[str, str]],
+    timeout: Optional[float] = None,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Awaitable `utils.database.insert_default_questions`.
+    """
+    return await run(
+        database.insert_default_questions,
+        newsletter_id,
+        issue,
+        questions,
+        timeout=timeout,
+    )
+
+
+async def create_newsletter(
+    title: str,
+    pass_hash: bytes,
+    folder: str,
+    email: str = "",
+    link: str = "",
+    defaults: Sequence[Tuple[str, str]] = (),
+    fingerprint: Optional[bytes] = None,
+    timeout: Optional[float] = None,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Awaitable `utils.database.create_newsletter`.
+    """
+    return await run(
+        database.create_newsletter,
+        title,
+        pass_hash,
+        folder,
+        email,
+        link,
+        defaults,
+        fingerprint,
+        timeout=timeout,
+    )
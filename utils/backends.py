@@ -0,0 +1,324 @@
+import os
+import re
+import sqlite3
+
+import mysql.connector
+from mysql.connector.locales import errorcode
+
+from typing import Any, Dict, Optional, Tuple, Type
+
+
+DIR = os.path.dirname(__file__)
+SQLITE_SCHEMA = os.path.join(DIR, "../init.sqlite.sql")
+
+
+class Backend:
+    """
+    The database engine behind `utils.database`.
+
+    Queries are written once in MySQL syntax with `%s` placeholders and MySQL
+    integrity errors. Each backend provides connections that accept those
+    queries and surface those errors.
+    """
+
+    name = ""
+    # Raised by the driver when connecting or on a broken connection
+    errors: Tuple[Type[Exception], ...] = (mysql.connector.Error,)
+
+    def connect(self) -> Any:
+        """
+        Open a new connection with autocommit disabled.
+        """
+        raise NotImplementedError
+
+    def is_alive(self, conn: Any) -> bool:
+        return True
+
+    def reset(self, conn: Any) -> None:
+        """
+        Roll back anything a caller left open before the connection is reused.
+        """
+        if conn.in_transaction:
+            conn.rollback()
+
+    def prepare(self, conn: Any) -> Optional[Any]:
+        """
+        Create a cursor that prepares its statement server-side on first
+        execution and reuses it for every later execution of the same query.
+
+        Returns
+        -------
+        cursor
+            The prepared cursor, or None if the backend has no such thing
+        """
+        return None
+
+    def compact(self, cursor, tables: Tuple[str, ...]) -> None:
+        """
+        Reclaim the space left by deleted rows and rebuild the indexes of
+        `tables`. Must be called outside of a transaction.
+        """
+        raise NotImplementedError
+
+    def column_exists(self, cursor, table: str, column: str) -> bool:
+        raise NotImplementedError
+
+    def index_exists(self, cursor, table: str, index: str) -> bool:
+        raise NotImplementedError
+
+    def explain(
+        self, cursor, query: str, values: Tuple[Any, ...]
+    ) -> Dict[str, Optional[str]]:
+        """
+        Returns
+        -------
+        keys : dict[str, str | None]
+            The index used for each table the query reads, None for a full scan
+        """
+        raise NotImplementedError
+
+
+class MySQLBackend(Backend):
+    name = "mysql"
+
+    def __init__(
+        self,
+        host: str,
+        user: Optional[str],
+        password: Optional[str],
+        database: Optional[str],
+    ):
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database = database
+
+    def connect(self) -> Any:
+        assert self.user is not None, "Failed to find database config"
+        assert self.password is not None, "Failed to find database config"
+        assert self.database is not None, "Failed to find the database config"
+
+        conn = mysql.connector.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+        )
+        conn.autocommit = False
+
+        return conn
+
+    def is_alive(self, conn: Any) -> bool:
+        return conn.is_connected()
+
+    def prepare(self, conn: Any) -> Optional[Any]:
+        return conn.cursor(prepared=True)
+
+    def compact(self, cursor, tables: Tuple[str, ...]) -> None:
+        cursor.execute(f"OPTIMIZE TABLE {', '.join(tables)};")
+        cursor.fetchall()
+
+    def column_exists(self, cursor, table: str, column: str) -> bool:
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema=DATABASE() AND table_name=%s AND column_name=%s;
+            """,
+            (table, column),
+        )
+        return cursor.fetchone()[0] > 0
+
+    def index_exists(self, cursor, table: str, index: str) -> bool:
+        cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema=DATABASE() AND table_name=%s AND index_name=%s;
+            """,
+            (table, index),
+        )
+        return cursor.fetchone()[0] > 0
+
+    def explain(
+        self, cursor, query: str, values: Tuple[Any, ...]
+    ) -> Dict[str, Optional[str]]:
+        cursor.execute(f"EXPLAIN {query}", values)
+        rows = cursor.fetchall()
+        columns = [column[0] for column in cursor.description]
+
+        table = columns.index("table")
+        key = columns.index("key")
+
+        return {row[table]: row[key] for row in rows}
+
+
+_PLACEHOLDER = re.compile(r"%s")
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE)
+_PLAN_STEP = re.compile(
+    r"^(?:SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS \w+)?"
+    r"(?: USING (?:COVERING )?INDEX (\w+))?"
+)
+
+
+def _translate(query: str) -> str:
+    query = _INSERT_IGNORE.sub("INSERT OR IGNORE", query)
+    return _PLACEHOLDER.sub("?", query)
+
+
+def _integrity_error(error: sqlite3.IntegrityError) -> mysql.connector.IntegrityError:
+    message = str(error)
+    if message.startswith("UNIQUE"):
+        code = errorcode.ER_DUP_ENTRY
+    elif message.startswith("NOT NULL"):
+        code = errorcode.ER_BAD_NULL_ERROR
+    elif message.startswith("FOREIGN KEY"):
+        code = errorcode.ER_NO_REFERENCED_ROW_2
+    else:
+        code = errorcode.ER_CHECK_CONSTRAINT_VIOLATED
+
+    return mysql.connector.IntegrityError(msg=message, errno=code)
+
+
+def _locked(error: sqlite3.OperationalError) -> bool:
+    # Another connection held the write lock for longer than busy_timeout
+    return str(error).startswith(("database is locked", "database table is locked"))
+
+
+def _lock_wait_timeout(
+    error: sqlite3.OperationalError,
+) -> mysql.connector.DatabaseError:
+    return mysql.connector.DatabaseError(
+        msg=str(error), errno=errorcode.ER_LOCK_WAIT_TIMEOUT
+    )
+
+
+class SQLiteCursor(sqlite3.Cursor):
+    """
+    Accepts the MySQL flavoured queries used throughout `utils.database`.
+    """
+
+    def execute(self, query, values=()):
+        try:
+            return super().execute(_translate(query), values)
+        except sqlite3.IntegrityError as error:
+            raise _integrity_error(error) from error
+        except sqlite3.OperationalError as error:
+            if _locked(error):
+                raise _lock_wait_timeout(error) from error
+            raise
+
+    def executemany(self, query, values):
+        try:
+            return super().executemany(_translate(query), values)
+        except sqlite3.IntegrityError as error:
+            raise _integrity_error(error) from error
+        except sqlite3.OperationalError as error:
+            if _locked(error):
+                raise _lock_wait_timeout(error) from error
+            raise
+
+
+class SQLiteConnection(sqlite3.Connection):
+    def cursor(self, factory=SQLiteCursor):
+        return super().cursor(factory)
+
+    def commit(self):
+        try:
+            return super().commit()
+        except sqlite3.OperationalError as error:
+            if _locked(error):
+                raise _lock_wait_timeout(error) from error
+            raise
+
+
+class SQLiteBackend(Backend):
+    """
+    An embedded database in a single file, tuned for a small number of
+    concurrent CGI processes. The schema in `init.sqlite.sql` is applied on
+    connection so a fresh file is immediately usable.
+    """
+
+    name = "sqlite"
+    errors = (mysql.connector.Error, sqlite3.Error)
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL;",
+        "PRAGMA synchronous=NORMAL;",
+        "PRAGMA foreign_keys=ON;",
+        "PRAGMA busy_timeout=5000;",
+        "PRAGMA temp_store=MEMORY;",
+        "PRAGMA cache_size=-8000;",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        self._schema: Optional[str] = None
+
+    def connect(self) -> Any:
+        if self._schema is None:
+            with open(SQLITE_SCHEMA) as schema_file:
+                self._schema = schema_file.read()
+
+        conn = sqlite3.connect(
+            self.path, factory=SQLiteConnection, check_same_thread=False
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        try:
+            conn.executescript(self._schema)
+        except sqlite3.OperationalError as error:
+            # Only the indexes at the end of the schema refer to columns that
+            # older databases are missing until they are migrated
+            if "no such column" not in str(error):
+                conn.close()
+                raise
+
+        return conn
+
+    # sqlite3 already keeps a per-connection cache of compiled statements so
+    # `prepare` is left returning None
+
+    def compact(self, cursor, tables: Tuple[str, ...]) -> None:
+        # The whole file is rebuilt whichever tables changed
+        cursor.execute("VACUUM;")
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+
+    def column_exists(self, cursor, table: str, column: str) -> bool:
+        cursor.execute(f"PRAGMA table_info({table});")
+        return any(row[1] == column for row in cursor.fetchall())
+
+    def index_exists(self, cursor, table: str, index: str) -> bool:
+        cursor.execute(f"PRAGMA index_list({table});")
+        return any(row[1] == index for row in cursor.fetchall())
+
+    def explain(
+        self, cursor, query: str, values: Tuple[Any, ...]
+    ) -> Dict[str, Optional[str]]:
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", values)
+
+        keys = {}
+        for row in cursor.fetchall():
+            match = _PLAN_STEP.match(row[-1])
+            if match:
+                keys[match.group(1)] = match.group(2)
+
+        return keys
+
+
+def get_backend(
+    kind: str,
+    host: str = "localhost",
+    user: Optional[str] = None,
+    password: Optional[str] = None,
+    database: Optional[str] = None,
+    path: Optional[str] = None,
+) -> Backend:
+    """
+    Build the backend named by `kind`, either "mysql" or "sqlite".
+    """
+    if kind == "mysql":
+        return MySQLBackend(host, user, password, database)
+    elif kind == "sqlite":
+        assert path is not None, "Failed to find the database path"
+        return SQLiteBackend(path)
+    else:
+        raise ValueError(f"Unknown database backend {kind}")
@@ -0,0 +1,335 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+from .logger import database_logger as LOGGER
+
+from typing import Any, Optional
+
+
+load_dotenv()
+
+
+# The cache is shared by every process pointing at the same file and is
+# disabled when CACHE_PATH is not set
+CACHE_PATH = os.getenv("CACHE_PATH")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+# Seconds after a write to an issue during which reads of it are not cached,
+# as they may have started before the write or been served by a lagging replica
+CACHE_SETTLE = float(os.getenv("CACHE_SETTLE", "2"))
+# Seconds a wrong passcode is rejected without being verified again
+FAILED_TTL = float(os.getenv("AUTH_FAILED_TTL", "60"))
+
+FAILED_PREFIX = "failed:"
+# Outside of the failures' prefix so that forgetting them keeps it
+FAILED_RESET_KEY = "failed-reset"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at);
+"""
+
+
+class DiskCache:
+    """
+    A size-bounded key-value cache in a single SQLite file, safe to share
+    between concurrent processes.
+
+    Every write is its own transaction so readers never see a partial value.
+    Entries expire after their TTL and the least recently used entries are
+    evicted once the values exceed `max_bytes`. Recency is only recorded
+    once per `touch_after` seconds per entry so that most hits do not write.
+    Errors are logged and treated as misses so that the cache can never fail
+    a request.
+
+    Values are pickled, the file must only be writable by the application.
+
+    Parameters
+    ----------
+    path : str
+        The cache file, created if missing
+    max_bytes : int
+        The total size of the stored values to evict down to
+    touch_after : float
+        Seconds between updates of an entry's last access time
+    """
+
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES, touch_after=1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_after = touch_after
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns
+        -------
+        value
+            The cached value, None if missing or expired
+        """
+        now = time.time()
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, expires_at, accessed_at FROM cache WHERE key=?;",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    return None
+
+                value, expires_at, accessed_at = row
+                if expires_at <= now:
+                    conn.execute(
+                        "DELETE FROM cache WHERE key=? AND expires_at<=?;", (key, now)
+                    )
+                    return None
+
+                if now - accessed_at >= self.touch_after:
+                    conn.execute(
+                        "UPDATE cache SET accessed_at=? WHERE key=?;", (now, key)
+                    )
+            except sqlite3.Error as error:
+                LOGGER.warning(f"Cache read of {key} failed: {error}")
+                return None
+
+        try:
+            return pickle.loads(value)
+        except Exception as error:
+            LOGGER.warning(f"Cache entry {key} is unreadable: {error}")
+            return None
+
+    def put(self, key: str, value: Any, ttl: float = CACHE_TTL) -> None:
+        """
+        Store `value` under `key` for `ttl` seconds, evicting expired and then
+        least recently used entries to stay within `max_bytes`.
+        """
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE;")
+                try:
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO cache
+                        (key, value, size, expires_at, accessed_at)
+                        VALUES (?, ?, ?, ?, ?);
+                        """,
+                        (key, data, len(data), now + ttl, now),
+                    )
+                    self._evict(conn, now)
+                    conn.execute("COMMIT;")
+                except BaseException:
+                    conn.execute("ROLLBACK;")
+                    raise
+            except sqlite3.Error as error:
+                LOGGER.warning(f"Cache write of {key} failed: {error}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cache WHERE expires_at<=?;", (now,))
+
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache;").fetchone()
+        if total <= self.max_bytes:
+            return
+
+        rows = conn.execute("SELECT key, size FROM cache ORDER BY accessed_at;")
+        evict = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evict.append((key,))
+            total -= size
+
+        conn.executemany("DELETE FROM cache WHERE key=?;", evict)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove the entry of `key`, if any.
+        """
+        with self._lock:
+            try:
+                self._connect().execute("DELETE FROM cache WHERE key=?;", (key,))
+            except sqlite3.Error as error:
+                LOGGER.warning(f"Cache invalidation of {key} failed: {error}")
+
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        Remove every entry whose key starts with `prefix`.
+        """
+        # A range on the primary key rather than LIKE, which cannot use it
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+        with self._lock:
+            try:
+                self._connect().execute(
+                    "DELETE FROM cache WHERE key>=? AND key<?;", (prefix, upper)
+                )
+            except sqlite3.Error as error:
+                LOGGER.warning(f"Cache invalidation of {prefix} failed: {error}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM cache;")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+CACHE: Optional[DiskCache] = DiskCache(CACHE_PATH) if CACHE_PATH else None
+
+
+def issue_key(newsletter_id: int, issue: int, *parts: Any) -> str:
+    """
+    The key of a value derived from an issue, invalidated with the issue.
+    """
+    return ":".join(str(part) for part in ("issue", newsletter_id, issue, *parts))
+
+
+def get(key: str) -> Optional[Any]:
+    """
+    Look `key` up in the shared cache, None on a miss or if it is disabled.
+    """
+    return CACHE.get(key) if CACHE is not None else None
+
+
+def put(key: str, value: Any, ttl: float = CACHE_TTL) -> None:
+    """
+    Store `value` in the shared cache, if enabled.
+    """
+    if CACHE is not None:
+        CACHE.put(key, value, ttl)
+
+
+def _written_key(newsletter_id: int, issue: int) -> str:
+    # Outside of the issue's prefix so that invalidating keeps it
+    return f"written:{newsletter_id}:{issue}"
+
+
+def _put_settled(written_key: str, key: str, value: Any, ttl: float) -> None:
+    if CACHE is None:
+        return
+
+    written = CACHE.get(written_key)
+    if written is not None and time.time() - written < CACHE_SETTLE:
+        return
+
+    CACHE.put(key, value, ttl)
+
+
+def put_issue(
+    newsletter_id: int, issue: int, key: str, value: Any, ttl: float = CACHE_TTL
+) -> None:
+    """
+    Store a value derived from an issue in the shared cache, if enabled,
+    unless the issue was written to in the last `CACHE_SETTLE` seconds.
+    """
+    _put_settled(_written_key(newsletter_id, issue), key, value, ttl)
+
+
+def invalidate_issue(newsletter_id: int, issue: int) -> None:
+    """
+    Drop everything cached about an issue once a write to it has been
+    committed, and hold off caching it again until the write has settled.
+    """
+    if CACHE is not None:
+        CACHE.delete_prefix(issue_key(newsletter_id, issue) + ":")
+        CACHE.put(_written_key(newsletter_id, issue), time.time(), CACHE_SETTLE)
+
+
+def _config_written_key(newsletter_id: int) -> str:
+    return f"written:config:{newsletter_id}"
+
+
+def config_key(newsletter_id: int) -> str:
+    """
+    The key of the config of a newsletter, invalidated when it changes.
+    """
+    return f"config:{newsletter_id}"
+
+
+def put_config(newsletter_id: int, value: Any, ttl: float = CACHE_TTL) -> None:
+    """
+    Store the config of a newsletter in the shared cache, if enabled, unless
+    it was changed in the last `CACHE_SETTLE` seconds.
+    """
+    _put_settled(
+        _config_written_key(newsletter_id), config_key(newsletter_id), value, ttl
+    )
+
+
+def invalidate_config(newsletter_id: int) -> None:
+    """
+    Drop the cached config of a newsletter once a change to it has been
+    committed, and hold off caching it again until the change has settled.
+    """
+    if CACHE is not None:
+        CACHE.delete(config_key(newsletter_id))
+        CACHE.put(_config_written_key(newsletter_id), time.time(), CACHE_SETTLE)
+
+
+def put_failure(key: str, started: float) -> None:
+    """
+    Remember that a passcode matched no newsletter for `FAILED_TTL` seconds,
+    unless the newsletters changed after checking it `started`.
+
+    Parameters
+    ----------
+    key : str
+        The key of the passcode, starting with `FAILED_PREFIX`
+    started : float
+        When the passcode started being checked
+    """
+    if CACHE is None:
+        return
+
+    reset = CACHE.get(FAILED_RESET_KEY)
+    if reset is not None and reset >= started:
+        return
+
+    CACHE.put(key, True, FAILED_TTL)
+
+
+def forget_failures() -> None:
+    """
+    Drop every remembered wrong passcode once a newsletter or passcode change
+    has been committed, as any of them may now be right.
+    """
+    if CACHE is not None:
+        CACHE.delete_prefix(FAILED_PREFIX)
+        # Outlives any check that was already running
+        CACHE.put(FAILED_RESET_KEY, time.time(), FAILED_TTL)
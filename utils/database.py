@@ -1,22 +1,369 @@
+import functools
+import json
 import os
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from itertools import chain
 from dotenv import load_dotenv
 
 import mysql.connector
-from mysql.connector.abstracts import MySQLConnectionAbstract, MySQLCursorAbstract
+from mysql.connector.abstracts import MySQLCursorAbstract
 from mysql.connector.locales import errorcode
-from mysql.connector.pooling import PooledMySQLConnection
 
-from .type_hints import Response
-from typing import Any, List, Optional, Tuple, Union
+from . import cache
+from .backends import Backend, get_backend
+from .logger import database_logger as LOGGER
+from .pool import ConnectionPool, PooledConnection, PoolTimeout
+from .type_hints import IssueSummary, NewsletterConfig, Response
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 
 load_dotenv()
 
 
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PATH = os.getenv("DB_PATH")
 USER = os.getenv("USER")
 DB_PASS = os.getenv("DB_PASS")
 DATABASE = os.getenv("DATABASE")
 
+BACKEND: Backend = get_backend(
+    DB_BACKEND,
+    host=DB_HOST,
+    user=USER,
+    password=DB_PASS,
+    database=DATABASE,
+    path=DB_PATH,
+)
+
+# Read-only queries go to the replica when one is configured
+DB_REPLICA_HOST = os.getenv("DB_REPLICA_HOST")
+DB_REPLICA_PATH = os.getenv("DB_REPLICA_PATH")
+
+REPLICA: Optional[Backend] = None
+if DB_REPLICA_HOST or DB_REPLICA_PATH:
+    REPLICA = get_backend(
+        DB_BACKEND,
+        host=DB_REPLICA_HOST or DB_HOST,
+        user=USER,
+        password=DB_PASS,
+        database=DATABASE,
+        path=DB_REPLICA_PATH,
+    )
+
+# Seconds to read from the primary after the replica failed to connect
+REPLICA_RETRY_AFTER = float(os.getenv("DB_REPLICA_RETRY_AFTER", "30"))
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "5"))
+
+_POOL: Optional[ConnectionPool] = None
+_REPLICA_POOL: Optional[ConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+_REPLICA_DOWN_UNTIL = 0.0
+
+# Hot queries are executed as server-side prepared statements, cached per
+# connection. Set DB_PREPARE=0 to always send plain queries.
+PREPARE_STATEMENTS = os.getenv("DB_PREPARE", "1") == "1"
+STATEMENT_CACHE_SIZE = 16
+
+# Rows fetched per round trip by `iter_responses`
+STREAM_BATCH = 100
+
+# Writes that deadlock or time out waiting for a lock are retried this many
+# times, sleeping up to LOCK_BACKOFF * 2^attempt seconds between attempts
+LOCK_RETRIES = int(os.getenv("DB_LOCK_RETRIES", "4"))
+LOCK_BACKOFF = float(os.getenv("DB_LOCK_BACKOFF", "0.05"))
+LOCK_ERRORS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+BUSY_ERROR = "The database is busy, please try again."
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# The hot read queries, kept at module level so that `utils.migrations` can
+# EXPLAIN exactly what is run
+NEWSLETTERS_QUERY = "SELECT id, title, passcode, folder FROM newsletters;"
+
+# The newsletter a passcode's fingerprint belongs to, along with any whose
+# fingerprint has not been recorded yet
+FINGERPRINT_QUERY = """
+SELECT id, title, passcode, folder, fingerprint
+FROM newsletters
+WHERE fingerprint=%s OR fingerprint IS NULL;
+"""
+
+# Everything needed to authenticate, for `utils.registry`
+REGISTRY_QUERY = """
+SELECT id, title, passcode, folder, fingerprint
+FROM newsletters
+ORDER BY id;
+"""
+
+VERSION_QUERY = "SELECT version FROM newsletters_version WHERE id=1;"
+
+CONFIG_QUERY = """
+SELECT name, email, folder, link, issue, default_questions
+FROM newsletters
+WHERE id=%s;
+"""
+
+QUESTIONS_QUERY = """
+SELECT id, base, creator, text, type
+FROM questions
+WHERE newsletter_id=%s AND issue=%s
+ORDER BY base, id;
+"""
+
+# One round trip regardless of the number of questions, unanswered
+# questions still appear thanks to the LEFT JOIN
+RESPONSES_QUERY = """
+SELECT questions.id, questions.base, questions.creator, questions.text,
+    answers.name, answers.text, answers.img_path
+FROM questions
+LEFT JOIN answers ON answers.question_id=questions.id
+WHERE questions.newsletter_id=%s AND questions.issue=%s
+ORDER BY questions.base, questions.id, answers.id;
+"""
+
+ARCHIVE_QUERY = """
+SELECT data FROM archived_issues WHERE newsletter_id=%s AND issue=%s;
+"""
+
+ISSUE_QUERY = """
+SELECT newsletter_id, issue, question_count, answer_count, respondent_count,
+    last_answer_at
+FROM issues
+WHERE newsletter_id=%s AND issue=%s;
+"""
+
+# Recompute the summaries of the issues in the hot tables, of one newsletter
+# or all of them when given NULL, keeping the last answer times. Archived
+# issues keep their summaries as they were when archived.
+REBUILD_ISSUES_STATEMENTS = (
+    """
+    DELETE FROM issue_respondents WHERE (newsletter_id, issue) IN (
+        SELECT newsletter_id, issue FROM questions
+        WHERE (%s IS NULL OR newsletter_id=%s)
+    );
+    """,
+    """
+    INSERT INTO issue_respondents (newsletter_id, issue, name)
+    SELECT DISTINCT questions.newsletter_id, questions.issue, answers.name
+    FROM answers
+    JOIN questions ON questions.id=answers.question_id
+    WHERE (%s IS NULL OR questions.newsletter_id=%s);
+    """,
+    """
+    INSERT IGNORE INTO issues (newsletter_id, issue)
+    SELECT DISTINCT newsletter_id, issue FROM questions
+    WHERE (%s IS NULL OR newsletter_id=%s);
+    """,
+    """
+    UPDATE issues SET
+        question_count=(
+            SELECT COUNT(*) FROM questions
+            WHERE questions.newsletter_id=issues.newsletter_id
+                AND questions.issue=issues.issue
+        ),
+        answer_count=(
+            SELECT COUNT(*) FROM answers
+            JOIN questions ON questions.id=answers.question_id
+            WHERE questions.newsletter_id=issues.newsletter_id
+                AND questions.issue=issues.issue
+        ),
+        respondent_count=(
+            SELECT COUNT(*) FROM issue_respondents
+            WHERE issue_respondents.newsletter_id=issues.newsletter_id
+                AND issue_respondents.issue=issues.issue
+        )
+    WHERE (%s IS NULL OR newsletter_id=%s) AND EXISTS (
+        SELECT 1 FROM questions
+        WHERE questions.newsletter_id=issues.newsletter_id
+            AND questions.issue=issues.issue
+    );
+    """,
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised by `query_budget` when a block makes more queries than allowed.
+    """
+
+
+class QueryStats:
+    """
+    The queries made inside a `track_queries` block.
+    Every query is also counted by the enclosing block, if any.
+    """
+
+    def __init__(self, name: str, parent: Optional["QueryStats"] = None):
+        self.name = name
+        self.parent = parent
+
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_caller = ""
+        self.slowest_statement = ""
+        self.callers: Dict[str, int] = {}
+
+        self._lock = threading.Lock()
+
+    def record(self, caller: str, statement: str, elapsed: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += elapsed
+            self.callers[caller] = self.callers.get(caller, 0) + 1
+
+            if elapsed >= self.slowest:
+                self.slowest = elapsed
+                self.slowest_caller = caller
+                self.slowest_statement = " ".join(statement.split())
+
+        if self.parent is not None:
+            self.parent.record(caller, statement, elapsed)
+
+    def __str__(self) -> str:
+        summary = f"{self.count} queries in {self.total * 1000:.1f}ms {self.callers}"
+        if self.count:
+            summary += (
+                f", slowest {self.slowest * 1000:.1f}ms in {self.slowest_caller}: "
+                f"{self.slowest_statement}"
+            )
+        return summary
+
+
+_QUERY_STATS: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+class RequestState:
+    """
+    What a `request_scope` block has done so far. Shared by every copy of
+    the context, such as those used to run queries on the async executor.
+    """
+
+    def __init__(self):
+        self.wrote = False
+
+
+_REQUEST: ContextVar[Optional[RequestState]] = ContextVar("request", default=None)
+
+
+class InstrumentedCursor:
+    """
+    A cursor proxy that times every statement it executes into a `QueryStats`.
+    """
+
+    def __init__(self, cursor: Any, caller: str, stats: QueryStats):
+        self._cursor = cursor
+        self.caller = caller
+        self.stats = stats
+
+    def wrap(self, cursor: Any) -> "InstrumentedCursor":
+        """
+        Instrument another cursor on behalf of the same caller.
+        """
+        return InstrumentedCursor(cursor, self.caller, self.stats)
+
+    def execute(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(query, *args, **kwargs)
+        finally:
+            self.stats.record(self.caller, query, time.perf_counter() - start)
+
+    def executemany(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, *args, **kwargs)
+        finally:
+            self.stats.record(self.caller, query, time.perf_counter() - start)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+@contextmanager
+def track_queries(name: str) -> Iterator[QueryStats]:
+    """
+    Record the count, total time and slowest statement of every query made in
+    the block, tagged by the function that made it. The summary is logged
+    when the block exits. Can also be used as a decorator.
+
+    Parameters
+    ----------
+    name : str
+        The label to log the summary under, e.g. the endpoint being served
+    """
+    stats = QueryStats(name, _QUERY_STATS.get())
+    token = _QUERY_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _QUERY_STATS.reset(token)
+        LOGGER.info(f"{name}: {stats}")
+
+
+@contextmanager
+def query_budget(limit: int, name: str = "budget") -> Iterator[QueryStats]:
+    """
+    Fail if the block makes more than `limit` queries.
+
+    Raises
+    ------
+    QueryBudgetExceeded
+        If the budget was exceeded
+    """
+    with track_queries(name) as stats:
+        yield stats
+
+    if stats.count > limit:
+        raise QueryBudgetExceeded(
+            f"{name} made {stats.count} queries, over its budget of {limit}: "
+            f"{stats.callers}"
+        )
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestState]:
+    """
+    Treat the block as a single request. Once it has written to the primary
+    its later reads are sent to the primary too, so that it reads its own
+    writes despite replication lag. Nested blocks join the outer request.
+    Can also be used as a decorator.
+    """
+    state = _REQUEST.get()
+    if state is not None:
+        yield state
+        return
+
+    state = RequestState()
+    token = _REQUEST.set(state)
+    try:
+        yield state
+    finally:
+        _REQUEST.reset(token)
+
 
 def _process_insert_errors(code: int) -> str:
     if code == errorcode.ER_DUP_ENTRY:
@@ -29,12 +376,156 @@ def _process_insert_errors(code: int) -> str:
         return f"Unprocessed database error {code}."
 
 
-def _get_connection() -> Tuple[
-    Union[PooledMySQLConnection, MySQLConnectionAbstract],
-    Union[MySQLCursorAbstract, Any],
-]:
+def _retry_on_lock(func: F) -> F:
+    """
+    Decorate a write so that the whole transaction is retried with jittered
+    exponential backoff when it deadlocks or times out waiting for a lock,
+    returning `(False, BUSY_ERROR)` once the retries are exhausted. The
+    connection is returned to the pool, and so rolled back, between attempts.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        for attempt in range(LOCK_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except mysql.connector.Error as error:
+                if error.errno not in LOCK_ERRORS:
+                    raise
+
+                if attempt == LOCK_RETRIES:
+                    LOGGER.error(f"{func.__name__} gave up after {attempt} retries")
+                    return False, BUSY_ERROR
+
+                delay = random.uniform(0, LOCK_BACKOFF * 2**attempt)
+                LOGGER.warning(
+                    f"{func.__name__} hit lock error {error.errno}, "
+                    f"retrying in {delay * 1000:.0f}ms"
+                )
+                time.sleep(delay)
+
+    return wrapper  # type: ignore
+
+
+def _connect() -> Any:
+    """
+    Open a new connection to the newsletter database.
+
+    Returns
+    -------
+    conn
+        A fresh connection with autocommit disabled
+    """
+    return BACKEND.connect()
+
+
+def _get_pool() -> ConnectionPool:
+    """
+    Get the process-wide connection pool, creating it on first use.
+    """
+    global _POOL
+
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ConnectionPool(
+                    _connect,
+                    size=POOL_SIZE,
+                    timeout=POOL_TIMEOUT,
+                    is_alive=BACKEND.is_alive,
+                    reset=BACKEND.reset,
+                    ping_after=POOL_PING_AFTER,
+                    errors=BACKEND.errors,
+                )
+
+    return _POOL
+
+
+def _get_replica_pool() -> ConnectionPool:
+    """
+    Get the process-wide connection pool to the replica, creating it on first
+    use. Only valid when a replica is configured.
+    """
+    global _REPLICA_POOL
+
+    assert REPLICA is not None, "No replica configured"
+
+    if _REPLICA_POOL is None:
+        with _POOL_LOCK:
+            if _REPLICA_POOL is None:
+                _REPLICA_POOL = ConnectionPool(
+                    REPLICA.connect,
+                    size=POOL_SIZE,
+                    timeout=POOL_TIMEOUT,
+                    is_alive=REPLICA.is_alive,
+                    reset=REPLICA.reset,
+                    ping_after=POOL_PING_AFTER,
+                    errors=REPLICA.errors,
+                )
+
+    return _REPLICA_POOL
+
+
+def pool_stats(replica: bool = False) -> Dict[str, int]:
+    """
+    Parameters
+    ----------
+    replica : bool
+        Report on the replica pool rather than the primary one
+
+    Returns
+    -------
+    stats : dict
+        The hit/miss/wait counters and occupancy of the connection pool
+    """
+    return (_get_replica_pool() if replica else _get_pool()).stats()
+
+
+def _acquire_replica() -> Optional[PooledConnection]:
+    """
+    Check out a replica connection for a read-only query.
+
+    Returns
+    -------
+    conn : PooledConnection, optional
+        None if reads should go to the primary, because there is no replica,
+        the request has written, or the replica is busy or unavailable
+    """
+    global _REPLICA_DOWN_UNTIL
+
+    if REPLICA is None or time.monotonic() < _REPLICA_DOWN_UNTIL:
+        return None
+
+    state = _REQUEST.get()
+    if state is not None and state.wrote:
+        return None
+
+    try:
+        # Without waiting, a busy replica is no reason to hold up the read
+        return _get_replica_pool().acquire(timeout=0)
+    except PoolTimeout:
+        LOGGER.debug("Replica pool exhausted, reading from the primary")
+        return None
+    except REPLICA.errors as error:
+        LOGGER.warning(f"Replica unavailable, reading from the primary: {error}")
+        _REPLICA_DOWN_UNTIL = time.monotonic() + REPLICA_RETRY_AFTER
+        return None
+
+
+def _get_connection(
+    caller: str = "",
+    readonly: bool = False,
+) -> Tuple[PooledConnection, Union[MySQLCursorAbstract, Any]]:
     """
     Get a connection and cursor to the newsletter database.
+    Closing the connection returns it to the pool rather than disconnecting.
+
+    Parameters
+    ----------
+    caller : str
+        The function making the queries, used to tag them when tracked
+    readonly : bool
+        Whether only reads are made, which may then be served by the replica
 
     Returns
     -------
@@ -43,22 +534,150 @@ def _get_connection() -> Tuple[
     cursor
         The cursor in the database
     """
-    assert USER is not None, "Failed to find database config"
-    assert DB_PASS is not None, "Failed to find database config"
-    assert DATABASE is not None, "Failed to find the database config"
+    conn = _acquire_replica() if readonly else None
 
-    conn = mysql.connector.connect(
-        host="localhost",
-        user=USER,
-        password=DB_PASS,
-        database=DATABASE,
-    )
-    conn.autocommit = False
-    cursor = conn.cursor()
+    if conn is None:
+        if not readonly:
+            state = _REQUEST.get()
+            if state is not None:
+                state.wrote = True
+
+        try:
+            conn = _get_pool().acquire()
+        except PoolTimeout:
+            LOGGER.warning(f"Connection pool exhausted: {pool_stats()}")
+            raise
+
+    try:
+        cursor = conn.cursor()
+    except BaseException:
+        conn.close()
+        raise
+
+    stats = _QUERY_STATS.get()
+    if stats is not None:
+        cursor = InstrumentedCursor(cursor, caller, stats)
 
     return conn, cursor
 
 
+def _statement_cache(conn: Any) -> Optional["OrderedDict[str, Any]"]:
+    """
+    Get the prepared statements cached on a pooled connection, None if
+    statements cannot be prepared on it.
+    """
+    if not PREPARE_STATEMENTS or not isinstance(conn, PooledConnection):
+        return None
+
+    state = conn.state
+    if "statements" not in state:
+        state["statements"] = OrderedDict()
+
+    return state["statements"]
+
+
+def _execute_prepared(conn: Any, cursor: Any, query: str, values: tuple) -> Any:
+    """
+    Execute a hot query through the connection's prepared statement cache.
+    Falls back to the plain cursor if the backend or server cannot prepare it.
+
+    Returns
+    -------
+    cursor
+        The cursor holding the results
+    """
+    statements = _statement_cache(conn)
+    if statements is None:
+        cursor.execute(query, values)
+        return cursor
+
+    prepared = statements.pop(query, None)
+    if prepared is None:
+        prepared = BACKEND.prepare(conn.raw)
+
+        if prepared is None:
+            conn.state["statements"] = None
+            cursor.execute(query, values)
+            return cursor
+
+    runner = prepared
+    if isinstance(cursor, InstrumentedCursor):
+        runner = cursor.wrap(prepared)
+
+    try:
+        runner.execute(query, values)
+    except mysql.connector.DatabaseError as error:
+        prepared.close()
+        if error.errno != errorcode.ER_UNSUPPORTED_PS:
+            raise
+
+        LOGGER.info("Server cannot prepare statements, sending them plainly")
+        conn.state["statements"] = None
+        cursor.execute(query, values)
+        return cursor
+
+    # Most recently used last, evicting the least recently used
+    statements[query] = prepared
+    if len(statements) > STATEMENT_CACHE_SIZE:
+        _, evicted = statements.popitem(last=False)
+        evicted.close()
+
+    return runner
+
+
+def _count_questions(cursor, newsletter_id: int, issue: int, count: int) -> None:
+    """
+    Add newly inserted questions to their issue summary, creating the summary
+    with the first question of the issue.
+    """
+    query = """
+    UPDATE issues SET question_count=question_count+%s
+    WHERE newsletter_id=%s AND issue=%s;
+    """
+    cursor.execute(query, (count, newsletter_id, issue))
+    if cursor.rowcount != 0:
+        return
+
+    cursor.execute(
+        """
+        INSERT IGNORE INTO issues (newsletter_id, issue, question_count)
+        VALUES (%s, %s, %s);
+        """,
+        (newsletter_id, issue, count),
+    )
+    if cursor.rowcount == 0:
+        # Another transaction created the summary first
+        cursor.execute(query, (count, newsletter_id, issue))
+
+
+def _count_answers(cursor, name: str, question_id: int, count: int) -> None:
+    """
+    Add newly inserted answers to the summary of the issue `question_id`
+    belongs to. The summary already exists as the question does.
+    """
+    cursor.execute(
+        """
+        INSERT IGNORE INTO issue_respondents (newsletter_id, issue, name)
+        SELECT newsletter_id, issue, %s FROM questions WHERE id=%s;
+        """,
+        (name, question_id),
+    )
+    respondents = cursor.rowcount
+
+    cursor.execute(
+        """
+        UPDATE issues SET
+            answer_count=answer_count+%s,
+            respondent_count=respondent_count+%s,
+            last_answer_at=%s
+        WHERE (newsletter_id, issue)=(
+            SELECT newsletter_id, issue FROM questions WHERE id=%s
+        );
+        """,
+        (count, respondents, datetime.now(), question_id),
+    )
+
+
 def get_newsletters() -> list:
     """
     Get all the current newsletters.
@@ -68,12 +687,11 @@ def get_newsletters() -> list:
     Results : list
         A list of tuples (id, title, pass_hash) for each newsletter.
     """
-    conn, cursor = _get_connection()
+    conn, cursor = _get_connection("get_newsletters", readonly=True)
 
-    query = "SELECT * FROM newsletters;"
     result = []
     try:
-        cursor.execute(query)
+        cursor.execute(NEWSLETTERS_QUERY)
         result = cursor.fetchall()
     finally:
         cursor.close()
@@ -82,6 +700,207 @@ def get_newsletters() -> list:
     return result
 
 
+def _bump_newsletters_version(cursor) -> None:
+    # In the same transaction as the change so no process misses it
+    cursor.execute("UPDATE newsletters_version SET version=version+1 WHERE id=1;")
+    if cursor.rowcount == 0:
+        # Embedded databases are not seeded, a missing version reads as 0
+        cursor.execute(
+            "INSERT IGNORE INTO newsletters_version (id, version) VALUES (1, 1);"
+        )
+
+
+def get_newsletters_version() -> int:
+    """
+    Get the version of the newsletters, which changes whenever one is
+    created or its title, passcode or fingerprint changes.
+
+    Returns
+    -------
+    version : int
+        The current version
+    """
+    conn, cursor = _get_connection("get_newsletters_version", readonly=True)
+
+    try:
+        cursor.execute(VERSION_QUERY)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return rows[0][0] if rows else 0
+
+
+def get_registry() -> Tuple[int, list]:
+    """
+    Get every newsletter with what is needed to authenticate it, along with
+    the version of the newsletters they are as of.
+
+    Returns
+    -------
+    version : int
+        The version, read before the newsletters so a change in between is
+        picked up by the next version check
+    Results : list
+        A list of tuples (id, title, pass_hash, folder, fingerprint)
+    """
+    conn, cursor = _get_connection("get_registry", readonly=True)
+
+    try:
+        cursor.execute(VERSION_QUERY)
+        rows = cursor.fetchall()
+        version = rows[0][0] if rows else 0
+
+        cursor.execute(REGISTRY_QUERY)
+        newsletters = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return version, newsletters
+
+
+def get_newsletter_candidates(fingerprint: bytes) -> list:
+    """
+    Get the newsletters a passcode could belong to with a single index lookup,
+    those with a matching fingerprint first and then those yet to be
+    fingerprinted.
+
+    Parameters
+    ----------
+    fingerprint : bytes
+        The fingerprint of the passcode
+
+    Returns
+    -------
+    Results : list
+        A list of tuples (id, title, pass_hash, folder, fingerprint)
+    """
+    conn, cursor = _get_connection("get_newsletter_candidates", readonly=True)
+
+    try:
+        cursor.execute(FINGERPRINT_QUERY, (fingerprint,))
+        result = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    # Stable, so the matching newsletters keep their order
+    return sorted(result, key=lambda row: row[4] is None)
+
+
+@_retry_on_lock
+def set_fingerprint(
+    newsletter_id: int, fingerprint: bytes
+) -> Tuple[bool, Optional[str]]:
+    """
+    Record the fingerprint of a newsletter's passcode, unless one already has
+    been, so that later logins find it directly.
+
+    Returns
+    -------
+    success : bool
+        Whether the fingerprint was recorded
+    error : str, optional
+        The error message if not
+    """
+    conn, cursor = _get_connection("set_fingerprint")
+
+    try:
+        cursor.execute(
+            """
+            UPDATE newsletters SET fingerprint=%s
+            WHERE id=%s AND fingerprint IS NULL;
+            """,
+            (fingerprint, newsletter_id),
+        )
+        if cursor.rowcount == 1:
+            _bump_newsletters_version(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return True, None
+
+
+@_retry_on_lock
+def set_passcode(
+    newsletter_id: int, old_hash: bytes, pass_hash: bytes
+) -> Tuple[bool, Optional[str]]:
+    """
+    Replace the passcode hash of a newsletter, unless it has changed since
+    `old_hash` was read.
+
+    Returns
+    -------
+    success : bool
+        Whether the hash was replaced
+    error : str, optional
+        The error message if not
+    """
+    conn, cursor = _get_connection("set_passcode")
+
+    try:
+        cursor.execute(
+            "UPDATE newsletters SET passcode=%s WHERE id=%s AND passcode=%s;",
+            (pass_hash, newsletter_id, old_hash),
+        )
+        if cursor.rowcount != 1:
+            conn.rollback()
+            return False, "The passcode has changed"
+
+        _bump_newsletters_version(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    cache.forget_failures()
+    return True, None
+
+
+def get_config(newsletter_id: int) -> Optional[NewsletterConfig]:
+    """
+    Get the configuration and current issue of a newsletter with a single
+    primary key lookup.
+
+    Returns
+    -------
+    config : NewsletterConfig, optional
+        The configuration, None if the newsletter does not exist or its
+        configuration has not been migrated into the database yet
+    """
+    cached = cache.get(cache.config_key(newsletter_id))
+    if cached is not None:
+        return cached
+
+    conn, cursor = _get_connection("get_config", readonly=True)
+
+    try:
+        cursor.execute(CONFIG_QUERY, (newsletter_id,))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    if not rows or rows[0][0] is None:
+        return None
+
+    name, email, folder, link, issue, defaults = rows[0]
+    config = NewsletterConfig(
+        name=name,
+        email=email,
+        folder=folder,
+        link=link,
+        issue=issue,
+        defaults=[tuple(default) for default in json.loads(defaults or "[]")],
+    )
+    cache.put_config(newsletter_id, config)
+    return config
+
+
 def get_questions(newsletter_id: int, issue: int) -> Tuple[list, list]:
     """
     Get the questions for the specified newsletter and issue.
@@ -101,100 +920,199 @@ def get_questions(newsletter_id: int, issue: int) -> Tuple[list, list]:
     submitted : list[q_id, creator, text]
         The list of questions created for that newsletter and issue.
     """
-    conn, cursor = _get_connection()
+    key = cache.issue_key(newsletter_id, issue, "questions")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    conn, cursor = _get_connection("get_questions", readonly=True)
 
-    default_query = """
-    SELECT id, text, type
-    FROM questions
-    WHERE newsletter_id=%s AND issue=%s AND base;
-    """
-    user_query = """
-    SELECT id, creator, text
-    FROM questions
-    WHERE newsletter_id=%s AND issue=%s AND NOT base;
-    """
     values = (newsletter_id, issue)
 
-    default = []
-    submitted = []
+    rows = []
     try:
-        cursor.execute(user_query, values)
-        submitted = cursor.fetchall()
-
-        cursor.execute(default_query, values)
-        default = cursor.fetchall()
+        rows = _execute_prepared(conn, cursor, QUESTIONS_QUERY, values).fetchall()
     finally:
         cursor.close()
         conn.close()
 
+    default = []
+    submitted = []
+    for q_id, base, creator, text, form in rows:
+        if base:
+            default.append((q_id, text, form))
+        else:
+            submitted.append((q_id, creator, text))
+
+    cache.put_issue(newsletter_id, issue, key, (default, submitted))
+
     return default, submitted
 
 
-def get_responses(newsletter_id: int, issue: int) -> List[Response]:
+def _group_responses(rows: Iterable[tuple]) -> Iterator[Response]:
+    """
+    Group RESPONSES_QUERY rows into one entry per question, yielding each
+    question as soon as all of its rows have been seen.
+    """
+    current_id = None
+    current: Optional[Response] = None
+
+    for q_id, base, creator, question, name, text, img_path in rows:
+        assert isinstance(q_id, int), (
+            "Question id not integer"
+        )  # This should be guaranteed
+
+        if q_id != current_id:
+            if current is not None:
+                yield current
+
+            current_id = q_id
+            current = ("" if base else creator, question, [])
+
+        if name is not None:
+            current[2].append((name, text, img_path))
+
+    if current is not None:
+        yield current
+
+
+def _pack_archive(questions: List[tuple], answers: List[tuple]) -> bytes:
+    """
+    Serialise and compress every row of an issue for `archived_issues`.
+
+    Parameters
+    ----------
+    questions : list[id, base, type, creator, text]
+        The questions of the issue in `RESPONSES_QUERY` order
+    answers : list[id, question_id, name, text, img_path]
+        The answers to those questions in id order
+    """
+    data = {"questions": questions, "answers": answers}
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode(), 9)
+
+
+def _load_archive(data: bytes) -> Tuple[List[list], List[list]]:
     """
     Returns
     -------
-    results : list[creator, question, list[name, text, path]]
-        The questions and their responses
+    questions : list[id, base, type, creator, text]
+        The questions stored by `_pack_archive`
+    answers : list[id, question_id, name, text, img_path]
+        The answers stored by `_pack_archive`
     """
-    conn, cursor = _get_connection()
+    archive = json.loads(zlib.decompress(data))
+    return archive["questions"], archive["answers"]
 
-    results = []
 
-    user_q_id_query = """
-    SELECT id, creator, text FROM questions
-    WHERE newsletter_id=%s AND issue=%s AND NOT base;
+def _unpack_archive(data: bytes) -> Iterator[tuple]:
     """
+    Rebuild the `RESPONSES_QUERY` rows of an archived issue.
+    """
+    questions, archived_answers = _load_archive(data)
+
+    answers: Dict[int, List[tuple]] = {}
+    for _, q_id, name, text, img_path in archived_answers:
+        answers.setdefault(q_id, []).append((name, text, img_path))
+
+    for q_id, base, _, creator, question in questions:
+        for name, text, img_path in answers.get(q_id, [(None, None, None)]):
+            yield q_id, base, creator, question, name, text, img_path
 
-    default_q_id_query = """
-    SELECT id, text FROM questions
-    WHERE newsletter_id=%s AND issue=%s AND base;
+
+def _archived_rows(cursor, newsletter_id: int, issue: int) -> Iterator[tuple]:
+    """
+    The `RESPONSES_QUERY` rows of an issue that has been archived, none if
+    it has not.
     """
+    cursor.execute(ARCHIVE_QUERY, (newsletter_id, issue))
+    row = cursor.fetchone()
+    if row is None:
+        return iter(())
 
-    response_query = """
-    SELECT name, text, img_path
-    FROM answers
-    WHERE answers.question_id=%s
+    return _unpack_archive(row[0])
+
+
+def get_responses(newsletter_id: int, issue: int) -> List[Response]:
+    """
+    Get every question for an issue together with its answers.
+    User submitted questions come first followed by the default questions.
+    Archived issues are read from their archive.
+
+    Returns
+    -------
+    results : list[creator, question, list[name, text, path]]
+        The questions and their responses
     """
+    key = cache.issue_key(newsletter_id, issue, "responses")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    conn, cursor = _get_connection("get_responses", readonly=True)
 
     try:
-        cursor.execute(user_q_id_query, (newsletter_id, issue))
-        user_questions = cursor.fetchall()
+        rows = _execute_prepared(
+            conn, cursor, RESPONSES_QUERY, (newsletter_id, issue)
+        ).fetchall()
 
-        cursor.execute(default_q_id_query, (newsletter_id, issue))
-        default_questions = cursor.fetchall()
+        # Only issues without any questions pay for the archive lookup
+        if not rows:
+            rows = list(_archived_rows(cursor, newsletter_id, issue))
+    finally:
+        cursor.close()
+        conn.close()
 
-        for question in user_questions:
-            q_id, creator, question = question
-            assert isinstance(q_id, int), (
-                "Question id not integer"
-            )  # This should be guaranteed
+    responses = list(_group_responses(rows))
+    cache.put_issue(newsletter_id, issue, key, responses)
 
-            cursor.execute(response_query, (q_id,))
-            responses = cursor.fetchall()
+    return responses
 
-            results.append((creator, question, responses))
 
-        for question in default_questions:
-            q_id, question = question
-            assert isinstance(q_id, int), (
-                "Question id not integer"
-            )  # This should be guaranteed
+def iter_responses(newsletter_id: int, issue: int) -> Iterator[Response]:
+    """
+    Stream the questions of an issue one at a time with their answers.
+    The same as `get_responses` but rows are read from an unbuffered cursor in
+    batches of `STREAM_BATCH`, so only the question being yielded is held in
+    memory. The connection is held until the iterator is exhausted or closed.
+    Archived issues are read from their archive in one go.
+
+    Yields
+    ------
+    response : (creator, question, list[name, text, path])
+        Each question and its responses in `get_responses` order
+    """
+    conn, cursor = _get_connection("iter_responses", readonly=True)
 
-            cursor.execute(response_query, (q_id,))
-            responses = cursor.fetchall()
+    def rows() -> Iterator[tuple]:
+        while True:
+            batch = cursor.fetchmany(STREAM_BATCH)
+            if not batch:
+                return
+            yield from batch
 
-            results.append(("", question, responses))
+    try:
+        cursor.execute(RESPONSES_QUERY, (newsletter_id, issue))
+
+        first = cursor.fetchmany(STREAM_BATCH)
+        if first:
+            yield from _group_responses(chain(first, rows()))
+        else:
+            yield from _group_responses(_archived_rows(cursor, newsletter_id, issue))
+    except GeneratorExit:
+        # An abandoned unbuffered result must be read before the cursor closes
+        for _ in rows():
+            pass
+        raise
     finally:
         cursor.close()
         conn.close()
 
-    return results
-
 
+@_retry_on_lock
 def insert_answer(name: str, responses: dict) -> Tuple[bool, str]:
     """
-    Insert the answers for a specific user.
+    Insert the answers for a specific user and add them to the issue summary.
+    Every answer in a submission belongs to the same issue.
 
     Parameters
     ----------
@@ -203,29 +1121,40 @@ def insert_answer(name: str, responses: dict) -> Tuple[bool, str]:
     responses : dict[question_id, (img, answer)]
         A dictionary of responses
     """
-    conn, cursor = _get_connection()
+    conn, cursor = _get_connection("insert_answer")
+
+    # Skip duplicate entries
+    # This is unsafe but avoids unauthorised data overwrite
+    # It does not prevent malicious lock-out
+    query = """
+    INSERT IGNORE INTO answers (question_id, name, img_path, text)
+    VALUES (%s, %s, %s, %s);
+    """
+    # ON DUPLICATE KEY UPDATE img_path=%s, text=%s;
+    # Rows are locked in key order so concurrent submissions cannot deadlock
+    values = [
+        (q_id, name, data["img"], data["text"])
+        for q_id, data in sorted(responses.items())
+    ]
 
     success = True
     error_text = ""
+    issue = None
     try:
-        for q_id, data in responses.items():
-            # Skip duplicate entries
-            # This is unsafe but avoids unauthorised data overwrite
-            # It does not prevent malicious lock-out
-            query = """
-            INSERT IGNORE INTO answers (question_id, name, img_path, text)
-            VALUES (%s, %s, %s, %s);
-            """
-            # ON DUPLICATE KEY UPDATE img_path=%s, text=%s;
-            values = (
-                q_id,
-                name,
-                data["img"],
-                data["text"],
-                # data['img'], data['text']
-            )
+        # Sent as a single multi-row INSERT by the connector
+        if values:
+            cursor.executemany(query, values)
 
-            cursor.execute(query, values)
+            # Duplicates were skipped so only count what was inserted
+            if cursor.rowcount > 0:
+                _count_answers(cursor, name, values[0][0], cursor.rowcount)
+
+                if cache.CACHE is not None:
+                    cursor.execute(
+                        "SELECT newsletter_id, issue FROM questions WHERE id=%s;",
+                        (values[0][0],),
+                    )
+                    issue = cursor.fetchone()
 
         conn.commit()
     except mysql.connector.IntegrityError as error:
@@ -236,9 +1165,13 @@ def insert_answer(name: str, responses: dict) -> Tuple[bool, str]:
         cursor.close()
         conn.close()
 
+    if success and issue is not None:
+        cache.invalidate_issue(*issue)
+
     return success, error_text
 
 
+@_retry_on_lock
 def insert_question(
     newsletter_id: int,
     issue: int,
@@ -259,7 +1192,7 @@ def insert_question(
     question : str
         The question to be inserted
     """
-    conn, cursor = _get_connection()
+    conn, cursor = _get_connection("insert_question")
 
     success = True
     error_text = ""
@@ -271,6 +1204,7 @@ def insert_question(
         values = (newsletter_id, name, question, issue)
 
         cursor.execute(query, values)
+        _count_questions(cursor, newsletter_id, issue, 1)
         conn.commit()
     except mysql.connector.IntegrityError as error:
         conn.rollback()
@@ -280,9 +1214,13 @@ def insert_question(
         cursor.close()
         conn.close()
 
+    if success:
+        cache.invalidate_issue(newsletter_id, issue)
+
     return success, error_text
 
 
+@_retry_on_lock
 def insert_default_questions(
     newsletter_id: int, issue: int, questions: List[Tuple[str, str]]
 ) -> Tuple[bool, Optional[str]]:
@@ -300,19 +1238,23 @@ def insert_default_questions(
     form : str
         Whether the question is a text or image question
     """
-    conn, cursor = _get_connection()
+    conn, cursor = _get_connection("insert_default_questions")
 
     success = True
     error_text = None
-    try:
-        query = """
-        INSERT INTO questions (newsletter_id, creator, text, issue, base, type)
-        VALUES (%s, %s, %s, %s, %s, %s);
-        """
+    query = """
+    INSERT INTO questions (newsletter_id, creator, text, issue, base, type)
+    VALUES (%s, %s, %s, %s, %s, %s);
+    """
+    values = [
+        (newsletter_id, "SYS", text, issue, True, form) for text, form in questions
+    ]
 
-        for text, form in questions:
-            values = (newsletter_id, "SYS", text, issue, True, form)
-            cursor.execute(query, values)
+    try:
+        # Sent as a single multi-row INSERT by the connector
+        if values:
+            cursor.executemany(query, values)
+            _count_questions(cursor, newsletter_id, issue, len(values))
 
         conn.commit()
     except mysql.connector.IntegrityError as error:
@@ -323,38 +1265,70 @@ def insert_default_questions(
         cursor.close()
         conn.close()
 
+    if success:
+        cache.invalidate_issue(newsletter_id, issue)
+
     return success, error_text
 
 
+@_retry_on_lock
 def create_newsletter(
-    title: str, pass_hash: bytes, folder: str
+    title: str,
+    pass_hash: bytes,
+    folder: str,
+    email: str = "",
+    link: str = "",
+    defaults: Sequence[Tuple[str, str]] = (),
+    fingerprint: Optional[bytes] = None,
 ) -> Tuple[bool, Optional[str]]:
     """
-    Create a new newsletter entry
+    Create a new newsletter entry, starting at issue 1
 
     Parameters
     ----------
     title : str
-        The title of the newsletter
+        The title of the newsletter, also used as its name in emails
     pass_hash : bytes
         The hash of the newsletter passcode
     folder : str
-        The folder where metadata and config is stored
+        The folder where the mailing list and logs are stored
+    email : str
+        The email requests are sent from
+    link : str
+        The link to the newsletter included in emails
+    defaults : list[(text, type)]
+        The default questions asked in every issue
+    fingerprint : bytes, optional
+        The fingerprint of the passcode, see `utils.html.fingerprint`
 
     Returns
     -------
     success : bool
         Whether the newsletter was created successfully
     """
-    conn, cursor = _get_connection()
+    conn, cursor = _get_connection("create_newsletter")
 
-    query = "INSERT INTO newsletters (title, passcode, folder) VALUES (%s, %s, %s);"
-    values = (title, pass_hash, folder)
+    query = """
+    INSERT INTO newsletters
+    (title, passcode, folder, name, email, link, default_questions, fingerprint)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+    """
+    values = (
+        title,
+        pass_hash,
+        folder,
+        title,
+        email,
+        link,
+        json.dumps([list(default) for default in defaults]),
+        fingerprint,
+    )
 
     success = True
     error_text = None
     try:
         cursor.execute(query, values)
+        _bump_newsletters_version(cursor)
         conn.commit()
     except mysql.connector.IntegrityError:
         conn.rollback()
@@ -364,4 +1338,98 @@ def create_newsletter(
         cursor.close()
         conn.close()
 
+    if success:
+        cache.forget_failures()
+
     return success, error_text
+
+
+@_retry_on_lock
+def increment_issue(newsletter_id: int) -> Tuple[bool, Optional[str]]:
+    """
+    Move a newsletter on to its next issue with a single atomic UPDATE, so
+    concurrent increments are never lost.
+
+    Returns
+    -------
+    success : bool
+        Whether the issue was incremented
+    error : str, optional
+        The error message if not
+    """
+    conn, cursor = _get_connection("increment_issue")
+
+    try:
+        cursor.execute(
+            "UPDATE newsletters SET issue=issue+1 WHERE id=%s;", (newsletter_id,)
+        )
+        if cursor.rowcount != 1:
+            conn.rollback()
+            return False, f"Newsletter {newsletter_id} does not exist"
+
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    cache.invalidate_config(newsletter_id)
+    return True, None
+
+
+def get_issue_summary(newsletter_id: int, issue: int) -> Optional[IssueSummary]:
+    """
+    Get the question, answer and respondent counts of an issue with a single
+    primary key lookup.
+
+    Returns
+    -------
+    summary : IssueSummary, optional
+        The summary, None if the issue has no questions yet
+    """
+    conn, cursor = _get_connection("get_issue_summary", readonly=True)
+
+    try:
+        cursor.execute(ISSUE_QUERY, (newsletter_id, issue))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+    if row is None:
+        return None
+
+    return IssueSummary(*row)
+
+
+def _rebuild_issues(cursor, newsletter_id: Optional[int] = None) -> None:
+    for statement in REBUILD_ISSUES_STATEMENTS:
+        cursor.execute(statement, (newsletter_id, newsletter_id))
+
+
+def rebuild_issue_summaries() -> int:
+    """
+    Recompute every issue summary from the questions and answers, to backfill
+    existing data or repair drift. Answers carry no timestamp so issues
+    first summarised here have no last answer time. Archived issues keep
+    the summary they had when archived.
+
+    Returns
+    -------
+    issues : int
+        The number of issues summarised
+    """
+    conn, cursor = _get_connection("rebuild_issue_summaries")
+
+    try:
+        _rebuild_issues(cursor)
+        cursor.execute("SELECT COUNT(*) FROM issues;")
+        (count,) = cursor.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    return count
@@ -1,4 +1,3 @@
-import os
 import smtplib
 import ssl
 
@@ -6,11 +5,13 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 from utils.html import format_html
+from utils.templates import TEMPLATES
 from utils.type_hints import MailerConfig, ReplaceDict
 
 
 PORT = 465
-DIR = os.path.dirname(__file__)
+
+TEMPLATES.declare("email.html", ["NAME", "ISSUE", "LINK", "TYPE"])
 
 
 def generate_email(config: MailerConfig):
@@ -21,8 +22,6 @@ def generate_email(config: MailerConfig):
     else:
         request = "view"
 
-    email_html = open(os.path.join(DIR, "../templates/email.html")).read()
-
     values: ReplaceDict = {
         "NAME": config.name.title(),
         "ISSUE": str(config.issue),
@@ -30,7 +29,7 @@ def generate_email(config: MailerConfig):
         "TYPE": request,
     }
 
-    return format_html(email_html, values)
+    return format_html(TEMPLATES.get("email.html"), values)
 
 
 def send_email(body: str, config: MailerConfig) -> bool:
@@ -1,82 +1,45 @@
-import os
-import yaml
 import traceback
 import logging
-from dotenv import load_dotenv
 from pydantic import ValidationError
 from datetime import datetime
 
 from typing import Tuple
 
+from . import database
 from .constants import State
 from .type_hints import EmptyConfig, NewsletterConfig
 
 
-load_dotenv()
-
-
-HOME = os.getenv("HOME")
-
-
 def load_config(
-    newsletter_folder: str, logger: logging.Logger
+    newsletter_id: int, logger: logging.Logger
 ) -> Tuple[bool, NewsletterConfig]:
     """
-    Given JWT token parse the relevant config and issue file.
+    Load the config and current issue of a newsletter from the database.
 
     Parameters
     ----------
-    newsletter_folder : str
-        The folder that stores the newsletter config. Requires full path name.
+    newsletter_id : int
+        The id of the newsletter, as found in its token
 
     Returns
     -------
     success : bool
-        Whether the config file was successfully loaded
+        Whether the config was successfully loaded
     config : NewsletterConfig
         The configuration for this newsletter
     """
-    if HOME is None:
-        logger.critical("Failed to find home directory")
-        return False, EmptyConfig
-
-    try:
-        with open(
-            os.path.join(HOME, newsletter_folder, "config.yaml"), "r"
-        ) as config_file:
-            config = yaml.safe_load(config_file)
-    except OSError:
-        logger.warning(f"Failed to load {newsletter_folder}")
-        return False, EmptyConfig
-    except yaml.YAMLError:
-        logger.warning(f"Failed to parse {newsletter_folder}")
-        return False, EmptyConfig
-
     try:
-        with open(os.path.join(HOME, newsletter_folder, "issue"), "r") as issue_file:
-            issue = int(issue_file.read())
-    except OSError:
-        logger.warning(f"Failed to load {newsletter_folder} issue file")
-        return False, EmptyConfig
-    except ValueError:
-        logger.warning(f"Failed to parse {newsletter_folder} issue file")
+        config = database.get_config(newsletter_id)
+    except ValidationError:
+        logger.warning(f"Failed to validate the config of newsletter {newsletter_id}")
         logger.debug(traceback.format_exc())
         return False, EmptyConfig
 
-    try:
-        parsed_config = NewsletterConfig(
-            name=config["name"],
-            email=config["email"],
-            folder=config["folder"],
-            link=config["link"],
-            issue=issue,
-            defaults=config["defaults"],
-        )
-    except ValidationError:
-        logger.warning(f"Failed to validate {newsletter_folder}")
+    if config is None:
+        logger.warning(f"Failed to load the config of newsletter {newsletter_id}")
         return False, EmptyConfig
 
-    return True, parsed_config
+    return True, config
 
 
 def _get_int_state() -> int:
@@ -106,7 +69,7 @@ def get_state() -> State:
         return State.Publish
 
 
-def check_and_increment_issue(newsletter_folder: str) -> Tuple[bool, str]:
+def check_and_increment_issue(newsletter_id: int) -> Tuple[bool, str]:
     """
     Check whether the issue number should be incremented and increment it if so.
 
@@ -120,14 +83,8 @@ def check_and_increment_issue(newsletter_folder: str) -> Tuple[bool, str]:
     int_state = _get_int_state()
 
     if int_state == 0:
-        try:
-            with open(os.path.join(newsletter_folder, "issue"), "r+") as issue_file:
-                issue = int(issue_file.read())
-                issue_file.seek(0)
-                issue_file.write(str(issue + 1))
-        except OSError:
-            return False, "Failed to open issue file"
-        except ValueError:
-            return False, "Failed to parse issue file"
+        success, error = database.increment_issue(newsletter_id)
+        if not success:
+            return False, error or "Failed to increment issue"
 
     return True, ""
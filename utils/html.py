@@ -1,37 +1,77 @@
 import os
 import hashlib
-from typing import Tuple
-import bleach
+import hmac
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+from dotenv import load_dotenv
 
 from utils.type_hints import ReplaceDict
 
-from .database import get_newsletters
+from . import cache
+from .database import (
+    get_newsletter_candidates,
+    get_newsletters,
+    set_fingerprint,
+    set_passcode,
+)
+from .registry import REGISTRY
+from .templates import TEMPLATES, Template, compile_template
 
 
-ITERATIONS = 100000
-HASH_ALGO = "sha256"
+load_dotenv()
 
-DIR = os.path.dirname(__file__)
-NAVBAR = open(os.path.join(DIR, "../templates/navbar.html")).read()
 
+# The cost new hashes are made with, stored hashes record their own
+ITERATIONS = int(os.getenv("PASSCODE_ITERATIONS", "100000"))
+HASH_ALGO = os.getenv("PASSCODE_HASH", "sha256")
 
-def format_html(html: str, replacements: ReplaceDict, sanitize: bool = False) -> str:
-    for key, value in replacements.items():
-        if key not in html:
-            raise KeyError("Substitution key not found in text to replace")
+# Hashes made before they recorded their parameters are a bare salt and key
+LEGACY_ITERATIONS = 100000
+LEGACY_HASH_ALGO = "sha256"
+SALT_BYTES = 16
+# Fixed whatever the digest so that hashes always fit the passcode column
+KEY_BYTES = 32
+HASH_PREFIX = b"pbkdf2_"
+
+# Keys the passcode fingerprints, which are scanned instead when it is not set
+PASSCODE_PEPPER = os.getenv("PASSCODE_PEPPER")
+
+# Threads verifying candidate passcodes at once, 1 to verify them in turn
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", "1"))
+
+_VERIFIER: Optional[ThreadPoolExecutor] = None
+_VERIFIER_LOCK = threading.Lock()
+
+TEMPLATES.declare("navbar.html", ["PREV", "P_VALID", "NEXT", "N_VALID", "C_VALID"])
 
-        if sanitize:
-            cleaned = bleach.clean(value)
-            linkified = bleach.linkify(cleaned)
-            lined = linkified.replace("\n", "<br/>")
-        else:
-            lined = value
 
-        if lined is None:
-            lined = ""
-        html = html.replace(f"[{key}]", lined)
+def format_html(
+    html: Union[str, Template], replacements: ReplaceDict, sanitize: bool = False
+) -> str:
+    """
+    Substitute each value of `replacements` for its `[KEY]` placeholder in a
+    single pass, see `utils.templates.Template`.
 
-    return html
+    Parameters
+    ----------
+    html : str or Template
+        The template, compiled if not already
+    replacements : ReplaceDict
+        The value of each key
+    sanitize : bool
+        Whether to strip HTML from the values, link URLs and keep newlines
+
+    Raises
+    ------
+    KeyError
+        If one of the keys is not in `html`
+    """
+    if not isinstance(html, Template):
+        html = compile_template(html)
+
+    return html.render(replacements, sanitize)
 
 
 def make_navbar(issue: int, curr_issue: int) -> str:
@@ -43,7 +83,7 @@ def make_navbar(issue: int, curr_issue: int) -> str:
     c_valid = "disable" if issue == curr_issue else ""
 
     return format_html(
-        NAVBAR,
+        TEMPLATES.get("navbar.html"),
         {
             "PREV": str(max(issue - 1, 0)),
             "P_VALID": p_valid,
@@ -54,27 +94,198 @@ def make_navbar(issue: int, curr_issue: int) -> str:
     )
 
 
-def hash_passcode(passcode: str) -> bytes:
-    salt: bytes = os.urandom(16)
+def hash_passcode(
+    passcode: str, algorithm: Optional[str] = None, iterations: Optional[int] = None
+) -> bytes:
+    """
+    Hash a passcode with PBKDF2, recording the parameters used as
+    `pbkdf2_<algorithm>$<iterations>$` ahead of the salt and key so that
+    they can be changed later without breaking existing hashes.
+
+    Parameters
+    ----------
+    passcode : str
+        The passcode to hash
+    algorithm : str, optional
+        The hashlib digest, defaults to `PASSCODE_HASH`
+    iterations : int, optional
+        The cost, defaults to `PASSCODE_ITERATIONS`
+    """
+    algorithm = algorithm or HASH_ALGO
+    iterations = iterations or ITERATIONS
+
+    salt: bytes = os.urandom(SALT_BYTES)
 
     hash_value: bytes = hashlib.pbkdf2_hmac(
-        HASH_ALGO, passcode.encode("utf-8"), salt, ITERATIONS
+        algorithm, passcode.encode("utf-8"), salt, iterations, KEY_BYTES
     )
 
-    return salt + hash_value
+    return (
+        HASH_PREFIX + f"{algorithm}${iterations}$".encode("ascii") + salt + hash_value
+    )
 
 
-def verify(passcode: str, hash: bytes):
-    salt, key = hash[:16], hash[16:]
+def hash_parameters(hash: bytes) -> Tuple[str, int, bytes, bytes]:
+    """
+    Split a stored hash into its parameters.
 
-    test_hash: bytes = hashlib.pbkdf2_hmac(
-        HASH_ALGO, passcode.encode("utf-8"), salt, ITERATIONS
+    Returns
+    -------
+    algorithm : str
+        The hashlib digest
+    iterations : int
+        The PBKDF2 cost
+    salt : bytes
+        The salt
+    key : bytes
+        The derived key
+    """
+    if not hash.startswith(HASH_PREFIX):
+        return LEGACY_HASH_ALGO, LEGACY_ITERATIONS, hash[:SALT_BYTES], hash[SALT_BYTES:]
+
+    algorithm, iterations, rest = hash[len(HASH_PREFIX) :].split(b"$", 2)
+    return (
+        algorithm.decode("ascii"),
+        int(iterations),
+        rest[:SALT_BYTES],
+        rest[SALT_BYTES:],
     )
 
-    if key == test_hash:
+
+def needs_rehash(hash: bytes) -> bool:
+    """
+    Whether a stored hash was made with other parameters than new hashes, or
+    predates hashes recording their parameters.
+    """
+    if not hash.startswith(HASH_PREFIX):
         return True
 
-    return False
+    algorithm, iterations, _, _ = hash_parameters(hash)
+    return (algorithm, iterations) != (HASH_ALGO, ITERATIONS)
+
+
+def verify(passcode: str, hash: bytes):
+    try:
+        algorithm, iterations, salt, key = hash_parameters(hash)
+        test_hash: bytes = hashlib.pbkdf2_hmac(
+            algorithm, passcode.encode("utf-8"), salt, iterations, len(key) or None
+        )
+    except ValueError:
+        # A hash that does not parse or names an unknown digest never matches
+        return False
+
+    return hmac.compare_digest(key, test_hash)
+
+
+def calibrate(
+    target_ms: float, algorithm: Optional[str] = None, samples: int = 5
+) -> int:
+    """
+    Find the PBKDF2 cost at which verifying a passcode takes about
+    `target_ms` milliseconds on this host.
+
+    Returns
+    -------
+    iterations : int
+        The cost, rounded down to a multiple of 1000 and at least 1000
+    """
+    algorithm = algorithm or HASH_ALGO
+    probe = 20000
+
+    # The fastest run is the least disturbed by anything else on the host
+    fastest = min(_time_hash(algorithm, probe) for _ in range(max(samples, 1)))
+    iterations = int(probe * target_ms / (fastest * 1000))
+
+    return max(iterations // 1000 * 1000, 1000)
+
+
+def _time_hash(algorithm: str, iterations: int) -> float:
+    start = time.perf_counter()
+    hashlib.pbkdf2_hmac(
+        algorithm, b"calibration", os.urandom(SALT_BYTES), iterations, KEY_BYTES
+    )
+    return time.perf_counter() - start
+
+
+def fingerprint(passcode: str) -> Optional[bytes]:
+    """
+    A keyed digest of the passcode that newsletters are looked up by, so that
+    only one slow hash has to be verified per login. Without the pepper, which
+    is kept outside of the database, it reveals nothing about the passcode.
+
+    Returns
+    -------
+    fingerprint : bytes, optional
+        The fingerprint, None if `PASSCODE_PEPPER` is not set
+    """
+    if not PASSCODE_PEPPER:
+        return None
+
+    return hmac.new(
+        PASSCODE_PEPPER.encode("utf-8"), passcode.encode("utf-8"), hashlib.sha256
+    ).digest()
+
+
+def _get_verifier() -> ThreadPoolExecutor:
+    """
+    Get the process-wide verification pool, creating it on first use.
+    """
+    global _VERIFIER
+
+    with _VERIFIER_LOCK:
+        if _VERIFIER is None:
+            _VERIFIER = ThreadPoolExecutor(
+                max_workers=AUTH_WORKERS, thread_name_prefix="verify"
+            )
+
+    return _VERIFIER
+
+
+def _first_match(passcode: str, hashes: List[bytes]) -> Optional[int]:
+    """
+    Find the first hash the passcode matches, verifying up to `AUTH_WORKERS`
+    at once as `hashlib.pbkdf2_hmac` releases the GIL.
+
+    The result is always the one verifying in turn would give: a match only
+    wins once every earlier hash has been ruled out, after which the hashes
+    not yet started are skipped.
+
+    Returns
+    -------
+    index : int, optional
+        The index of the matching hash, None if there is none
+    """
+    if AUTH_WORKERS <= 1 or len(hashes) <= 1:
+        for index, n_hash in enumerate(hashes):
+            if verify(passcode, n_hash):
+                return index
+        return None
+
+    verifier = _get_verifier()
+    futures = [verifier.submit(verify, passcode, n_hash) for n_hash in hashes]
+    try:
+        for index, future in enumerate(futures):
+            if future.result():
+                return index
+    finally:
+        for future in futures:
+            future.cancel()
+
+    return None
+
+
+def _failed_key(passcode: str) -> Optional[str]:
+    # A keyed digest so the cache never holds anything a passcode can be
+    # recovered from, distinct from the fingerprint stored in the database
+    if not PASSCODE_PEPPER or cache.CACHE is None:
+        return None
+
+    digest = hmac.new(
+        PASSCODE_PEPPER.encode("utf-8"),
+        b"failed\0" + passcode.encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+    return cache.FAILED_PREFIX + digest
 
 
 def authenticate(passcode: str) -> Tuple[bool, int, str, str]:
@@ -97,13 +308,40 @@ def authenticate(passcode: str) -> Tuple[bool, int, str, str]:
     folder : str
         The folder storing metadata for the newsletter
     """
-    newsletters = get_newsletters()
+    # Retrying a wrong passcode is rejected without verifying it again
+    failed = _failed_key(passcode)
+    if failed is not None and cache.get(failed):
+        return False, -1, "", ""
+
+    started = time.time()
+    key = fingerprint(passcode)
+    if REGISTRY.loaded:
+        # Only long-running processes load the registry, see `NewsletterRegistry`
+        if key is None:
+            newsletters = REGISTRY.newsletters()
+        else:
+            newsletters = REGISTRY.candidates(key)
+    elif key is None:
+        newsletters = [(*entry, None) for entry in get_newsletters()]
+    else:
+        # Only newsletters that have not logged in since fingerprinting began
+        # still have to be tried one by one
+        newsletters = get_newsletter_candidates(key)
 
-    for entry in newsletters:
-        n_id, n_title, n_hash, n_folder = entry
+    for _, _, n_hash, _, _ in newsletters:
         assert isinstance(n_hash, bytes), "SQL returned a hash that was not in bytes."
 
-        if verify(passcode, n_hash):
-            return True, n_id, n_title, n_folder
+    index = _first_match(passcode, [entry[2] for entry in newsletters])
+    if index is None:
+        if failed is not None:
+            cache.put_failure(failed, started)
+        return False, -1, "", ""
+
+    n_id, n_title, n_hash, n_folder, n_key = newsletters[index]
+    if key is not None and n_key is None:
+        set_fingerprint(n_id, key)
+    if needs_rehash(n_hash):
+        # Only now is the passcode known, so outdated hashes are upgraded here
+        set_passcode(n_id, n_hash, hash_passcode(passcode))
 
-    return False, -1, "", ""
+    return True, n_id, n_title, n_folder
@@ -0,0 +1,343 @@
+import json
+import os
+import yaml
+from datetime import datetime
+from dotenv import load_dotenv
+
+from . import database
+from .database import (
+    FINGERPRINT_QUERY,
+    NEWSLETTERS_QUERY,
+    QUESTIONS_QUERY,
+    RESPONSES_QUERY,
+    _get_connection,
+)
+from .logger import database_logger as LOGGER
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+load_dotenv()
+
+
+HOME = os.getenv("HOME")
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Any], None]
+
+
+# Queries that must be served by an index, mapped to the index expected on
+# each table they touch
+INDEXED_QUERIES: Dict[str, Tuple[str, Tuple[Any, ...], Dict[str, str]]] = {
+    "get_questions": (QUESTIONS_QUERY, (1, 1), {"questions": "questions_issue"}),
+    "get_responses": (
+        RESPONSES_QUERY,
+        (1, 1),
+        {"questions": "questions_issue", "answers": "question_id"},
+    ),
+    "authenticate": (
+        FINGERPRINT_QUERY,
+        (b"fingerprint",),
+        {"newsletters": "newsletters_fingerprint"},
+    ),
+}
+
+
+def _add_newsletter_folder(cursor) -> None:
+    # Older databases were created before the folder column was declared
+    if not database.BACKEND.column_exists(cursor, "newsletters", "folder"):
+        cursor.execute(
+            "ALTER TABLE newsletters ADD COLUMN folder VARCHAR(100) NOT NULL;"
+        )
+
+
+def _index_questions_by_issue(cursor) -> None:
+    # Serves both the filter and the ORDER BY of the question reads
+    if not database.BACKEND.index_exists(cursor, "questions", "questions_issue"):
+        cursor.execute(
+            """
+            CREATE INDEX questions_issue
+            ON questions (newsletter_id, issue, base, id);
+            """
+        )
+
+
+def _summarise_issues(cursor) -> None:
+    # MySQL databases predate the tables, SQLite creates them on connection
+    if not database.BACKEND.column_exists(cursor, "issues", "newsletter_id"):
+        cursor.execute(
+            """
+            CREATE TABLE issues (
+                newsletter_id INT NOT NULL,
+                issue INT NOT NULL,
+                question_count INT NOT NULL DEFAULT 0,
+                answer_count INT NOT NULL DEFAULT 0,
+                respondent_count INT NOT NULL DEFAULT 0,
+                last_answer_at DATETIME NULL,
+                PRIMARY KEY (newsletter_id, issue),
+                FOREIGN KEY (newsletter_id) REFERENCES newsletters(id)
+            );
+            """
+        )
+    if not database.BACKEND.column_exists(cursor, "issue_respondents", "name"):
+        cursor.execute(
+            """
+            CREATE TABLE issue_respondents (
+                newsletter_id INT NOT NULL,
+                issue INT NOT NULL,
+                name VARCHAR(100) NOT NULL,
+                PRIMARY KEY (newsletter_id, issue, name)
+            );
+            """
+        )
+
+    database._rebuild_issues(cursor)
+
+
+def _create_issue_archive(cursor) -> None:
+    if not database.BACKEND.column_exists(cursor, "archived_issues", "data"):
+        cursor.execute(
+            """
+            CREATE TABLE archived_issues (
+                newsletter_id INT NOT NULL,
+                issue INT NOT NULL,
+                archived_at DATETIME NOT NULL,
+                data MEDIUMBLOB NOT NULL,
+                PRIMARY KEY (newsletter_id, issue),
+                FOREIGN KEY (newsletter_id) REFERENCES newsletters(id)
+            );
+            """
+        )
+
+
+CONFIG_COLUMNS = [
+    ("name", "VARCHAR(100) NULL"),
+    ("email", "VARCHAR(100) NULL"),
+    ("link", "VARCHAR(255) NULL"),
+    ("issue", "INT NOT NULL DEFAULT 1"),
+    ("default_questions", "TEXT NULL"),
+]
+
+
+# The keys of config.yaml moved into the columns
+CONFIG_KEYS = ("name", "email", "link", "defaults")
+
+
+def _read_config_files(folder: str) -> Optional[Tuple[dict, int]]:
+    # The files newsletters were configured with before the columns existed
+    assert HOME is not None, "Failed to find home directory"
+
+    try:
+        with open(os.path.join(HOME, folder, "config.yaml"), "r") as config_file:
+            config = yaml.safe_load(config_file)
+        with open(os.path.join(HOME, folder, "issue"), "r") as issue_file:
+            issue = int(issue_file.read())
+    except (OSError, ValueError, yaml.YAMLError) as error:
+        LOGGER.warning(f"Failed to read the config of {folder}: {error}")
+        return None
+
+    if not isinstance(config, dict):
+        LOGGER.warning(f"The config of {folder} is not a mapping")
+        return None
+
+    missing = [key for key in CONFIG_KEYS if key not in config]
+    if missing:
+        LOGGER.warning(f"The config of {folder} is missing {', '.join(missing)}")
+        return None
+
+    return config, issue
+
+
+def _move_config_into_database(cursor) -> None:
+    for column, definition in CONFIG_COLUMNS:
+        if not database.BACKEND.column_exists(cursor, "newsletters", column):
+            cursor.execute(f"ALTER TABLE newsletters ADD COLUMN {column} {definition};")
+
+    cursor.execute("SELECT id, folder FROM newsletters WHERE name IS NULL;")
+    for newsletter_id, folder in cursor.fetchall():
+        files = _read_config_files(folder)
+        if files is None:
+            # Left unconfigured, so loading it fails until fixed by hand
+            continue
+
+        config, issue = files
+        cursor.execute(
+            """
+            UPDATE newsletters
+            SET name=%s, email=%s, link=%s, issue=%s, default_questions=%s
+            WHERE id=%s;
+            """,
+            (
+                config["name"],
+                config["email"],
+                config["link"],
+                issue,
+                json.dumps(config["defaults"]),
+                newsletter_id,
+            ),
+        )
+
+
+def _fingerprint_passcodes(cursor) -> None:
+    # Passcodes cannot be recovered from their hashes, so fingerprints are
+    # filled in as each newsletter next logs in
+    if not database.BACKEND.column_exists(cursor, "newsletters", "fingerprint"):
+        cursor.execute(
+            "ALTER TABLE newsletters ADD COLUMN fingerprint VARBINARY(32) NULL;"
+        )
+    if not database.BACKEND.index_exists(
+        cursor, "newsletters", "newsletters_fingerprint"
+    ):
+        cursor.execute(
+            "CREATE INDEX newsletters_fingerprint ON newsletters (fingerprint);"
+        )
+
+
+def _version_newsletters(cursor) -> None:
+    if not database.BACKEND.column_exists(cursor, "newsletters_version", "version"):
+        cursor.execute(
+            """
+            CREATE TABLE newsletters_version (
+                id INT NOT NULL PRIMARY KEY,
+                version BIGINT NOT NULL
+            );
+            """
+        )
+    cursor.execute(
+        "INSERT IGNORE INTO newsletters_version (id, version) VALUES (1, 1);"
+    )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Declare newsletters.folder", _add_newsletter_folder),
+    Migration(2, "Index questions by newsletter and issue", _index_questions_by_issue),
+    Migration(3, "Summarise questions and answers per issue", _summarise_issues),
+    Migration(4, "Archive for old issues", _create_issue_archive),
+    Migration(
+        5, "Move newsletter config into the database", _move_config_into_database
+    ),
+    Migration(6, "Fingerprint newsletter passcodes", _fingerprint_passcodes),
+    Migration(7, "Version the newsletters", _version_newsletters),
+]
+
+
+def _ensure_version_table(cursor) -> None:
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT NOT NULL PRIMARY KEY,
+            description VARCHAR(100) NOT NULL,
+            applied_at DATETIME NOT NULL
+        );
+        """
+    )
+
+
+def get_schema_version() -> int:
+    """
+    Returns
+    -------
+    version : int
+        The most recent migration applied to the database, 0 if none
+    """
+    conn, cursor = _get_connection("get_schema_version")
+
+    try:
+        _ensure_version_table(cursor)
+        cursor.execute("SELECT MAX(version) FROM schema_version;")
+        (version,) = cursor.fetchone()
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return version or 0
+
+
+def migrate(target: Optional[int] = None) -> List[int]:
+    """
+    Apply every pending migration in order.
+
+    Each migration checks the current schema before changing it so that a
+    migration interrupted after its DDL (which MySQL commits implicitly) but
+    before its version was recorded can safely be run again.
+
+    Parameters
+    ----------
+    target : int, optional
+        Stop after this version, defaults to the latest
+
+    Returns
+    -------
+    applied : list[int]
+        The versions applied by this call
+    """
+    current = get_schema_version()
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        if target is not None and migration.version > target:
+            break
+
+        conn, cursor = _get_connection("migrate")
+        try:
+            LOGGER.info(
+                f"Applying migration {migration.version}: {migration.description}"
+            )
+            migration.apply(cursor)
+            cursor.execute(
+                """
+                INSERT INTO schema_version (version, description, applied_at)
+                VALUES (%s, %s, %s);
+                """,
+                (migration.version, migration.description, datetime.now()),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            LOGGER.critical(f"Migration {migration.version} failed")
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+        applied.append(migration.version)
+
+    return applied
+
+
+def check_indexes() -> Dict[str, List[str]]:
+    """
+    EXPLAIN the hot read queries and report any table not using its index.
+
+    Returns
+    -------
+    problems : dict[str, list[str]]
+        For each query, a description of every table that is not served by the
+        expected index. Empty if every query uses its indexes.
+    """
+    conn, cursor = _get_connection("check_indexes")
+
+    problems = {}
+    try:
+        for name, (query, values, expected) in INDEXED_QUERIES.items():
+            keys = database.BACKEND.explain(cursor, query.strip().rstrip(";"), values)
+
+            for table, index in expected.items():
+                if keys.get(table) != index:
+                    problems.setdefault(name, []).append(
+                        f"{table} used {keys.get(table)} instead of {index}"
+                    )
+
+        # Not indexed but must still parse against the current schema
+        database.BACKEND.explain(cursor, NEWSLETTERS_QUERY.rstrip(";"), ())
+    finally:
+        cursor.close()
+        conn.close()
+
+    return problems
@@ -0,0 +1,270 @@
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+from .logger import database_logger as LOGGER
+
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Type
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when no connection becomes available within the checkout timeout.
+    """
+
+
+class PooledConnection:
+    """
+    A proxy around a checked out connection.
+
+    Attribute access is forwarded to the underlying connection except for
+    `close` which returns the connection to the pool instead of closing it.
+    """
+
+    def __init__(self, pool: "ConnectionPool", conn: Any):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", conn)
+
+    @property
+    def raw(self) -> Any:
+        """
+        The underlying connection, raises if it has already been returned.
+        """
+        if self._conn is None:
+            raise RuntimeError("Connection has already been returned to the pool")
+        return self._conn
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """
+        Scratch space that lives as long as the underlying connection, such as
+        caches of server-side resources tied to it.
+        """
+        return self._pool.state(self.raw)
+
+    def close(self) -> None:
+        """
+        Return the connection to the pool. Closing twice is a no-op.
+        """
+        conn = self._conn
+        if conn is None:
+            return
+
+        object.__setattr__(self, "_conn", None)
+        self._pool.release(conn)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.raw, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.raw, name, value)
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of database connections.
+
+    Idle connections are reused most-recently-returned first so that warm
+    connections are preferred. A connection that has been idle for longer
+    than `ping_after` seconds is checked with `is_alive` before being handed
+    out and transparently replaced if it has died. Every connection is passed
+    through `reset` when it is returned so that no transaction state leaks
+    between callers.
+
+    Parameters
+    ----------
+    factory : Callable[[], Any]
+        Creates a new raw connection
+    size : int
+        The maximum number of connections open at any one time
+    timeout : float
+        The number of seconds to wait for a free connection before giving up
+    is_alive : Callable[[Any], bool]
+        Liveness check for an idle connection
+    reset : Callable[[Any], None]
+        Cleans up a connection as it is returned to the pool
+    close : Callable[[Any], None]
+        Closes a raw connection that is being discarded
+    ping_after : float
+        Idle seconds after which a connection is checked before reuse
+    errors : Tuple[Type[Exception], ...]
+        Raised by the driver on a broken connection, logged rather than raised
+        when closing one that is being discarded
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int = 5,
+        timeout: float = 10.0,
+        is_alive: Optional[Callable[[Any], bool]] = None,
+        reset: Optional[Callable[[Any], None]] = None,
+        close: Optional[Callable[[Any], None]] = None,
+        ping_after: float = 5.0,
+        errors: Tuple[Type[Exception], ...] = (mysql.connector.Error,),
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.errors = errors
+
+        self._factory = factory
+        self._is_alive = is_alive or (lambda conn: True)
+        self._reset = reset or (lambda conn: None)
+        self._close = close or (lambda conn: conn.close())
+
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._state: Dict[int, Dict[str, Any]] = {}
+        self._open = 0
+        self._cond = threading.Condition()
+
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.discarded = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Check out a connection, waiting up to `timeout` seconds for one to free up.
+
+        Returns
+        -------
+        conn : PooledConnection
+            A connection which is returned to the pool when closed
+
+        Raises
+        ------
+        PoolTimeout
+            If no connection became available in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {timeout}s"
+                        )
+                    if not waited:
+                        waited = True
+                        self.waits += 1
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                else:
+                    conn, released_at = None, 0.0
+                    self._open += 1
+
+            if conn is None:
+                try:
+                    conn = self._factory()
+                except BaseException:
+                    self._forget()
+                    raise
+
+                with self._cond:
+                    self.misses += 1
+                return PooledConnection(self, conn)
+
+            if time.monotonic() - released_at < self.ping_after or self._check(conn):
+                with self._cond:
+                    self.hits += 1
+                return PooledConnection(self, conn)
+
+            self._discard(conn)
+
+    def release(self, conn: Any) -> None:
+        """
+        Reset a raw connection and make it available to other callers.
+        """
+        try:
+            self._reset(conn)
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def state(self, conn: Any) -> Dict[str, Any]:
+        """
+        Returns
+        -------
+        state : dict
+            The scratch space for a raw connection, dropped when it is discarded
+        """
+        with self._cond:
+            return self._state.setdefault(id(conn), {})
+
+    def close_all(self) -> None:
+        """
+        Close every idle connection. Checked out connections are unaffected.
+        """
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+            for conn, _ in idle:
+                self._state.pop(id(conn), None)
+            self._cond.notify_all()
+
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns
+        -------
+        stats : dict
+            The pool counters and current occupancy
+        """
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+            }
+
+    def _check(self, conn: Any) -> bool:
+        try:
+            return bool(self._is_alive(conn))
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn: Any) -> None:
+        # The connection is being dropped anyway, often because it is broken
+        try:
+            self._close(conn)
+        except self.errors as error:
+            LOGGER.warning(f"Failed to close a pooled connection: {error}")
+
+    def _discard(self, conn: Any) -> None:
+        self._close_quietly(conn)
+
+        with self._cond:
+            self.discarded += 1
+            self._state.pop(id(conn), None)
+        self._forget()
+
+    def _forget(self) -> None:
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
@@ -0,0 +1,146 @@
+import threading
+
+from . import database
+from .logger import database_logger as LOGGER
+
+from typing import Dict, List, Optional, Tuple
+
+
+# (id, title, pass_hash, folder, fingerprint)
+Newsletter = Tuple[int, str, bytes, str, Optional[bytes]]
+
+
+class NewsletterRegistry:
+    """
+    The newsletters of a long-running process, kept in memory and looked up
+    by id, title or passcode fingerprint.
+
+    They are loaded once and only reloaded when the version of the newsletters
+    in the database, which every change to them bumps in the same transaction,
+    differs from the one they were loaded at. Every lookup costs a single
+    primary key read of that version, rather than reading every passcode hash.
+
+    Loading reads every newsletter, which only pays off in a long-running
+    process, so the registry is only used once such a process has called
+    `refresh` at startup. CGI requests look newsletters up in the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version: Optional[int] = None
+
+        self._by_id: Dict[int, Newsletter] = {}
+        self._by_title: Dict[str, Newsletter] = {}
+        self._by_fingerprint: Dict[bytes, List[Newsletter]] = {}
+        self._unfingerprinted: List[Newsletter] = []
+
+    def _load(self, version: int, rows: list) -> None:
+        by_id: Dict[int, Newsletter] = {}
+        by_title: Dict[str, Newsletter] = {}
+        by_fingerprint: Dict[bytes, List[Newsletter]] = {}
+        unfingerprinted: List[Newsletter] = []
+
+        for n_id, title, pass_hash, folder, key in rows:
+            entry = (
+                n_id,
+                title,
+                bytes(pass_hash),
+                folder,
+                None if key is None else bytes(key),
+            )
+            by_id[n_id] = entry
+            # Titles are not unique, the oldest newsletter keeps its title
+            by_title.setdefault(title, entry)
+            if entry[4] is None:
+                unfingerprinted.append(entry)
+            else:
+                by_fingerprint.setdefault(entry[4], []).append(entry)
+
+        # Swapped in whole so lookups never see a partial load
+        self._by_id, self._by_title = by_id, by_title
+        self._by_fingerprint, self._unfingerprinted = by_fingerprint, unfingerprinted
+        # A missing version cannot detect changes, so it never matches
+        self._version = version or None
+        self._loaded = True
+
+        LOGGER.info(f"Loaded {len(by_id)} newsletters at version {version}")
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the newsletters have been loaded, and so should be looked up
+        here rather than in the database.
+        """
+        return self._loaded
+
+    def refresh(self) -> None:
+        """
+        Reload the newsletters if they have changed since they were loaded.
+        """
+        if self._version is not None:
+            if database.get_newsletters_version() == self._version:
+                return
+
+        with self._lock:
+            # Another thread may have reloaded them while waiting for the lock
+            if self._version is not None:
+                if database.get_newsletters_version() == self._version:
+                    return
+
+            self._load(*database.get_registry())
+
+    def clear(self) -> None:
+        """
+        Forget the newsletters so they are loaded again on the next lookup,
+        and looked up in the database until then.
+        """
+        with self._lock:
+            self._version = None
+            self._loaded = False
+
+    def newsletters(self) -> List[Newsletter]:
+        """
+        Returns
+        -------
+        newsletters : list
+            Every newsletter, as (id, title, pass_hash, folder, fingerprint)
+        """
+        self.refresh()
+        return list(self._by_id.values())
+
+    def get(self, newsletter_id: int) -> Optional[Newsletter]:
+        """
+        Returns
+        -------
+        newsletter : tuple, optional
+            The newsletter with the id, None if there is none
+        """
+        self.refresh()
+        return self._by_id.get(newsletter_id)
+
+    def by_title(self, title: str) -> Optional[Newsletter]:
+        """
+        Returns
+        -------
+        newsletter : tuple, optional
+            The oldest newsletter with the title, None if there is none
+        """
+        self.refresh()
+        return self._by_title.get(title)
+
+    def candidates(self, fingerprint: bytes) -> List[Newsletter]:
+        """
+        The in-memory equivalent of `utils.database.get_newsletter_candidates`.
+
+        Returns
+        -------
+        newsletters : list
+            The newsletters with the fingerprint, followed by those without
+            one yet
+        """
+        self.refresh()
+        return self._by_fingerprint.get(fingerprint, []) + self._unfingerprinted
+
+
+REGISTRY = NewsletterRegistry()
@@ -0,0 +1,290 @@
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+from functools import lru_cache
+from operator import itemgetter
+
+import bleach
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+from utils.logger import renderer_logger as LOGGER
+from utils.type_hints import ReplaceDict
+
+
+load_dotenv()
+
+
+# Compiled templates kept by `compile_template`, one per distinct source
+TEMPLATE_CACHE = 128
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "..", "templates")
+# Seconds between checks of a template file for changes, negative to never check
+TEMPLATE_CHECK_INTERVAL = float(os.getenv("TEMPLATE_CHECK_INTERVAL", "2"))
+
+_PLACEHOLDER = re.compile(r"\[([^\[\]]+)\]")
+_VALUE_TYPES = frozenset({str, type(None)})
+
+
+def _sanitize(value: str) -> str:
+    cleaned = bleach.clean(value)
+    linkified = bleach.linkify(cleaned)
+    return linkified.replace("\n", "<br/>")
+
+
+class Template:
+    """
+    An HTML template parsed once into its literal text with a field between
+    each piece for each `[KEY]` placeholder, so that rendering is a single
+    join however many keys and placeholders there are.
+
+    Values are substituted once, a value containing `[KEY]` is left as is
+    rather than being replaced by a later key. Placeholders without a value
+    are left in the output. Templates are never changed once built, so one
+    can be shared between threads.
+
+    Parameters
+    ----------
+    source : str
+        The template
+    keys : Iterable[str]
+        Keys to check are in the template now rather than when rendering
+
+    Raises
+    ------
+    KeyError
+        If one of `keys` is not in the template
+    """
+
+    __slots__ = ("source", "placeholders", "_parts", "_unfilled", "_values")
+
+    def __init__(self, source: str, keys: Iterable[str] = ()):
+        self.source = source
+
+        names: List[str] = []
+        # The literal text with a slot for each field at the odd positions
+        parts: List[str] = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(source):
+            names.append(match.group(1))
+            parts.append(source[position : match.start()])
+            parts.append("")
+            position = match.end()
+        parts.append(source[position:])
+
+        self._parts = parts
+        # Starting point of the values, what is left of each unfilled field
+        self._unfilled = {name: f"[{name}]" for name in names}
+        if len(names) == 1:
+            self._values = lambda values: (values[names[0]],)
+        elif names:
+            self._values = itemgetter(*names)
+        else:
+            self._values = lambda values: ()
+
+        self.placeholders = frozenset(names)
+
+        for key in keys:
+            self._check(key)
+
+    def _check(self, key: str) -> None:
+        # As lenient as replacing each key in turn, which only looked for the
+        # key itself and not its placeholder
+        if key not in self.placeholders and key not in self.source:
+            raise KeyError("Substitution key not found in text to replace")
+
+    def render(self, replacements: ReplaceDict, sanitize: bool = False) -> str:
+        """
+        Substitute the values of `replacements` for their placeholders.
+
+        Parameters
+        ----------
+        replacements : ReplaceDict
+            The value of each key, None for an empty string
+        sanitize : bool
+            Whether to strip HTML from the values, link URLs and keep newlines
+
+        Raises
+        ------
+        KeyError
+            If one of the keys is not in the template
+        TypeError
+            If one of the values is not a string
+        """
+        if not sanitize and len(replacements) == len(self._unfilled):
+            # Most renders give a string for every placeholder, which needs
+            # none of the checks and copies below unless one of them fails
+            try:
+                return self._join(self._values(replacements))
+            except (KeyError, TypeError):
+                pass
+
+        if not self.placeholders.issuperset(replacements):
+            for key in replacements:
+                self._check(key)
+
+        if not _VALUE_TYPES.issuperset(map(type, replacements.values())):
+            raise TypeError("Substitution values must be strings")
+
+        if sanitize:
+            replacements = {
+                key: _sanitize(value) for key, value in replacements.items()
+            }
+        elif None in replacements.values():
+            replacements = {
+                key: "" if value is None else value
+                for key, value in replacements.items()
+            }
+
+        values = self._unfilled.copy()
+        values.update(replacements)
+
+        return self._join(self._values(values))
+
+    def _join(self, values: Tuple[str, ...]) -> str:
+        parts = self._parts.copy()
+        parts[1::2] = values
+        return "".join(parts)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE)
+def compile_template(source: str) -> Template:
+    """
+    The compiled template of `source`, only parsed the first time it is seen.
+    """
+    return Template(source)
+
+
+class TemplateRegistry:
+    """
+    Every template of a directory, compiled once and kept in memory.
+
+    A template is only read again when the modification time of its file has
+    changed, which is checked at most once every `check_interval` seconds per
+    template so that most renders never touch the filesystem.
+
+    Callers `declare` the keys they fill in each template, which are checked
+    whenever the template is compiled rather than on every render.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the templates
+    check_interval : float
+        Seconds between checks of a file for changes, negative to never check
+    """
+
+    def __init__(
+        self, directory: str = TEMPLATES_DIR, check_interval=TEMPLATE_CHECK_INTERVAL
+    ):
+        self.directory = directory
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        # Each template with the modification time it was read at
+        self._templates: Dict[str, Tuple[int, Template]] = {}
+        self._checked: Dict[str, float] = {}
+        self._keys: Dict[str, Set[str]] = {}
+
+    def _load(self, name: str) -> Template:
+        path = os.path.join(self.directory, name)
+        with open(path) as file:
+            mtime = os.fstat(file.fileno()).st_mtime_ns
+            template = Template(file.read(), self._keys.get(name, ()))
+
+        self._templates[name] = (mtime, template)
+        self._checked[name] = time.monotonic()
+        return template
+
+    def declare(self, name: str, keys: Iterable[str]) -> None:
+        """
+        Declare keys that will be filled in a template, checked now if it is
+        already loaded and otherwise when it is.
+
+        Raises
+        ------
+        KeyError
+            If one of `keys` is not in the loaded template
+        """
+        with self._lock:
+            self._keys.setdefault(name, set()).update(keys)
+
+            entry = self._templates.get(name)
+            if entry is not None:
+                Template(entry[1].source, self._keys[name])
+
+    def preload(self) -> None:
+        """
+        Compile every template in the directory.
+
+        Raises
+        ------
+        KeyError
+            If a declared key is not in its template
+        """
+        with self._lock:
+            for name in sorted(os.listdir(self.directory)):
+                if name.endswith(".html"):
+                    self._load(name)
+            self._loaded = True
+
+        LOGGER.info(f"Loaded {len(self._templates)} templates from {self.directory}")
+
+    def _changed(self, name: str, mtime: int) -> bool:
+        try:
+            return os.stat(os.path.join(self.directory, name)).st_mtime_ns != mtime
+        except OSError as error:
+            # The last version is still better than failing every page
+            LOGGER.warning(f"Failed to check template {name}: {error}")
+            return False
+
+    def get(self, name: str) -> Template:
+        """
+        The compiled template of a file in the directory, loading every
+        template on first use.
+
+        Raises
+        ------
+        FileNotFoundError
+            If there is no such template
+        KeyError
+            If a declared key is not in the template
+        """
+        if not self._loaded:
+            self.preload()
+
+        entry = self._templates.get(name)
+        if entry is not None:
+            mtime, template = entry
+            if self.check_interval < 0:
+                return template
+
+            now = time.monotonic()
+            if now - self._checked[name] < self.check_interval:
+                return template
+
+            self._checked[name] = now
+            if not self._changed(name, mtime):
+                return template
+
+            LOGGER.info(f"Reloading changed template {name}")
+
+        with self._lock:
+            return self._load(name)
+
+    def __getitem__(self, name: str) -> Template:
+        return self.get(name)
+
+    def clear(self) -> None:
+        """
+        Forget every template so they are loaded again on the next use.
+        """
+        with self._lock:
+            self._templates = {}
+            self._checked = {}
+            self._loaded = False
+
+
+TEMPLATES = TemplateRegistry()
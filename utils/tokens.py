@@ -0,0 +1,131 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from .html import authenticate
+from .logger import renderer_logger as LOGGER
+from .type_hints import NewsletterToken
+
+from typing import Optional
+
+
+load_dotenv()
+
+
+# Signs the session tokens, rotating it logs everyone out
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(7 * 24 * 60 * 60)))
+
+# Tokens are JSON web tokens so that other tooling can read them
+HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(message: str) -> str:
+    assert SESSION_SECRET, "Failed to find the session secret"
+
+    return _encode(
+        hmac.new(
+            SESSION_SECRET.encode("utf-8"), message.encode("utf-8"), hashlib.sha256
+        ).digest()
+    )
+
+
+def _json(data: dict) -> str:
+    return _encode(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+def issue_token(token: NewsletterToken, ttl: float = SESSION_TTL) -> str:
+    """
+    Sign the newsletter a visitor has authenticated as into a token that
+    expires after `ttl` seconds.
+
+    Parameters
+    ----------
+    token : NewsletterToken
+        The authenticated newsletter
+    ttl : float
+        Seconds until the token expires, defaults to `SESSION_TTL`
+
+    Returns
+    -------
+    token : str
+        An HS256 JSON web token
+    """
+    now = int(time.time())
+    payload = {
+        "id": token.id,
+        "title": token.title,
+        "folder": token.folder,
+        "iat": now,
+        "exp": now + int(ttl),
+    }
+
+    message = f"{_json(HEADER)}.{_json(payload)}"
+    return f"{message}.{_sign(message)}"
+
+
+def verify_token(value: str) -> Optional[NewsletterToken]:
+    """
+    Check the signature and expiry of a token from `issue_token` without
+    touching the database or hashing the passcode again.
+
+    Returns
+    -------
+    token : NewsletterToken, optional
+        The newsletter the token was issued for, None if it is malformed,
+        forged or has expired
+    """
+    parts = value.split(".")
+    if len(parts) != 3:
+        return None
+
+    header, payload, signature = parts
+    # Compared before decoding anything so forged tokens are never parsed
+    expected = _sign(f"{header}.{payload}").encode("ascii")
+    if not hmac.compare_digest(expected, signature.encode("utf-8")):
+        LOGGER.warning("Rejected a token with an invalid signature")
+        return None
+
+    try:
+        if json.loads(_decode(header)) != HEADER:
+            return None
+
+        claims = json.loads(_decode(payload))
+        if claims["exp"] <= time.time():
+            return None
+
+        return NewsletterToken(
+            title=claims["title"], folder=claims["folder"], id=claims["id"]
+        )
+    except (ValueError, KeyError, TypeError, ValidationError):
+        return None
+
+
+def login(passcode: str) -> Optional[str]:
+    """
+    Authenticate a passcode once and issue a token for the newsletter it
+    belongs to.
+
+    Returns
+    -------
+    token : str, optional
+        The signed token, None if the passcode is wrong
+    """
+    verified, newsletter_id, title, folder = authenticate(passcode)
+    if not verified:
+        return None
+
+    return issue_token(NewsletterToken(title=title, folder=folder, id=newsletter_id))
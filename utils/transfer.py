@@ -0,0 +1,352 @@
+import base64
+import gzip
+import json
+
+from . import cache
+from .database import (
+    STREAM_BATCH,
+    _bump_newsletters_version,
+    _get_connection,
+    _load_archive,
+    _rebuild_issues,
+)
+from .logger import database_logger as LOGGER
+
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Rows written per transaction by `import_newsletter`
+IMPORT_BATCH = 1000
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    # Compressed when the file name says so
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")  # type: ignore
+    return open(path, mode, encoding="utf-8")
+
+
+def _stream(cursor) -> Iterator[tuple]:
+    while True:
+        batch = cursor.fetchmany(STREAM_BATCH)
+        if not batch:
+            return
+        yield from batch
+
+
+def _encode(value: Optional[bytes]) -> Optional[str]:
+    return None if value is None else base64.b64encode(bytes(value)).decode()
+
+
+def _decode(value: Optional[str]) -> Optional[bytes]:
+    return None if value is None else base64.b64decode(value)
+
+
+def _question(q_id, issue, base, form, creator, text) -> Dict[str, Any]:
+    return {
+        "record": "question",
+        "id": q_id,
+        "issue": issue,
+        "base": bool(base),
+        "type": form,
+        "creator": creator,
+        "text": text,
+    }
+
+
+def _answer(question_id, name, text, img_path) -> Dict[str, Any]:
+    return {
+        "record": "answer",
+        "question_id": question_id,
+        "name": name,
+        "text": text,
+        "img_path": img_path,
+    }
+
+
+def export_newsletter(newsletter_id: int, path: str) -> Dict[str, int]:
+    """
+    Stream a newsletter with every question and answer of every issue,
+    archived or not, to a JSON Lines file, gzipped if `path` ends in `.gz`.
+    Rows are read in batches from an unbuffered cursor so memory use does
+    not grow with the size of the newsletter.
+
+    The first line describes the newsletter, then come the questions of
+    each issue before any of their answers, then the last answer time of
+    each issue.
+
+    Returns
+    -------
+    counts : dict[str, int]
+        The number of questions and answers written
+    """
+    conn, cursor = _get_connection("export_newsletter", readonly=True)
+    counts = {"questions": 0, "answers": 0}
+
+    def write(record: Dict[str, Any]) -> None:
+        file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    try:
+        cursor.execute(
+            """
+            SELECT title, passcode, fingerprint, folder, name, email, link,
+                issue, default_questions
+            FROM newsletters
+            WHERE id=%s;
+            """,
+            (newsletter_id,),
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            raise ValueError(f"Newsletter {newsletter_id} does not exist")
+
+        with _open(path, "w") as file:
+            (
+                (
+                    title,
+                    passcode,
+                    fingerprint,
+                    folder,
+                    name,
+                    email,
+                    link,
+                    issue,
+                    defaults,
+                ),
+            ) = rows
+            write(
+                {
+                    "record": "newsletter",
+                    "title": title,
+                    "passcode": _encode(passcode),
+                    "fingerprint": _encode(fingerprint),
+                    "folder": folder,
+                    "name": name,
+                    "email": email,
+                    "link": link,
+                    "issue": issue,
+                    "defaults": None if defaults is None else json.loads(defaults),
+                }
+            )
+
+            cursor.execute(
+                """
+                SELECT id, issue, base, type, creator, text FROM questions
+                WHERE newsletter_id=%s
+                ORDER BY issue, id;
+                """,
+                (newsletter_id,),
+            )
+            for row in _stream(cursor):
+                write(_question(*row))
+                counts["questions"] += 1
+
+            cursor.execute(
+                """
+                SELECT answers.question_id, answers.name, answers.text,
+                    answers.img_path
+                FROM answers
+                JOIN questions ON questions.id=answers.question_id
+                WHERE questions.newsletter_id=%s
+                ORDER BY answers.id;
+                """,
+                (newsletter_id,),
+            )
+            for row in _stream(cursor):
+                write(_answer(*row))
+                counts["answers"] += 1
+
+            # Only one archived issue is decompressed at a time
+            cursor.execute(
+                """
+                SELECT issue, data FROM archived_issues
+                WHERE newsletter_id=%s
+                ORDER BY issue;
+                """,
+                (newsletter_id,),
+            )
+            for issue, data in _stream(cursor):
+                questions, answers = _load_archive(bytes(data))
+                for q_id, base, form, creator, text in questions:
+                    write(_question(q_id, issue, base, form, creator, text))
+                for _, question_id, name, text, img_path in answers:
+                    write(_answer(question_id, name, text, img_path))
+
+                counts["questions"] += len(questions)
+                counts["answers"] += len(answers)
+
+            cursor.execute(
+                """
+                SELECT issue, last_answer_at FROM issues
+                WHERE newsletter_id=%s AND last_answer_at IS NOT NULL
+                ORDER BY issue;
+                """,
+                (newsletter_id,),
+            )
+            for issue, last_answer_at in _stream(cursor):
+                write(
+                    {
+                        "record": "issue",
+                        "issue": issue,
+                        "last_answer_at": str(last_answer_at),
+                    }
+                )
+    finally:
+        cursor.close()
+        conn.close()
+
+    LOGGER.info(f"Exported newsletter {newsletter_id} to {path}: {counts}")
+    return counts
+
+
+def import_newsletter(path: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Load a file written by `export_newsletter` as a new newsletter.
+
+    Questions are given new ids, which answers are remapped to, so the only
+    state held is the map of question ids. Answers are sent in multi-row
+    inserts and the rows are committed every `IMPORT_BATCH` rows. A failed
+    import leaves the batches committed so far, under a newsletter id that
+    is logged, as the newsletter only gets its passcode and fingerprint in
+    the final commit. The issue summaries are rebuilt at the end.
+
+    Returns
+    -------
+    newsletter_id : int
+        The id of the imported newsletter
+    counts : dict[str, int]
+        The number of questions and answers imported
+    """
+    conn, cursor = _get_connection("import_newsletter")
+
+    newsletter_id = None
+    credentials: Tuple[bytes, Optional[bytes]] = (b"", None)
+    question_ids: Dict[int, int] = {}
+    answers: List[tuple] = []
+    last_answers: List[tuple] = []
+    counts = {"questions": 0, "answers": 0}
+    uncommitted = 0
+
+    def insert_answers() -> None:
+        cursor.executemany(
+            """
+            INSERT INTO answers (question_id, name, img_path, text)
+            VALUES (%s, %s, %s, %s);
+            """,
+            answers,
+        )
+        counts["answers"] += len(answers)
+        answers.clear()
+
+    try:
+        with _open(path, "r") as file:
+            for line in file:
+                record = json.loads(line)
+                kind = record["record"]
+
+                if newsletter_id is None and kind != "newsletter":
+                    raise ValueError(f"{path} does not start with a newsletter")
+
+                if kind == "newsletter":
+                    defaults = record.get("defaults")
+                    credentials = (
+                        base64.b64decode(record["passcode"]),
+                        # Exports from before fingerprints have none
+                        _decode(record.get("fingerprint")),
+                    )
+                    # An empty hash matches no passcode, so a half imported
+                    # newsletter cannot be logged in to
+                    cursor.execute(
+                        """
+                        INSERT INTO newsletters
+                        (title, passcode, folder, name, email, link, issue,
+                            default_questions)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+                        """,
+                        (
+                            record["title"],
+                            b"",
+                            record["folder"],
+                            record.get("name"),
+                            record.get("email"),
+                            record.get("link"),
+                            record.get("issue", 1),
+                            None if defaults is None else json.dumps(defaults),
+                        ),
+                    )
+                    newsletter_id = cursor.lastrowid
+                elif kind == "question":
+                    # One at a time as only single-row inserts report their id
+                    cursor.execute(
+                        """
+                        INSERT INTO questions
+                        (newsletter_id, issue, base, type, creator, text)
+                        VALUES (%s, %s, %s, %s, %s, %s);
+                        """,
+                        (
+                            newsletter_id,
+                            record["issue"],
+                            record["base"],
+                            record["type"],
+                            record["creator"],
+                            record["text"],
+                        ),
+                    )
+                    question_ids[record["id"]] = cursor.lastrowid
+                    counts["questions"] += 1
+                elif kind == "answer":
+                    answers.append(
+                        (
+                            question_ids[record["question_id"]],
+                            record["name"],
+                            record["img_path"],
+                            record["text"],
+                        )
+                    )
+                    if len(answers) >= IMPORT_BATCH:
+                        insert_answers()
+                elif kind == "issue":
+                    last_answers.append(
+                        (record["last_answer_at"], newsletter_id, record["issue"])
+                    )
+                else:
+                    raise ValueError(f"Unknown record {kind} in {path}")
+
+                uncommitted += 1
+                if uncommitted >= IMPORT_BATCH:
+                    if answers:
+                        insert_answers()
+                    conn.commit()
+                    uncommitted = 0
+
+        if newsletter_id is None:
+            raise ValueError(f"{path} is empty")
+
+        if answers:
+            insert_answers()
+
+        _rebuild_issues(cursor, newsletter_id)
+        cursor.executemany(
+            "UPDATE issues SET last_answer_at=%s WHERE newsletter_id=%s AND issue=%s;",
+            last_answers,
+        )
+        cursor.execute(
+            "UPDATE newsletters SET passcode=%s, fingerprint=%s WHERE id=%s;",
+            (*credentials, newsletter_id),
+        )
+        _bump_newsletters_version(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if newsletter_id is not None:
+            LOGGER.critical(f"Import of {path} as newsletter {newsletter_id} failed")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    # The imported passcode may be one remembered as wrong
+    cache.forget_failures()
+
+    LOGGER.info(f"Imported {path} as newsletter {newsletter_id}: {counts}")
+    return newsletter_id, counts
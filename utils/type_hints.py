@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic.dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -49,6 +50,16 @@ class NewsletterResponse:
     content_type: str = "text/plain"
 
 
+@dataclass
+class IssueSummary:
+    newsletter_id: int
+    issue: int
+    question_count: int
+    answer_count: int
+    respondent_count: int
+    last_answer_at: Optional[datetime] = None
+
+
 QuestionResponse = Tuple[str, str, str]
 Response = Tuple[str, int, List[QuestionResponse]]
 